@@ -1,19 +1,25 @@
 import base64
 import errno
+import hashlib
 import json
 import os
+import queue
 import stat
+import struct
 import sys
+import threading
 import time
-from collections import OrderedDict, defaultdict
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from functools import partial
 from getpass import getuser
 from io import BytesIO
 from itertools import groupby, zip_longest
 from typing import Iterator
-from shutil import get_terminal_size
+from shutil import copyfileobj, get_terminal_size
 
 from .platformflags import is_win32
 from .logger import create_logger
@@ -22,7 +28,8 @@
 
 from . import xattr
 from .chunker import get_chunker, Chunk
-from .cache import ChunkListEntry
+from .cache import ChunkListEntry, prune_archive_caches
+from .cache import pack_cache_object, unpack_cache_object, save_cache_object, load_cache_object
 from .crypto.key import key_factory, UnsupportedPayloadError
 from .compress import CompressionSpec
 from .constants import *  # NOQA
@@ -39,6 +46,7 @@
 from .helpers import safe_encode, make_path_safe, remove_surrogates, text_to_json, join_cmd, remove_dotdot_prefixes
 from .helpers import StableDict
 from .helpers import bin_to_hex
+from .helpers import get_cache_dir
 from .helpers import safe_ns
 from .helpers import ellipsis_truncate, ProgressIndicatorPercent, log_multi
 from .helpers import os_open, flags_normal, flags_dir
@@ -47,9 +55,9 @@
 from .helpers import sig_int
 from .helpers.lrucache import LRUCache
 from .manifest import Manifest
-from .patterns import PathPrefixPattern, FnmatchPattern, IECommand
+from .patterns import PathPrefixPattern, FnmatchPattern, IECommand, normalize_path
 from .item import Item, ArchiveItem, ItemDiff
-from .platform import acl_get, acl_set, set_flags, get_flags, swidth, hostname
+from .platform import acl_get, acl_set, set_flags, get_flags, swidth, hostname, SaveFile
 from .remote import cache_if_remote
 from .repository import Repository, LIST_SCAN_LIMIT
 from .repoobj import RepoObj
@@ -184,8 +192,8 @@ def is_special(mode):
     return stat.S_ISBLK(mode) or stat.S_ISCHR(mode) or stat.S_ISFIFO(mode)
 
 
-class BackupIO:
-    op = ""
+class BackupIO(threading.local):
+    op = ""  # per thread, see ExtractWorkers
 
     def __call__(self, op=""):
         self.op = op
@@ -259,27 +267,268 @@ def OsOpen(*, flags, path=None, parent_fd=None, name=None, noatime=False, op="op
             os.close(fd)
 
 
+class ChunkReuseCache:
+    """
+    Bounded cache of decrypted and decompressed file content chunks, used by DownloadPipeline.fetch_many.
+
+    When extracting many files sharing chunks, every chunk then only needs to be fetched, decrypted and
+    decompressed once (as long as it stays in the cache). If the chunk references of all items to extract
+    were counted before (see add_references), only chunks which will be needed again are kept and a chunk is dropped
+    after its last use. Otherwise (and if the cache is full), the least recently used chunks are evicted.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity  # in bytes
+        self.size = 0
+        self.chunks = OrderedDict()  # id -> data, least recently used first
+        self.refs = None  # ChunkIndex: id -> (references not used yet, size)
+        self.hlids = set()  # hardlinks seen by add_references
+        self.hits = self.misses = 0
+
+    def add_references(self, item):
+        """Count the chunk references of *item*, call this for all items which will be extracted."""
+        if self.refs is None:
+            self.refs = ChunkIndex()
+        if "chunks" not in item:
+            return
+        if "hlid" in item:
+            # only the first hardlink to the same inode gets its chunks fetched, the others are linked to it.
+            if item.hlid in self.hlids:
+                return
+            self.hlids.add(item.hlid)
+        for chunk in item.chunks:
+            self.refs.add(chunk.id, 1, chunk.size)
+
+    def missing(self, ids):
+        """Return the *ids* which are not cached (and need to be fetched from the repository)."""
+        return [id for id in ids if id not in self.chunks]
+
+    def get_many(self, ids):
+        """Return a dict id -> data with the cached chunks of *ids*."""
+        cached = {}
+        for id in ids:
+            if id in self.chunks:
+                self.chunks.move_to_end(id)
+                cached[id] = self.chunks[id]
+        return cached
+
+    def put(self, id, data):
+        if id in self.chunks or len(data) > self.capacity:
+            return
+        if self.refs is not None and self.refs.get(id, (0, 0))[0] <= 1:
+            return  # this is the last use (or the chunk was not counted), no need to keep it.
+        while self.size + len(data) > self.capacity:
+            self.size -= len(self.chunks.popitem(last=False)[1])
+        self.chunks[id] = data
+        self.size += len(data)
+
+    def used(self, id, hit):
+        """Account for one use of chunk *id*, *hit* tells whether it came from the cache."""
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.refs is not None and id in self.refs and self.refs[id].refcount > 0:
+            if self.refs.decref(id)[0] == 0 and id in self.chunks:
+                self.size -= len(self.chunks.pop(id))
+
+
+class RestoredFiles:
+    """
+    Remember the regular files restored by extract by their chunk list.
+
+    A later file with identical content is then copied from the already restored file (with os.copy_file_range,
+    which can create a reflink or copy within the kernel) instead of fetching and writing its chunks again.
+    """
+
+    def __init__(self):
+        self.paths = {}  # key -> path
+        self.keys = {}  # path -> key
+
+    @staticmethod
+    def key(item):
+        if not item.get("chunks"):
+            return None  # nothing to gain
+        h = hashlib.sha256()
+        for chunk in item.chunks:
+            h.update(chunk.id)
+        return h.digest()
+
+    def lookup(self, item):
+        """Return the path of a restored file with the same content as *item* or None."""
+        return self.paths.get(self.key(item))
+
+    def remember(self, item, path):
+        self.forget(path)
+        key = self.key(item)
+        if key is not None:
+            self.paths[key] = path
+            self.keys[path] = key
+
+    def forget(self, path):
+        """Forget the file at *path*, e.g. because it gets replaced."""
+        key = self.keys.pop(path, None)
+        if key is not None:
+            del self.paths[key]
+
+    def copy(self, item, fd):
+        """
+        Copy the content for *item* from an identical restored file into the file object *fd*.
+
+        Return whether this worked, otherwise the content needs to be extracted from the repository.
+        """
+        path = self.lookup(item)
+        if path is None:
+            return False
+        size = sum(chunk.size for chunk in item.chunks)
+        try:
+            with open(path, "rb") as src:
+                if os.fstat(src.fileno()).st_size != size:
+                    raise OSError(errno.EINVAL, "restored file has changed", path)
+                if not self._copy_file_range(src.fileno(), fd.fileno(), size):
+                    fd.seek(0)
+                    copyfileobj(src, fd)
+                    fd.flush()
+                fd.seek(size)
+        except OSError as e:
+            logger.debug(f"Can not copy {path} for {item.path}: {e}")
+            self.forget(path)
+            fd.seek(0)
+            fd.truncate()
+            return False
+        return True
+
+    @staticmethod
+    def _copy_file_range(src, dst, size):
+        if not hasattr(os, "copy_file_range"):
+            return False
+        offset = 0
+        try:
+            while offset < size:
+                copied = os.copy_file_range(src, dst, size - offset, offset, offset)
+                if copied == 0:
+                    raise OSError(errno.EIO, "unexpected end of file")
+                offset += copied
+        except OSError as e:
+            if offset == 0 and e.errno in (errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+                return False  # not supported here, copy in userspace.
+            raise
+        return True
+
+
 class DownloadPipeline:
     def __init__(self, repository, repo_objs):
         self.repository = repository
         self.repo_objs = repo_objs
+        self.chunk_cache = None  # ChunkReuseCache for file content chunks, see extract --chunk-cache
+        self.restored_files = None  # RestoredFiles to copy identical files from, see extract --reuse-identical
 
-    def unpack_many(self, ids, *, filter=None, preload=False):
+    def unpack_many(self, ids, *, filter=None, preload=False, locations=None, skip_chunks=None, item_keys=None):
         """
         Return iterator of items.
 
         *ids* is a chunk ID list of an item stream. *filter* is a callable
         to decide whether an item will be yielded. *preload* preloads the data chunks of every yielded item.
 
-        Warning: if *preload* is True then all data chunks of every yielded item have to be retrieved,
-        otherwise preloaded chunks will accumulate in RemoteRepository and create a memory leak.
+        The data chunks of a yielded item should be retrieved (using fetch_many with is_preloaded=True)
+        before the next item is requested. Preloaded chunks the caller did not retrieve by then (e.g. because
+        it skipped the item or hit an error) are cancelled, so they do not accumulate in RemoteRepository.
+
+        If a *locations* list is given, (path, chunk index, offset) of every item (no matter whether filtered)
+        is appended to it, see ArchivePathIndex.
+
+        If *skip_chunks* (a set of chunk indexes) is given, the items completely contained in these chunks
+        of the item stream are skipped without unpacking them.
+
+        If *item_keys* (a set of keys, including "path") is given, the items only have these keys. This is
+        cheaper for big items, e.g. their chunk lists are only converted to ChunkListEntry if "chunks" is wanted.
         """
-        hlids_preloaded = set()
+        if skip_chunks:
+            assert locations is None
+            items = self._unpack_skipping(ids, skip_chunks, item_keys)
+        else:
+            items = self._unpack(ids, locations, item_keys)
+        yield from self.filter_items(items, filter=filter, preload=preload)
+
+    def unpack_spans(self, ids, spans, *, filter=None, preload=False, item_keys=None):
+        """
+        Like unpack_many, but only unpack the items in *spans* of the item stream (see ArchivePathIndex.spans).
+
+        Only the chunks of the item stream containing these items are fetched.
+        """
+        yield from self.filter_items(self._unpack_spans(ids, spans, item_keys), filter=filter, preload=preload)
+
+    @staticmethod
+    def _item(_item, item_keys):
+        if item_keys is None:
+            return Item(internal_dict=_item)
+        return Item(internal_dict={key: _item[key] for key in item_keys if key in _item})
+
+    def _unpack(self, ids, locations, item_keys=None):
         unpacker = msgpack.Unpacker(use_list=False)
+        chunk_starts = []  # offset of every chunk in the item stream
+        stream_length = chunk_index = item_start = 0
         for data in self.fetch_many(ids, ro_type=ROBJ_ARCHIVE_STREAM):
+            chunk_starts.append(stream_length)
+            stream_length += len(data)
             unpacker.feed(data)
             for _item in unpacker:
-                item = Item(internal_dict=_item)
+                item = self._item(_item, item_keys)
+                if locations is not None:
+                    while chunk_index + 1 < len(chunk_starts) and chunk_starts[chunk_index + 1] <= item_start:
+                        chunk_index += 1
+                    locations.append((item.path, chunk_index, item_start - chunk_starts[chunk_index]))
+                    item_start = unpacker.tell()
+                yield item
+
+    def _unpack_skipping(self, ids, skip_chunks, item_keys=None):
+        unpacker = msgpack.Unpacker(use_list=False)
+        unpacker_start = 0  # offset of the unpacker's data in the item stream
+        item_start = chunk_start = stream_length = 0
+        for chunk_index, data in enumerate(self.fetch_many(ids, ro_type=ROBJ_ARCHIVE_STREAM)):
+            chunk_start, stream_length = stream_length, stream_length + len(data)
+            unpacker.feed(data)
+            skip = chunk_index in skip_chunks
+            while True:
+                # note: after OutOfData, tell() is not the item start, so it is only used after complete items.
+                if skip and item_start >= chunk_start:
+                    # this item starts in a chunk to skip (an item continuing from the previous chunk is unpacked)
+                    try:
+                        unpacker.skip()
+                    except msgpack.OutOfData:
+                        # the item continues in the next chunk, so it needs to be unpacked. an Unpacker must not
+                        # unpack after an incomplete skip, thus use a new one, starting with this item.
+                        unpacker = msgpack.Unpacker(use_list=False)
+                        unpacker.feed(memoryview(data)[item_start - chunk_start :])
+                        unpacker_start = item_start
+                        break
+                    item_start = unpacker_start + unpacker.tell()
+                    continue
+                try:
+                    _item = unpacker.unpack()
+                except msgpack.OutOfData:
+                    break
+                item_start = unpacker_start + unpacker.tell()
+                yield self._item(_item, item_keys)
+
+    def _unpack_spans(self, ids, spans, item_keys=None):
+        chunk_indexes = ArchivePathIndex.span_chunks(spans)
+        chunks = zip(chunk_indexes, self.fetch_many([ids[i] for i in chunk_indexes], ro_type=ROBJ_ARCHIVE_STREAM))
+        chunk_index = data = None
+        for span in spans:
+            unpacker = msgpack.Unpacker(use_list=False)
+            for i, start, end in ArchivePathIndex.span_pieces(span):
+                while chunk_index != i:
+                    chunk_index, data = next(chunks)
+                unpacker.feed(memoryview(data)[start:end])
+                for _item in unpacker:
+                    yield self._item(_item, item_keys)
+
+    def filter_items(self, items, *, filter=None, preload=False):
+        hlids_preloaded = set()
+        preloaded_ids = None
+        try:
+            for item in items:
                 if "chunks" in item:
                     item.chunks = [ChunkListEntry(*e) for e in item.chunks]
                 if filter and not filter(item):
@@ -294,16 +543,534 @@ def unpack_many(self, ids, *, filter=None, preload=False):
                         # not having the hardlink's chunks already preloaded for other hardlink to same inode
                         preload_chunks = True
                         hlids_preloaded.add(hlid)
+                    if preload_chunks and self.restored_files is not None:
+                        # Archive.extract_item will copy the content from an identical file.
+                        preload_chunks = self.restored_files.lookup(item) is None
                     if preload_chunks:
-                        self.repository.preload([c.id for c in item.chunks])
+                        preloaded_ids = [c.id for c in item.chunks]
+                        if self.chunk_cache is not None:
+                            # fetch_many will get these from the cache, see there.
+                            preloaded_ids = self.chunk_cache.missing(preloaded_ids)
+                        self.repository.preload(preloaded_ids)
                 yield item
+                if preloaded_ids is not None:
+                    # no-op if the caller retrieved all chunks of the item.
+                    self.repository.cancel_preload(preloaded_ids)
+                    preloaded_ids = None
+        finally:
+            if preloaded_ids is not None:
+                self.repository.cancel_preload(preloaded_ids)
 
     def fetch_many(self, ids, is_preloaded=False, ro_type=None):
         assert ro_type is not None
+        if self.chunk_cache is not None and ro_type == ROBJ_FILE_STREAM:
+            yield from self._fetch_many_cached(ids, is_preloaded=is_preloaded)
+            return
         for id_, cdata in zip(ids, self.repository.get_many(ids, is_preloaded=is_preloaded)):
             _, data = self.repo_objs.parse(id_, cdata, ro_type=ro_type)
             yield data
 
+    def _fetch_many_cached(self, ids, is_preloaded=False):
+        cache = self.chunk_cache
+        # decide upfront which chunks come from the cache, so this matches what unpack_many preloaded
+        # (the cache does not change between preloading an item's chunks and fetching them).
+        cached = cache.get_many(ids)
+        fetched = self.repository.get_many([id for id in ids if id not in cached], is_preloaded=is_preloaded)
+        for id_ in ids:
+            hit = id_ in cached
+            if hit:
+                data = cached[id_]
+            else:
+                _, data = self.repo_objs.parse(id_, next(fetched), ro_type=ROBJ_FILE_STREAM)
+                cache.put(id_, data)
+            cache.used(id_, hit)
+            yield data
+
+
+class ArchivePathIndex:
+    """
+    Sorted index of the paths in an archive, locating every item in the archive's item stream.
+
+    With it, commands given PATHs only need to fetch and decode the parts of the item stream containing
+    the matching items (instead of all items of the archive).
+
+    The index is built by a full pass over the item stream and kept in the local cache directory
+    (see save_cache_object).
+    """
+
+    VERSION = 1
+
+    def __init__(self, archive_id, paths, positions, starts):
+        self.archive_id = archive_id
+        self.paths = paths  # sorted, normalized paths of all items
+        self.positions = positions  # position of the item with paths[i] in the item stream
+        self.starts = starts  # (chunk index, offset) where the n-th item of the stream starts, plus the end
+
+    @classmethod
+    def from_locations(cls, archive_id, locations, chunk_count):
+        """Build the index from the *locations* collected by DownloadPipeline.unpack_many."""
+        paths = [normalize_path(path) for path, _, _ in locations]
+        positions = sorted(range(len(paths)), key=paths.__getitem__)
+        starts = [(chunk_index, offset) for _, chunk_index, offset in locations]
+        starts.append((chunk_count, 0))
+        return cls(archive_id, [paths[i] for i in positions], positions, starts)
+
+    @staticmethod
+    def cache_path(repository_id, archive_id):
+        return os.path.join(get_cache_dir(), "path-index", bin_to_hex(repository_id), bin_to_hex(archive_id))
+
+    @classmethod
+    def load(cls, path, archive_id, repo_objs):
+        """Return the index stored at *path* or None, if it does not exist (or is not usable)."""
+        index = load_cache_object(path, repo_objs, cls.VERSION, archive_id, what="path index")
+        if index is None:
+            return None
+        starts = index["starts"]
+        return cls(archive_id, index["paths"], index["positions"], list(zip(starts[0::2], starts[1::2])))
+
+    def save(self, path, repo_objs):
+        index = {
+            "version": self.VERSION,
+            "archive_id": self.archive_id,
+            "paths": self.paths,
+            "positions": self.positions,
+            "starts": [n for start in self.starts for n in start],
+        }
+        save_cache_object(path, index, repo_objs)
+
+    def lookup(self, prefixes):
+        """
+        Return the sorted item stream positions of the items matching *prefixes* (see PatternMatcher.path_prefixes).
+        """
+        paths = self.paths
+        found = set()
+
+        def add_range(lo, hi):
+            found.update(self.positions[bisect_left(paths, lo) : bisect_left(paths, hi)])
+
+        for prefix in prefixes:
+            if prefix.endswith(os.sep):
+                # the path itself and all paths below it
+                path = prefix[:-1]
+                add_range(path, path + "\0")
+                add_range(prefix, path + chr(ord(os.sep) + 1))
+            else:
+                add_range(prefix, prefix + "\0")
+        return sorted(found)
+
+    def spans(self, prefixes):
+        """
+        Return the parts of the item stream containing the items matching *prefixes*.
+
+        Every span is a (start chunk index, start offset, end chunk index, end offset) tuple.
+        Consecutive matching items are merged into one span.
+        """
+        spans = []
+        previous = None
+        for position in self.lookup(prefixes):
+            (start_chunk, start_offset), (end_chunk, end_offset) = self.starts[position], self.starts[position + 1]
+            if previous is not None and previous + 1 == position:
+                spans[-1] = spans[-1][:2] + (end_chunk, end_offset)
+            else:
+                spans.append((start_chunk, start_offset, end_chunk, end_offset))
+            previous = position
+        return spans
+
+    @staticmethod
+    def span_pieces(span):
+        """Yield (chunk index, start, end) of the chunk data pieces making up *span* (end is None: to the end)."""
+        start_chunk, start_offset, end_chunk, end_offset = span
+        for i in range(start_chunk, end_chunk + 1 if end_offset else end_chunk):
+            yield i, start_offset if i == start_chunk else 0, end_offset if i == end_chunk else None
+
+    @staticmethod
+    def span_chunks(spans):
+        """Return the sorted indexes of the item stream chunks needed for *spans*."""
+        return sorted({i for span in spans for i, _, _ in ArchivePathIndex.span_pieces(span)})
+
+
+class ArchiveDirectoryMap:
+    """
+    Map of the directories of an archive to their entries, locating every entry's item in the item stream.
+
+    With it, the contents of a directory can be listed without processing the whole archive (see borg mount
+    --lazy-dirs). The map is built by a full pass over the item stream and kept in the local cache directory.
+
+    Every directory is stored as a separate record (see pack_cache_object).
+    A record references the records of its subdirectories by (offset, size, id), the root record is referenced
+    by the trailer at the end of the file. So only the records of the visited directories need to be read.
+    """
+
+    VERSION = 1
+    trailer_struct = struct.Struct("<QQ32s")  # root record offset, size, id
+
+    def __init__(self, fd, root, repo_objs):
+        self.fd = fd
+        self.root = root  # reference of the root directory record
+        self.repo_objs = repo_objs
+
+    @staticmethod
+    def cache_path(repository_id, archive_id):
+        return os.path.join(get_cache_dir(), "directory-map", bin_to_hex(repository_id), bin_to_hex(archive_id))
+
+    @classmethod
+    def load(cls, path, archive_id, repo_objs):
+        """Return the map stored at *path* or None, if it does not exist (or is not usable)."""
+        try:
+            fd = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Ignoring unusable directory map {path}: {e}")
+            return None
+        try:
+            fd.seek(-cls.trailer_struct.size, os.SEEK_END)
+            offset, size, id = cls.trailer_struct.unpack(fd.read(cls.trailer_struct.size))
+            dmap = cls(fd, (offset, size, id), repo_objs)
+            root = dmap.read(dmap.root)
+            if root["version"] != cls.VERSION or root["archive_id"] != archive_id:
+                fd.close()
+                return None
+            return dmap
+        except (
+            OSError,
+            struct.error,
+            ValueError,
+            KeyError,
+            TypeError,
+            msgpack.UnpackException,
+            IntegrityErrorBase,
+        ) as e:
+            fd.close()
+            logger.warning(f"Ignoring unusable directory map {path}: {e}")
+            return None
+
+    @classmethod
+    def save(cls, path, archive_id, locations, chunk_count, repo_objs):
+        """Build the map from the *locations* collected by DownloadPipeline.unpack_many and save it to *path*."""
+        # sorting by path components puts every directory right before its contents, so the records can be
+        # written in one pass, only keeping the entries of the directories on the current path in memory.
+        items = []
+        for position, (item_path, chunk_index, start_offset) in enumerate(locations):
+            end_chunk, end_offset = locations[position + 1][1:] if position + 1 < len(locations) else (chunk_count, 0)
+            items.append((item_path.split("/"), position, (chunk_index, start_offset, end_chunk, end_offset)))
+        items.sort()
+        offset = 0
+
+        def write_record(fd, record):
+            nonlocal offset
+            id, cdata = pack_cache_object(record, repo_objs)
+            fd.write(cdata)
+            offset += len(cdata)
+            return offset - len(cdata), len(cdata), id
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with SaveFile(path, binary=True) as fd:
+            # the directories on the current path, as [name, span of the item or None, entries], root first
+            stack = [[None, None, []]]
+
+            def close_directory():
+                # write the record of the innermost directory (if it has entries), add it to its parent.
+                name, span, entries = stack.pop()
+                if name:
+                    stack[-1][2].append((name, span, write_record(fd, {"entries": entries}) if entries else None))
+
+            for parts, _, span in items:
+                # close the directories on the current path which are no parents of the item (or the item itself)
+                depth = 0
+                while depth < min(len(stack) - 1, len(parts)) and stack[depth + 1][0] == parts[depth]:
+                    depth += 1
+                while len(stack) - 1 > depth:
+                    close_directory()
+                if depth == len(parts):
+                    stack[-1][1] = span  # same path again, the later item wins
+                    continue
+                stack.extend([name, None, []] for name in parts[depth:-1])  # directories without an item
+                stack.append([parts[-1], span, []])
+            while len(stack) > 1:
+                close_directory()
+            ref = write_record(fd, {"version": cls.VERSION, "archive_id": archive_id, "entries": stack[0][2]})
+            fd.write(cls.trailer_struct.pack(*ref))
+
+    def close(self):
+        self.fd.close()
+
+    def read(self, ref):
+        offset, size, id = ref
+        self.fd.seek(offset)
+        cdata = self.fd.read(size)
+        return unpack_cache_object(id, cdata, self.repo_objs)
+
+    def entries(self, ref):
+        """
+        Return the entries of the directory record *ref* as list of (name, span, ref) tuples.
+
+        *span* locates the item in the item stream (see ArchivePathIndex.spans), it is None for directories
+        which have no item in the archive. *ref* references the record of a directory with entries or is None.
+        """
+        return [
+            (name, tuple(span) if span is not None else None, tuple(ref) if ref is not None else None)
+            for name, span, ref in self.read(ref)["entries"]
+        ]
+
+
+class ExtractJob:
+    """A regular file being extracted by ExtractWorkers or ExtractPlan."""
+
+    def __init__(self, item, path, fd):
+        self.item = item
+        self.path = path
+        self.fd = fd
+        self.size = 0  # bytes of file content processed
+        self.pending = 1  # queued chunks + 1 while still queueing chunks
+        self.error = None
+        self.aborted = False  # the caller's thread failed queueing the chunks
+        self.done = threading.Event()
+
+
+class ExtractWorkers:
+    """
+    Decrypt, decompress and write the content of regular files using a pool of worker threads.
+
+    Only the caller's thread accesses the repository: it gets the (preloaded) chunks of the files in archive
+    order and queues them together with their offset in the file. The workers write the chunks using pwrite,
+    so also the chunks of a single big file are processed in parallel. Whichever worker finishes the last chunk
+    of a file truncates it to its size and restores its attributes.
+
+    Files are created by the caller's thread (see Archive.extract_item), so hardlinks to them can be made
+    immediately. Errors concerning single files are collected and can be retrieved with warnings(), any other
+    exception in a worker is re-raised in the caller's thread.
+    """
+
+    def __init__(self, archive, workers, *, sparse=False):
+        self.archive = archive
+        self.sparse = sparse
+        self.lock = threading.Lock()
+        self.jobs = set()  # jobs not finished yet
+        self.failed = deque()  # jobs finished with a BackupError
+        self.error = None
+        # the bounded queue limits the memory used by chunks received from the repository, but not written yet.
+        self.queue = queue.Queue(maxsize=4 * workers)
+        self.threads = [threading.Thread(target=self.worker, daemon=True) for _ in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def close(self):
+        """Wait for all files to be finished and stop the workers."""
+        if self.threads:
+            for _ in self.threads:
+                self.queue.put(None)
+            for thread in self.threads:
+                thread.join()
+            self.threads = []
+        self.check()
+
+    def check(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def extract_file(self, item, path, fd, *, pi=None):
+        """Extract the content of *item* into *fd* (which is closed when finished)."""
+        self.check()
+        job = ExtractJob(item, path, fd)
+        with self.lock:
+            self.jobs.add(job)
+        try:
+            offset = 0
+            ids = [c.id for c in item.chunks]
+            for chunk, cdata in zip(item.chunks, self.archive.repository.get_many(ids, is_preloaded=True)):
+                with self.lock:
+                    job.pending += 1
+                self.queue.put((job, chunk.id, cdata, offset))
+                offset += chunk.size
+                if pi:
+                    pi.show(increase=chunk.size, info=[remove_surrogates(item.path)])
+        except BaseException:
+            job.aborted = True
+            raise
+        finally:
+            self.job_progress(job)
+
+    def wait(self, path):
+        """Wait until all files below *path* are finished."""
+        with self.lock:
+            jobs = [job for job in self.jobs if job.item.path.startswith(path)]
+        for job in jobs:
+            job.done.wait()
+
+    def warnings(self):
+        """Yield (item, BackupError) for files which were finished with an error since the last call."""
+        while self.failed:
+            job = self.failed.popleft()
+            yield job.item, job.error
+
+    def worker(self):
+        while True:
+            task = self.queue.get()
+            if task is None:
+                return
+            job, id, cdata, offset = task
+            try:
+                if job.error is None and not job.aborted:
+                    _, data = self.archive.repo_objs.parse(id, cdata, ro_type=ROBJ_FILE_STREAM)
+                    size = len(data)
+                    if not (self.sparse and zeros.startswith(data)):
+                        # all-zero chunks are left as a hole in a sparse file, the final truncate gives it its size.
+                        with backup_io("write"):
+                            data = memoryview(data)
+                            while data:
+                                written = os.pwrite(job.fd, data, offset)
+                                data, offset = data[written:], offset + written
+                    with self.lock:
+                        job.size += size
+            except BaseException as e:
+                job.error = e
+            finally:
+                self.job_progress(job)
+
+    def job_progress(self, job):
+        with self.lock:
+            job.pending -= 1
+            finished = job.pending == 0
+        if finished:
+            self.finish(job)
+
+    def finish(self, job):
+        item = job.item
+        try:
+            if job.error is None and not job.aborted:
+                with backup_io("truncate_and_attrs"):
+                    os.ftruncate(job.fd, job.size)
+                    self.archive.restore_attrs(job.path, item, fd=job.fd)
+                if "size" in item and item.size != job.size:
+                    raise BackupError(f"Size inconsistency detected: size {item.size}, chunks size {job.size}")
+                if "chunks_healthy" in item:
+                    raise BackupError("File has damaged (all-zero) chunks. Try running borg check --repair.")
+        except BaseException as e:
+            job.error = e
+        finally:
+            try:
+                with backup_io("close"):
+                    os.close(job.fd)
+            except BaseException as e:
+                if job.error is None:
+                    job.error = e
+            try:
+                if isinstance(job.error, BackupError):
+                    self.failed.append(job)
+                elif job.error is not None and self.error is None:
+                    self.error = job.error
+                with self.lock:
+                    self.jobs.discard(job)
+            finally:
+                # never leave wait() waiting for this job
+                job.done.set()
+
+
+class ExtractPlan:
+    """
+    Extract the content of regular files in the physical order of their chunks in the repository.
+
+    Archive.extract_item only creates the files and adds them to the plan. run() then reads every needed chunk
+    once, ordered by its location in the repository segment files, and writes it to all files and offsets using
+    it. For a deduplicated repository, this turns the random reads of extracting file by file into (mostly)
+    sequential reads. This needs a local repository, see Repository.physical_order.
+
+    Like with ExtractWorkers, errors concerning single files are collected and can be retrieved with warnings().
+    """
+
+    MAX_OPEN_FILES = 256
+
+    def __init__(self, archive, *, sparse=False):
+        self.archive = archive
+        self.sparse = sparse
+        self.chunks = {}  # chunk id -> (size, [(job, offset), ...])
+        self.failed = deque()  # jobs finished with a BackupError
+        self.fds = LRUCache(capacity=self.MAX_OPEN_FILES, dispose=os.close)  # job -> fd
+
+    def close(self):
+        self.fds.clear()
+
+    def add_file(self, item, path):
+        """Plan extracting the content of *item* into the (already created) file at *path*."""
+        job = ExtractJob(item, path, None)
+        job.pending = len(item.chunks)
+        offset = 0
+        for chunk in item.chunks:
+            self.chunks.setdefault(chunk.id, (chunk.size, []))[1].append((job, offset))
+            offset += chunk.size
+        if not job.pending:
+            self.finish(job)
+
+    def run(self, *, pi=None):
+        """Read all planned chunks in physical order and write them to the files."""
+        ids = self.archive.repository.physical_order(list(self.chunks))
+        try:
+            for id, cdata in zip(ids, self.archive.repository.get_many(ids)):
+                size, destinations = self.chunks.pop(id)
+                _, data = self.archive.repo_objs.parse(id, cdata, ro_type=ROBJ_FILE_STREAM)
+                # all-zero chunks are left as a hole in a sparse file, the final truncate gives it its size.
+                hole = self.sparse and zeros.startswith(data)
+                for job, offset in destinations:
+                    if job.error is None:
+                        try:
+                            if not hole:
+                                self.write(job, data, offset)
+                            job.size += len(data)
+                        except BackupError as e:
+                            job.error = e
+                    if pi:
+                        pi.show(increase=size, info=[remove_surrogates(job.item.path)])
+                    job.pending -= 1
+                    if job.pending == 0:
+                        self.finish(job)
+        finally:
+            self.close()
+
+    def warnings(self):
+        """Yield (item, BackupError) for files which were finished with an error since the last call."""
+        while self.failed:
+            job = self.failed.popleft()
+            yield job.item, job.error
+
+    def get_fd(self, job):
+        try:
+            return self.fds[job]
+        except KeyError:
+            with backup_io("open"):
+                fd = os.open(job.path, os.O_WRONLY)
+            self.fds[job] = fd
+            return fd
+
+    def write(self, job, data, offset):
+        fd = self.get_fd(job)
+        with backup_io("write"):
+            data = memoryview(data)
+            while data:
+                written = os.pwrite(fd, data, offset)
+                data, offset = data[written:], offset + written
+
+    def finish(self, job):
+        item = job.item
+        try:
+            if job.error is None:
+                fd = self.get_fd(job)
+                with backup_io("truncate_and_attrs"):
+                    os.ftruncate(fd, job.size)
+                    self.archive.restore_attrs(job.path, item, fd=fd)
+                if "size" in item and item.size != job.size:
+                    raise BackupError(f"Size inconsistency detected: size {item.size}, chunks size {job.size}")
+                if "chunks_healthy" in item:
+                    raise BackupError("File has damaged (all-zero) chunks. Try running borg check --repair.")
+        except BackupError as e:
+            job.error = e
+        finally:
+            if job in self.fds:
+                del self.fds[job]
+            if job.error is not None:
+                self.failed.append(job)
+
 
 class ChunkBuffer:
     BUFFER_SIZE = 8 * 1024 * 1024
@@ -612,12 +1379,59 @@ def __repr__(self):
     def item_filter(self, item, filter=None):
         return filter(item) if filter else True
 
-    def iter_items(self, filter=None, preload=False):
+    def iter_items(self, filter=None, preload=False, path_prefixes=None, skip_chunks=None, item_keys=None):
         # note: when calling this with preload=True, later fetch_many() must be called with
-        # is_preloaded=True or the RemoteRepository code will leak memory!
+        # is_preloaded=True to make use of the preloaded chunks (see DownloadPipeline.unpack_many).
+        # with path_prefixes (see PatternMatcher.path_prefixes), the archive's path index is used
+        # (and built, if it does not exist yet) to only unpack the items below these paths.
+        # skip_chunks is only used without path_prefixes. with item_keys, the items only have these keys.
+        filter_ = partial(self.item_filter, filter=filter)
+        if path_prefixes is None:
+            yield from self.pipeline.unpack_many(
+                self.metadata.items, preload=preload, filter=filter_, skip_chunks=skip_chunks, item_keys=item_keys
+            )
+            return
+        index = self.path_index(build=False)
+        if index is not None:
+            spans = index.spans(path_prefixes)
+            yield from self.pipeline.unpack_spans(
+                self.metadata.items, spans, preload=preload, filter=filter_, item_keys=item_keys
+            )
+            return
+        # no index yet, build it while unpacking all items anyway.
+        locations = []
         yield from self.pipeline.unpack_many(
-            self.metadata.items, preload=preload, filter=lambda item: self.item_filter(item, filter)
+            self.metadata.items, preload=preload, filter=filter_, locations=locations, item_keys=item_keys
         )
+        self.save_path_index(locations)
+
+    def path_index(self, build=True):
+        """Return the archive's ArchivePathIndex, build it if it does not exist yet (or return None if not *build*)."""
+        index_path = ArchivePathIndex.cache_path(self.repository.id, self.id)
+        index = ArchivePathIndex.load(index_path, self.id, self.repo_objs)
+        if index is None and build:
+            locations = []
+            for _ in self.pipeline.unpack_many(self.metadata.items, locations=locations):
+                pass
+            index = self.save_path_index(locations)
+        return index
+
+    def save_path_index(self, locations):
+        index = ArchivePathIndex.from_locations(self.id, locations, len(self.metadata.items))
+        index.save(ArchivePathIndex.cache_path(self.repository.id, self.id), self.repo_objs)
+        return index
+
+    def directory_map(self):
+        """Return the archive's ArchiveDirectoryMap, build it if it does not exist yet."""
+        path = ArchiveDirectoryMap.cache_path(self.repository.id, self.id)
+        dmap = ArchiveDirectoryMap.load(path, self.id, self.repo_objs)
+        if dmap is None:
+            locations = []
+            for _ in self.pipeline.unpack_many(self.metadata.items, locations=locations):
+                pass
+            ArchiveDirectoryMap.save(path, self.id, locations, len(self.metadata.items), self.repo_objs)
+            dmap = ArchiveDirectoryMap.load(path, self.id, self.repo_objs)
+        return dmap
 
     def add_item(self, item, show_progress=True, stats=None):
         if show_progress and self.show_progress:
@@ -711,28 +1525,12 @@ def calc_stats(self, cache, want_unique=True):
         if not want_unique:
             unique_size = 0
         else:
-
-            def add(id):
-                entry = cache.chunks[id]
-                archive_index.add(id, 1, entry.size)
-
-            archive_index = ChunkIndex()
-            sync = CacheSynchronizer(archive_index)
-            add(self.id)
-            # we must escape any % char in the archive name, because we use it in a format string, see #6500
-            arch_name_escd = self.name.replace("%", "%%")
-            pi = ProgressIndicatorPercent(
-                total=len(self.metadata.items),
-                msg="Calculating statistics for archive %s ... %%3.0f%%%%" % arch_name_escd,
-                msgid="archive.calc_stats",
-            )
-            for id, chunk in zip(self.metadata.items, self.repository.get_many(self.metadata.items)):
-                pi.show(increase=1)
-                add(id)
-                _, data = self.repo_objs.parse(id, chunk, ro_type=ROBJ_ARCHIVE_STREAM)
-                sync.feed(data)
+            # the references of an archive never change, so the cache keeps them like it does for a cache sync.
+            archive_index = cache.read_archive_index(self.id)
+            if archive_index is None:
+                archive_index = self.build_archive_index(cache)
+                cache.write_archive_index(self.id, archive_index)
             unique_size = archive_index.stats_against(cache.chunks)[1]
-            pi.finish()
 
         stats = Statistics(iec=self.iec)
         stats.usize = unique_size
@@ -740,6 +1538,33 @@ def add(id):
         stats.osize = self.metadata.size
         return stats
 
+    def build_archive_index(self, cache):
+        """Return a ChunkIndex with all chunks referenced by this archive, like LocalCache.sync builds it."""
+
+        def add(id):
+            entry = cache.chunks[id]
+            archive_index.add(id, 1, entry.size)
+
+        archive_index = ChunkIndex()
+        sync = CacheSynchronizer(archive_index)
+        add(self.id)
+        for id in self.metadata.item_ptrs:
+            add(id)
+        # we must escape any % char in the archive name, because we use it in a format string, see #6500
+        arch_name_escd = self.name.replace("%", "%%")
+        pi = ProgressIndicatorPercent(
+            total=len(self.metadata.items),
+            msg="Calculating statistics for archive %s ... %%3.0f%%%%" % arch_name_escd,
+            msgid="archive.calc_stats",
+        )
+        for id, chunk in zip(self.metadata.items, self.repository.get_many(self.metadata.items)):
+            pi.show(increase=1)
+            add(id)
+            _, data = self.repo_objs.parse(id, chunk, ro_type=ROBJ_ARCHIVE_STREAM)
+            sync.feed(data)
+        pi.finish()
+        return archive_index
+
     @contextmanager
     def extract_helper(self, item, path, hlm, *, dry_run=False):
         hardlink_set = False
@@ -774,6 +1599,8 @@ def extract_item(
         hlm=None,
         pi=None,
         continue_extraction=False,
+        workers=None,
+        plan=None,
     ):
         """
         Extract archive item.
@@ -786,6 +1613,8 @@ def extract_item(
         :param hlm: maps hlid to link_target for extracting subtrees with hardlinks correctly
         :param pi: ProgressIndicatorPercent (or similar) for file extraction progress (in bytes)
         :param continue_extraction: continue a previously interrupted extraction of same archive
+        :param workers: ExtractWorkers to extract the content of regular files in parallel
+        :param plan: ExtractPlan to extract the content of regular files later, in physical order
         """
 
         def same_item(item, st):
@@ -839,6 +1668,9 @@ def same_item(item, st):
 
         dest = self.cwd
         path = os.path.join(dest, item.path)
+        restored_files = self.pipeline.restored_files
+        if restored_files is not None:
+            restored_files.forget(path)  # it gets replaced now
         # Attempt to remove existing files, ignore errors on failure
         try:
             st = os.stat(path, follow_symlinks=False)
@@ -865,10 +1697,27 @@ def make_parent(path):
             with self.extract_helper(item, path, hlm) as hardlink_set:
                 if hardlink_set:
                     return
+                if workers is not None:
+                    with backup_io("open"):
+                        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+                    workers.extract_file(item, path, fd, pi=pi)
+                    return
+                if plan is not None:
+                    with backup_io("open"):
+                        os.close(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666))
+                    plan.add_file(item, path)
+                    return
                 with backup_io("open"):
                     fd = open(path, "wb")
                 with fd:
-                    ids = [c.id for c in item.chunks]
+                    with backup_io("write"):
+                        copied = restored_files is not None and restored_files.copy(item, fd)
+                    if copied:
+                        if pi:
+                            pi.show(increase=fd.tell(), info=[remove_surrogates(item.path)])
+                        ids = []
+                    else:
+                        ids = [c.id for c in item.chunks]
                     for data in self.pipeline.fetch_many(ids, is_preloaded=True, ro_type=ROBJ_FILE_STREAM):
                         if pi:
                             pi.show(increase=len(data), info=[remove_surrogates(item.path)])
@@ -891,6 +1740,8 @@ def make_parent(path):
                         )
                 if has_damaged_chunks:
                     raise BackupError("File has damaged (all-zero) chunks. Try running borg check --repair.")
+                if restored_files is not None:
+                    restored_files.remember(item, path)
             return
         with backup_io:
             # No repository access beyond this point.
@@ -1036,90 +1887,20 @@ def rename(self, name):
         del self.manifest.archives[oldname]
 
     def delete(self, stats, progress=False, forced=False):
-        class ChunksIndexError(Error):
-            """Chunk ID {} missing from chunks index, corrupted chunks index - aborting transaction."""
-
-        exception_ignored = object()
-
-        def fetch_async_response(wait=True):
-            try:
-                return self.repository.async_response(wait=wait)
-            except Repository.ObjectNotFound:
-                nonlocal error
-                # object not in repo - strange, but we wanted to delete it anyway.
-                if forced == 0:
-                    raise
-                error = True
-                return exception_ignored  # must not return None here
-
-        def chunk_decref(id, stats):
-            try:
-                self.cache.chunk_decref(id, stats, wait=False)
-            except KeyError:
-                cid = bin_to_hex(id)
-                raise ChunksIndexError(cid)
-            else:
-                fetch_async_response(wait=False)
-
-        error = False
-        try:
-            unpacker = msgpack.Unpacker(use_list=False)
-            items_ids = self.metadata.items
-            pi = ProgressIndicatorPercent(
-                total=len(items_ids), msg="Decrementing references %3.0f%%", msgid="archive.delete"
-            )
-            for i, (items_id, data) in enumerate(zip(items_ids, self.repository.get_many(items_ids))):
-                if progress:
-                    pi.show(i)
-                _, data = self.repo_objs.parse(items_id, data, ro_type=ROBJ_ARCHIVE_STREAM)
-                unpacker.feed(data)
-                chunk_decref(items_id, stats)
-                try:
-                    for item in unpacker:
-                        item = Item(internal_dict=item)
-                        if "chunks" in item:
-                            for chunk_id, size in item.chunks:
-                                chunk_decref(chunk_id, stats)
-                except (TypeError, ValueError):
-                    # if items metadata spans multiple chunks and one chunk got dropped somehow,
-                    # it could be that unpacker yields bad types
-                    if forced == 0:
-                        raise
-                    error = True
-            if progress:
-                pi.finish()
-        except (msgpack.UnpackException, Repository.ObjectNotFound):
-            # items metadata corrupted
-            if forced == 0:
-                raise
-            error = True
-
-        # delete the blocks that store all the references that end up being loaded into metadata.items:
-        for id in self.metadata.item_ptrs:
-            chunk_decref(id, stats)
-
-        # in forced delete mode, we try hard to delete at least the manifest entry,
-        # if possible also the archive superblock, even if processing the items raises
-        # some harmless exception.
-        chunk_decref(self.id, stats)
-        del self.manifest.archives[self.name]
-        while fetch_async_response(wait=True) is not None:
-            # we did async deletes, process outstanding results (== exceptions),
-            # so there is nothing pending when we return and our caller wants to commit.
-            pass
-        if error:
-            logger.warning("forced deletion succeeded, but the deleted archive was corrupted.")
-            logger.warning("borg check --repair is required to free all space.")
+        deleter = ArchiveDeleter(self.manifest, self.cache, stats, progress=progress, forced=forced)
+        deleter.add(self)
+        deleter.flush()
 
     @staticmethod
     def compare_archives_iter(
-        archive1: "Archive", archive2: "Archive", matcher=None, can_compare_chunk_ids=False
+        archive1: "Archive", archive2: "Archive", matcher=None, can_compare_chunk_ids=False, path_prefixes=None
     ) -> Iterator[ItemDiff]:
         """
         Yields an ItemDiff instance describing changes/indicating equality.
 
         :param matcher: PatternMatcher class to restrict results to only matching paths.
         :param can_compare_chunk_ids: Whether --chunker-params are the same for both archives.
+        :param path_prefixes: use the archives' path indexes to only read the items below these paths.
         """
 
         def compare_items(path: str, item1: Item, item2: Item):
@@ -1132,14 +1913,37 @@ def compare_items(path: str, item1: Item, item2: Item):
                 can_compare_chunk_ids=can_compare_chunk_ids,
             )
 
+        def shared_chunks(ids, shared):
+            # indexes of the chunks in ids which are also in the other item stream (as often as there)
+            shared = shared.copy()
+            indexes = set()
+            for index, id in enumerate(ids):
+                if shared[id] > 0:
+                    shared[id] -= 1
+                    indexes.add(index)
+            return indexes
+
         orphans_archive1: OrderedDict[str, Item] = OrderedDict()
         orphans_archive2: OrderedDict[str, Item] = OrderedDict()
 
         assert matcher is not None, "matcher must be set"
 
+        # the items in item stream chunks both archives have are the same, so they do not need to be compared.
+        # not done with include patterns, the matcher needs to see all items to report unmatched patterns.
+        skip_chunks1 = skip_chunks2 = None
+        if path_prefixes is None and not matcher.include_patterns:
+            ids1, ids2 = archive1.metadata.items, archive2.metadata.items
+            shared = Counter(ids1) & Counter(ids2)
+            if shared:
+                skip_chunks1, skip_chunks2 = shared_chunks(ids1, shared), shared_chunks(ids2, shared)
+
         for item1, item2 in zip_longest(
-            archive1.iter_items(lambda item: matcher.match(item.path)),
-            archive2.iter_items(lambda item: matcher.match(item.path)),
+            archive1.iter_items(
+                lambda item: matcher.match(item.path), path_prefixes=path_prefixes, skip_chunks=skip_chunks1
+            ),
+            archive2.iter_items(
+                lambda item: matcher.match(item.path), path_prefixes=path_prefixes, skip_chunks=skip_chunks2
+            ),
         ):
             if item1 and item2 and item1.path == item2.path:
                 yield compare_items(item1.path, item1, item2)
@@ -1167,6 +1971,239 @@ def compare_items(path: str, item1: Item, item2: Item):
             yield compare_items(path, deleted, deleted_item)
 
 
+class ArchiveDeleter:
+    """
+    Delete archives in batches.
+
+    The chunk references of all archives added are counted in a ChunkIndex first (the item metadata is parsed by
+    CacheSynchronizer, like in Archive.calc_stats). flush() then removes the counted references from the cache
+    with one chunk_decref call per chunk and deletes the chunks that are not referenced any more, together with
+    the archives.
+    """
+
+    class ChunksIndexError(Error):
+        """Chunk ID {} missing from chunks index, corrupted chunks index - aborting transaction."""
+
+    def __init__(self, manifest, cache, stats, *, progress=False, forced=False):
+        self.manifest = manifest
+        self.repository = manifest.repository
+        self.repo_objs = manifest.repo_objs
+        self.cache = cache
+        self.stats = stats
+        self.progress = progress
+        self.forced = forced
+        self.references = ChunkIndex()
+        self.archive_names = []  # the archives added since the last flush
+        self.error = False
+
+    def add(self, archive):
+        """Count the chunk references of *archive*, it gets deleted by the next flush()."""
+        items_ids = archive.metadata.items
+        sync = CacheSynchronizer(self.references)
+        pi = ProgressIndicatorPercent(total=len(items_ids), msg="Counting references %3.0f%%", msgid="archive.delete")
+        try:
+            for i, (items_id, data) in enumerate(zip(items_ids, self.repository.get_many(items_ids))):
+                if self.progress:
+                    pi.show(i)
+                _, data = self.repo_objs.parse(items_id, data, ro_type=ROBJ_ARCHIVE_STREAM)
+                self.references.add(items_id, 1, 0)
+                sync.feed(data)
+            if self.progress:
+                pi.finish()
+        except (ValueError, Repository.ObjectNotFound):
+            # items metadata corrupted
+            if self.forced == 0:
+                raise
+            self.error = True
+        # the blocks that store all the references that end up being loaded into metadata.items:
+        for id in archive.metadata.item_ptrs:
+            self.references.add(id, 1, 0)
+        # in forced delete mode, we try hard to delete at least the manifest entry,
+        # if possible also the archive superblock, even if processing the items raises
+        # some harmless exception.
+        self.references.add(archive.id, 1, 0)
+        self.archive_names.append(archive.name)
+
+    def flush(self):
+        """Delete the archives added since the last flush."""
+        exception_ignored = object()
+
+        def fetch_async_response(wait=True):
+            try:
+                return self.repository.async_response(wait=wait)
+            except Repository.ObjectNotFound:
+                # object not in repo - strange, but we wanted to delete it anyway.
+                if self.forced == 0:
+                    raise
+                self.error = True
+                return exception_ignored  # must not return None here
+
+        pi = ProgressIndicatorPercent(
+            total=len(self.references), msg="Decrementing references %3.0f%%", msgid="archive.delete"
+        )
+        for i, (id, (count, _)) in enumerate(self.references.iteritems()):
+            if self.progress:
+                pi.show(i)
+            try:
+                self.cache.chunk_decref(id, self.stats, wait=False, count=count)
+            except KeyError:
+                raise self.ChunksIndexError(bin_to_hex(id))
+            except Repository.ObjectNotFound:
+                # a local repository raises this right away, see fetch_async_response.
+                if self.forced == 0:
+                    raise
+                self.error = True
+            fetch_async_response(wait=False)
+        if self.progress:
+            pi.finish()
+        for archive_name in self.archive_names:
+            del self.manifest.archives[archive_name]
+        while fetch_async_response(wait=True) is not None:
+            # we did async deletes, process outstanding results (== exceptions),
+            # so there is nothing pending when we return and our caller wants to commit.
+            pass
+        self.references.clear()
+        self.archive_names = []
+        if self.error:
+            logger.warning("forced deletion succeeded, but the deleted archive was corrupted.")
+            logger.warning("borg check --repair is required to free all space.")
+            self.error = False
+
+
+class ChunkTransfer:
+    """
+    Transfer the content chunks of archive items from another repository.
+
+    Items are added in archive order. The chunks the target does not have yet (according to the cache, like
+    a sequential transfer would decide) are preloaded from the source repository, so the source can pipeline
+    their transmission. A pool of worker threads parses (decrypts, decompresses and verifies) them and, if they
+    get recompressed, compresses them again. Only the caller's thread accesses the repositories and the cache:
+    it encrypts and stores the transferred chunks asynchronously and increments the refcounts of the present
+    ones in archive order, then it yields the finished items.
+    """
+
+    # missing chunks to preload from the source repository ahead of the ones being fetched
+    PRELOAD_CHUNKS = 100
+    # items to keep queued (preloaded or pending) at most, e.g. while a big file is transferred
+    QUEUED_ITEMS = 1000
+
+    def __init__(self, repository, repo_objs, cache, stats, *, recompress="never", upgrader, workers=1):
+        assert recompress in ("never", "always")
+        self.repository = repository
+        self.repo_objs = repo_objs
+        self.cache = cache
+        self.stats = stats
+        self.recompress = recompress
+        self.upgrader = upgrader
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        self.queued = set()  # ids of the chunks queued for transfer
+        self.preloaded = deque()  # (item, present chunks, preloaded chunks) of items not fetched yet
+        self.preloaded_count = 0
+        # in archive order: ("chunk", id, size, result) of fetched chunks and ("item", item, present chunks)
+        self.pending = deque()
+        self.pending_count = 0
+        self.transfer_size = 0
+        self.present_size = 0
+
+    def transform(self, id, cdata):
+        """Return (meta, compressed data) of the chunk, to be stored in the target repository."""
+        if self.recompress == "never":
+            # keep compressed payload same, verify via assert_id (that will
+            # decompress, but avoid needing to compress it again):
+            meta, data = self.repo_objs.parse(
+                id, cdata, decompress=True, want_compressed=True, ro_type=ROBJ_FILE_STREAM
+            )
+            return self.upgrader.upgrade_compressed_chunk(meta, data)
+        # always decompress and re-compress file data chunks
+        meta, data = self.repo_objs.parse(id, cdata, ro_type=ROBJ_FILE_STREAM)
+        return self.cache.repo_objs.compressor.compress(meta, data)
+
+    def add(self, item):
+        """Queue *item* and yield the items finished meanwhile."""
+        present, transfer = [], []
+        for id, size in item.get("chunks", []):
+            if id not in self.queued and self.cache.seen_chunk(id, size) == 0:
+                # target repo does not yet have this chunk
+                self.queued.add(id)
+                transfer.append((id, size))
+                self.transfer_size += size
+            else:
+                present.append((id, size))
+                self.present_size += size
+        if transfer:
+            self.repository.preload([id for id, _ in transfer])
+        self.preloaded.append((item, present, transfer))
+        self.preloaded_count += len(transfer)
+        while self.preloaded_count > self.PRELOAD_CHUNKS or len(self.preloaded) > self.QUEUED_ITEMS:
+            yield from self.fetch()
+        # items with nothing to transfer (e.g. all chunks present already, directories) need not wait
+        while self.preloaded and not self.preloaded[0][2]:
+            yield from self.fetch()
+        while self.pending and (
+            self.pending[0][0] == "item" or len(self.pending) - self.pending_count > self.QUEUED_ITEMS
+        ):
+            yield from self.finish()
+
+    def fetch(self):
+        """Fetch the chunks of the oldest preloaded item and yield the items finished meanwhile."""
+        item, present, transfer = self.preloaded.popleft()
+        self.preloaded_count -= len(transfer)
+        ids = [id for id, _ in transfer]
+        for (id, size), cdata in zip(transfer, self.repository.get_many(ids, is_preloaded=True)):
+            if self.executor is None:
+                result = partial(self.transform, id, cdata)
+            else:
+                result = self.executor.submit(self.transform, id, cdata).result
+            self.pending.append(("chunk", id, size, result))
+            self.pending_count += 1
+            while self.pending_count > 4 * self.workers:
+                yield from self.finish()
+        self.pending.append(("item", item, present))
+
+    def finish(self):
+        """Store the oldest pending chunk or, if it is an item, yield it."""
+        kind, *args = self.pending.popleft()
+        if kind == "chunk":
+            id, size, result = args
+            self.pending_count -= 1
+            meta, data = result()
+            self.cache.add_chunk(
+                id,
+                meta,
+                data,
+                stats=self.stats,
+                wait=False,
+                compress=False,
+                size=size,
+                ctype=meta["ctype"],
+                clevel=meta["clevel"],
+                ro_type=ROBJ_FILE_STREAM,
+            )
+            self.cache.repository.async_response(wait=False)
+        else:
+            item, present = args
+            for id, size in present:
+                self.cache.chunk_incref(id, self.stats)
+            yield item
+
+    def flush(self):
+        """Finish all queued items and yield them."""
+        while self.preloaded:
+            yield from self.fetch()
+        while self.pending:
+            yield from self.finish()
+
+    def close(self):
+        """Cancel the transfer of the queued items not finished yet."""
+        self.repository.cancel_preload()
+        self.preloaded.clear()
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
 class MetadataCollector:
     def __init__(self, *, noatime, noctime, nobirthtime, numeric_ids, noflags, noacls, noxattrs):
         self.noatime = noatime
@@ -1813,6 +2850,115 @@ def __next__(self):
             return next(self._unpacker)
 
 
+class VerifiedSegments:
+    """
+    Record of the repository segments that check --verify-data has verified and when.
+
+    The record is a sorted list of non-overlapping [first_segment, last_segment, verified_at] ranges of segment
+    numbers (verified_at is a unix timestamp) and the (segment, offset) of the last chunk verified by a run
+    that stopped within a segment (resume). It is stored in the cache directory (see save_cache_object),
+    so that a tampered record can not hide segments from verification.
+    """
+
+    VERSION = 1
+
+    def __init__(self, ranges=None, resume=None):
+        self.ranges = ranges or []
+        self.resume = resume
+
+    @staticmethod
+    def cache_path(repository_id):
+        return os.path.join(get_cache_dir(), "verify-data", bin_to_hex(repository_id))
+
+    @classmethod
+    def load(cls, path, repo_objs):
+        """Return the record stored at *path* or an empty one, if it does not exist (or is not usable)."""
+        record = load_cache_object(path, repo_objs, cls.VERSION, what="verify-data record")
+        if record is None:
+            return cls()
+        return cls([list(r) for r in record["ranges"]], record["resume"] and tuple(record["resume"]))
+
+    def save(self, path, repo_objs):
+        save_cache_object(path, {"version": self.VERSION, "ranges": self.ranges, "resume": self.resume}, repo_objs)
+
+    def add(self, first, last, verified_at):
+        """Record that the segments first..last (inclusive) were verified at *verified_at*."""
+        ranges = []
+        for r_first, r_last, r_verified_at in self.ranges:
+            if r_last < first or r_first > last:
+                ranges.append([r_first, r_last, r_verified_at])
+                continue
+            if r_first < first:
+                ranges.append([r_first, first - 1, r_verified_at])
+            if r_last > last:
+                ranges.append([last + 1, r_last, r_verified_at])
+        ranges.append([first, last, verified_at])
+        ranges.sort()
+        # merge adjacent ranges verified at the same time (e.g. by the same check run)
+        self.ranges = []
+        for r in ranges:
+            if self.ranges and self.ranges[-1][1] + 1 == r[0] and self.ranges[-1][2] == r[2]:
+                self.ranges[-1][1] = r[1]
+            else:
+                self.ranges.append(r)
+
+    def todo(self, end_segment):
+        """
+        Return the (first, last) segment ranges up to *end_segment* in the order they shall be verified:
+
+        never verified segments first, then the verified segments, least recently verified first.
+        """
+        never, verified = [], []
+        segment = 0
+        for first, last, verified_at in self.ranges:
+            if first > end_segment:
+                break
+            if first > segment:
+                never.append((segment, first - 1))
+            verified.append((verified_at, first, min(last, end_segment)))
+            segment = last + 1
+        if segment <= end_segment:
+            never.append((segment, end_segment))
+        return never + [(first, last) for _, first, last in sorted(verified)]
+
+
+class CheckedArchive:
+    """
+    Chunk references of an archive that passed the archives check without errors.
+
+    The references (a compact ChunkIndex of all chunks the archive refers to, including its item metadata chunks)
+    are stored in the cache directory together with the time of the check (see save_cache_object). As archives
+    are immutable, a later "check --incremental" can use these instead of walking the archive again.
+    """
+
+    VERSION = 1
+
+    @staticmethod
+    def cache_dir(repository_id):
+        return os.path.join(get_cache_dir(), "checked-archives", bin_to_hex(repository_id))
+
+    @classmethod
+    def load(cls, path, archive_id, repo_objs):
+        """Return (checked_at, references) stored at *path* or None, if they do not exist (or are not usable)."""
+        checked = load_cache_object(path, repo_objs, cls.VERSION, archive_id, what="checked archive references")
+        if checked is None:
+            return None
+        return checked["checked_at"], ChunkIndex.read(BytesIO(checked["references"]), permit_compact=True)
+
+    @classmethod
+    def save(cls, path, archive_id, checked_at, references, repo_objs):
+        references.compact()
+        fd = BytesIO()
+        references.write(fd)
+        checked = {
+            "version": cls.VERSION,
+            "archive_id": archive_id,
+            "checked_at": checked_at,
+            "references": fd.getvalue(),
+        }
+        save_cache_object(path, checked, repo_objs)
+
+
 class ArchiveChecker:
     def __init__(self):
         self.error_found = False
@@ -1832,6 +2978,10 @@ def check(
         newer=None,
         oldest=None,
         newest=None,
+        workers=1,
+        verify_max_duration=0,
+        verify_max_size=0,
+        incremental=False,
     ):
         """Perform a set of checks on 'repository'
 
@@ -1841,6 +2991,9 @@ def check(
         :param older/newer: only check archives older/newer than timedelta from now
         :param oldest/newest: only check archives older/newer than timedelta from oldest/newest archive timestamp
         :param verify_data: integrity verification of data referenced by archives
+        :param workers: number of threads used for verify_data and to decode the archive metadata
+        :param verify_max_duration/verify_max_size: stop verify_data after that many seconds / bytes (0: unlimited)
+        :param incremental: do not walk archives that passed a previous check, only check their chunk references
         """
         logger.info("Starting archive consistency check...")
         self.check_all = not any((first, last, match, older, newer, oldest, newest))
@@ -1853,7 +3006,7 @@ def check(
         self.key = self.make_key(repository)
         self.repo_objs = RepoObj(self.key)
         if verify_data:
-            self.verify_data()
+            self.verify_data(workers=workers, max_duration=verify_max_duration, max_size=verify_max_size)
         if Manifest.MANIFEST_ID not in self.chunks:
             logger.error("Repository manifest not found!")
             self.error_found = True
@@ -1867,7 +3020,16 @@ def check(
                 del self.chunks[Manifest.MANIFEST_ID]
                 self.manifest = self.rebuild_manifest()
         self.rebuild_refcounts(
-            match=match, first=first, last=last, sort_by=sort_by, older=older, oldest=oldest, newer=newer, newest=newest
+            match=match,
+            first=first,
+            last=last,
+            sort_by=sort_by,
+            older=older,
+            oldest=oldest,
+            newer=newer,
+            newest=newest,
+            incremental=incremental,
+            workers=workers,
         )
         self.orphan_chunks_check()
         self.finish()
@@ -1912,49 +3074,128 @@ def make_key(self, repository):
             msg = "make_key: failed to create the key (tried %d chunks)" % attempt
         raise IntegrityError(msg)
 
-    def verify_data(self):
+    def verify_data(self, workers=1, max_duration=0, max_size=0):
+        """
+        Verify all repository objects by decrypting and decompressing them (which also checks their id).
+
+        With *workers* > 1, the objects are read by the calling thread and verified by a thread pool.
+
+        With *max_duration* (seconds) or *max_size* (bytes), stop when that budget is used up. Which segments were
+        verified when is recorded in the cache (see VerifiedSegments), so that the next such run continues with the
+        never verified segments and then with the least recently verified ones. Without a budget, all segments are
+        verified in order.
+        """
         logger.info("Starting cryptographic data integrity verification...")
         chunks_count_index = len(self.chunks)
         chunks_count_segments = 0
+        verified_size = 0
+        started = time.monotonic()
+        stopped = False
+        verified_path = VerifiedSegments.cache_path(self.repository.id)
+        verified = VerifiedSegments.load(verified_path, self.repo_objs)
+        verified_at = int(time.time())
+        _, (_, _, end_segment) = self.repository.scan(limit=1)
+        if max_duration or max_size:
+            todo = verified.todo(end_segment)
+        else:
+            todo = [(0, end_segment)]
+            verified.resume = None
+        # whether chunks verified by a previous run were skipped (they are not in chunks_count_segments then)
+        resumed = False
         errors = 0
         defect_chunks = []
         pi = ProgressIndicatorPercent(
             total=chunks_count_index, msg="Verifying data %6.2f%%", step=0.01, msgid="check.verify_data"
         )
-        state = None
-        while True:
-            chunk_ids, state = self.repository.scan(limit=100, state=state)
-            if not chunk_ids:
-                break
-            chunks_count_segments += len(chunk_ids)
-            chunk_data_iter = self.repository.get_many(chunk_ids)
-            chunk_ids_revd = list(reversed(chunk_ids))
-            while chunk_ids_revd:
-                pi.show()
-                chunk_id = chunk_ids_revd.pop(-1)  # better efficiency
-                try:
-                    encrypted_data = next(chunk_data_iter)
-                except (Repository.ObjectNotFound, IntegrityErrorBase) as err:
-                    self.error_found = True
-                    errors += 1
-                    logger.error("chunk %s: %s", bin_to_hex(chunk_id), err)
-                    if isinstance(err, IntegrityErrorBase):
-                        defect_chunks.append(chunk_id)
-                    # as the exception killed our generator, make a new one for remaining chunks:
-                    if chunk_ids_revd:
-                        chunk_ids = list(reversed(chunk_ids_revd))
-                        chunk_data_iter = self.repository.get_many(chunk_ids)
-                else:
-                    try:
-                        # we must decompress, so it'll call assert_id() in there:
-                        self.repo_objs.parse(chunk_id, encrypted_data, decompress=True, ro_type=ROBJ_DONTCARE)
-                    except IntegrityErrorBase as integrity_error:
-                        self.error_found = True
-                        errors += 1
-                        logger.error("chunk %s, integrity error: %s", bin_to_hex(chunk_id), integrity_error)
-                        defect_chunks.append(chunk_id)
+
+        def verify_chunk(chunk_id, encrypted_data):
+            try:
+                # we must decompress, so it'll call assert_id() in there:
+                self.repo_objs.parse(chunk_id, encrypted_data, decompress=True, ro_type=ROBJ_DONTCARE)
+            except IntegrityErrorBase as integrity_error:
+                return integrity_error
+
+        def report(chunk_id, integrity_error):
+            nonlocal errors
+            if integrity_error is not None:
+                self.error_found = True
+                errors += 1
+                logger.error("chunk %s, integrity error: %s", bin_to_hex(chunk_id), integrity_error)
+                defect_chunks.append(chunk_id)
+
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        # (chunk id, future) of the chunks being verified by the executor, in scan order
+        pending = deque()
+        try:
+            for first_segment, last_segment in todo:
+                # scan the segments first_segment..last_segment (see Repository.scan), if a previous run
+                # stopped within first_segment, continue after the last chunk it verified.
+                offset = 0
+                if verified.resume and verified.resume[0] == first_segment:
+                    offset, verified.resume = verified.resume[1], None
+                    resumed = resumed or offset > 0
+                state = (first_segment, offset, last_segment)
+                while True:
+                    chunk_ids, next_state = self.repository.scan(limit=100 * workers, state=state)
+                    if not chunk_ids:
+                        verified.add(first_segment, last_segment, verified_at)
+                        break
+                    chunk_data_iter = self.repository.get_many(chunk_ids)
+                    chunk_ids_revd = list(reversed(chunk_ids))
+                    while chunk_ids_revd:
+                        pi.show()
+                        chunks_count_segments += 1
+                        chunk_id = chunk_ids_revd.pop(-1)  # better efficiency
+                        try:
+                            encrypted_data = next(chunk_data_iter)
+                        except (Repository.ObjectNotFound, IntegrityErrorBase) as err:
+                            self.error_found = True
+                            errors += 1
+                            logger.error("chunk %s: %s", bin_to_hex(chunk_id), err)
+                            if isinstance(err, IntegrityErrorBase):
+                                defect_chunks.append(chunk_id)
+                            # as the exception killed our generator, make a new one for remaining chunks:
+                            if chunk_ids_revd:
+                                chunk_ids = list(reversed(chunk_ids_revd))
+                                chunk_data_iter = self.repository.get_many(chunk_ids)
+                        else:
+                            verified_size += len(encrypted_data)
+                            if executor is None:
+                                report(chunk_id, verify_chunk(chunk_id, encrypted_data))
+                                continue
+                            pending.append((chunk_id, executor.submit(verify_chunk, chunk_id, encrypted_data)))
+                            # limit the memory used by the data of the pending chunks
+                            while len(pending) > 4 * workers or pending and pending[0][1].done():
+                                chunk_id, future = pending.popleft()
+                                report(chunk_id, future.result())
+                    # all segments before the one of the last scanned chunk are completely verified now
+                    if next_state[0] > first_segment:
+                        verified.add(first_segment, next_state[0] - 1, verified_at)
+                    state = next_state
+                    # the budget is checked per scanned batch, so every run makes progress
+                    if (max_duration and time.monotonic() - started >= max_duration) or (
+                        max_size and verified_size >= max_size
+                    ):
+                        stopped = True
+                        break
+                if stopped:
+                    break
+            while pending:
+                chunk_id, future = pending.popleft()
+                report(chunk_id, future.result())
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        verified.resume = state[:2] if stopped else None
+        verified.save(verified_path, self.repo_objs)
         pi.finish()
-        if chunks_count_index != chunks_count_segments:
+        if stopped:
+            logger.info(
+                "Stopped cryptographic data integrity verification after %s, the next check will continue with the "
+                "segments that were not verified for the longest time.",
+                format_file_size(verified_size),
+            )
+        elif chunks_count_index != chunks_count_segments and not resumed:
             logger.error("Repo/Chunks index object count vs. segment files object count mismatch.")
             logger.error(
                 "Repo/Chunks index: %d objects != segment files: %d objects", chunks_count_index, chunks_count_segments
@@ -2058,14 +3299,36 @@ def valid_archive(obj):
         return manifest
 
     def rebuild_refcounts(
-        self, first=0, last=0, sort_by="", match=None, older=None, newer=None, oldest=None, newest=None
+        self,
+        first=0,
+        last=0,
+        sort_by="",
+        match=None,
+        older=None,
+        newer=None,
+        oldest=None,
+        newest=None,
+        incremental=False,
+        workers=1,
     ):
         """Rebuild object reference counts by walking the metadata
 
         Missing and/or incorrect data is repaired when detected
+
+        With *workers* > 1, the item metadata chunks are decrypted and decompressed ahead by a thread pool,
+        while they are still fetched, unpacked and checked (including all reference count updates and
+        repair writes) in order by the calling thread. The look-ahead does not cross archive boundaries
+        (nor runs of missing item metadata chunks): the archive metadata of the next archive is only
+        fetched and checked after the current archive was processed completely.
+
+        With *incremental*, the chunk references of archives without errors are remembered in the cache (see
+        CheckedArchive) and archives with remembered references are not walked again if all referenced
+        chunks are still present, their references are just added to the reference counts.
         """
         # Exclude the manifest from chunks (manifest entry might be already deleted from self.chunks)
         self.chunks.pop(Manifest.MANIFEST_ID, None)
+        checked_dir = CheckedArchive.cache_dir(self.repository.id)
+        checked_at = int(time.time())
 
         def mark_as_possibly_superseded(id_):
             if self.chunks.get(id_, ChunkIndexEntry(0, 0)).refcount == 0:
@@ -2166,6 +3429,8 @@ def replacement_chunk(size):
                 logger.info(f"{archive_name}: {item.path}: Completely healed previously damaged file!")
                 del item.chunks_healthy
             item.chunks = chunk_list
+            for chunk_id, size in chunk_list:
+                references.add(chunk_id, 1, size)
             if "size" in item:
                 item_size = item.size
                 item_chunks_size = item.get_size(from_chunks=True)
@@ -2177,6 +3442,28 @@ def replacement_chunk(size):
                         )
                     )
 
+        def parse(chunk_id, cdata):
+            _, data = self.repo_objs.parse(chunk_id, cdata, ro_type=ROBJ_ARCHIVE_STREAM)
+            return data
+
+        def parsed_chunks(repository, chunk_ids):
+            """Yield (chunk_id, result) for the item metadata chunks, result() returns the parsed data."""
+            cdatas = repository.get_many(chunk_ids)
+            if executor is None:
+                for chunk_id, cdata in zip(chunk_ids, cdatas):
+                    yield chunk_id, partial(parse, chunk_id, cdata)
+                return
+            # (chunk id, future) of the chunks being parsed by the executor, in order
+            pending = deque()
+            for chunk_id, cdata in zip(chunk_ids, cdatas):
+                pending.append((chunk_id, executor.submit(parse, chunk_id, cdata)))
+                if len(pending) > 4 * workers:
+                    chunk_id, future = pending.popleft()
+                    yield chunk_id, future.result
+            while pending:
+                chunk_id, future = pending.popleft()
+                yield chunk_id, future.result
+
         def robust_iterator(archive):
             """Iterates through all archive items
 
@@ -2225,10 +3512,9 @@ def valid_item(obj):
                     continue
                 if state > 0:
                     unpacker.resync()
-                for chunk_id, cdata in zip(items, repository.get_many(items)):
+                for chunk_id, result in parsed_chunks(repository, items):
                     try:
-                        _, data = self.repo_objs.parse(chunk_id, cdata, ro_type=ROBJ_ARCHIVE_STREAM)
-                        unpacker.feed(data)
+                        unpacker.feed(result())
                         for item in unpacker:
                             valid, reason = valid_item(item)
                             if valid:
@@ -2277,51 +3563,86 @@ def valid_item(obj):
         pi = ProgressIndicatorPercent(
             total=num_archives, msg="Checking archives %3.1f%%", step=0.1, msgid="check.rebuild_refcounts"
         )
-        with cache_if_remote(self.repository) as repository:
-            for i, info in enumerate(archive_infos):
-                pi.show(i)
-                logger.info(f"Analyzing archive {info.name} ({i + 1}/{num_archives})")
-                archive_id = info.id
-                if archive_id not in self.chunks:
-                    logger.error("Archive metadata block %s is missing!", bin_to_hex(archive_id))
-                    self.error_found = True
-                    del self.manifest.archives[info.name]
-                    continue
-                mark_as_possibly_superseded(archive_id)
-                cdata = self.repository.get(archive_id)
-                try:
-                    _, data = self.repo_objs.parse(archive_id, cdata, ro_type=ROBJ_ARCHIVE_META)
-                except IntegrityError as integrity_error:
-                    logger.error("Archive metadata block %s is corrupted: %s", bin_to_hex(archive_id), integrity_error)
-                    self.error_found = True
-                    del self.manifest.archives[info.name]
-                    continue
-                archive = self.key.unpack_archive(data)
-                archive = ArchiveItem(internal_dict=archive)
-                if archive.version != 2:
-                    raise Exception("Unknown archive metadata version")
-                items_buffer = ChunkBuffer(self.key)
-                items_buffer.write_chunk = add_callback
-                for item in robust_iterator(archive):
-                    if "chunks" in item:
-                        verify_file_chunks(info.name, item)
-                    items_buffer.add(item)
-                items_buffer.flush(flush=True)
-                for previous_item_id in archive_get_items(
-                    archive, repo_objs=self.repo_objs, repository=self.repository
-                ):
-                    mark_as_possibly_superseded(previous_item_id)
-                for previous_item_ptr in archive.item_ptrs:
-                    mark_as_possibly_superseded(previous_item_ptr)
-                archive.item_ptrs = archive_put_items(
-                    items_buffer.chunks, repo_objs=self.repo_objs, add_reference=add_reference
-                )
-                data = self.key.pack_metadata(archive.as_dict())
-                new_archive_id = self.key.id_hash(data)
-                cdata = self.repo_objs.format(new_archive_id, {}, data, ro_type=ROBJ_ARCHIVE_META)
-                add_reference(new_archive_id, len(data), cdata)
-                self.manifest.archives[info.name] = (new_archive_id, info.ts)
-            pi.finish()
+        executor = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+        try:
+            with cache_if_remote(self.repository) as repository:
+                for i, info in enumerate(archive_infos):
+                    pi.show(i)
+                    logger.info(f"Analyzing archive {info.name} ({i + 1}/{num_archives})")
+                    archive_id = info.id
+                    if archive_id not in self.chunks:
+                        logger.error("Archive metadata block %s is missing!", bin_to_hex(archive_id))
+                        self.error_found = True
+                        del self.manifest.archives[info.name]
+                        continue
+                    mark_as_possibly_superseded(archive_id)
+                    checked_path = os.path.join(checked_dir, bin_to_hex(archive_id))
+                    checked = CheckedArchive.load(checked_path, archive_id, self.repo_objs) if incremental else None
+                    if checked is not None:
+                        archive_checked_at, archive_references = checked
+                        # archives are immutable, so the archive is still fine if all chunks it refers to are present.
+                        if all(id_ in self.chunks for id_, _ in archive_references.iteritems()):
+                            logger.info(
+                                "Skipping archive %s, checked at %s.",
+                                info.name,
+                                OutputTimestamp(datetime.fromtimestamp(archive_checked_at, timezone.utc)),
+                            )
+                            self.chunks.merge(archive_references)
+                            continue
+                    cdata = self.repository.get(archive_id)
+                    try:
+                        _, data = self.repo_objs.parse(archive_id, cdata, ro_type=ROBJ_ARCHIVE_META)
+                    except IntegrityError as integrity_error:
+                        logger.error(
+                            "Archive metadata block %s is corrupted: %s", bin_to_hex(archive_id), integrity_error
+                        )
+                        self.error_found = True
+                        del self.manifest.archives[info.name]
+                        continue
+                    archive = self.key.unpack_archive(data)
+                    archive = ArchiveItem(internal_dict=archive)
+                    if archive.version != 2:
+                        raise Exception("Unknown archive metadata version")
+                    error_found, self.error_found = self.error_found, False
+                    references = ChunkIndex()
+                    items_buffer = ChunkBuffer(self.key)
+                    items_buffer.write_chunk = add_callback
+                    for item in robust_iterator(archive):
+                        if "chunks" in item:
+                            verify_file_chunks(info.name, item)
+                        items_buffer.add(item)
+                    items_buffer.flush(flush=True)
+                    for previous_item_id in archive_get_items(
+                        archive, repo_objs=self.repo_objs, repository=self.repository
+                    ):
+                        mark_as_possibly_superseded(previous_item_id)
+                        references.add(previous_item_id, 1, 0)
+                    for previous_item_ptr in archive.item_ptrs:
+                        mark_as_possibly_superseded(previous_item_ptr)
+                        references.add(previous_item_ptr, 1, 0)
+                    references.add(archive_id, 1, 0)
+                    archive.item_ptrs = archive_put_items(
+                        items_buffer.chunks, repo_objs=self.repo_objs, add_reference=add_reference
+                    )
+                    data = self.key.pack_metadata(archive.as_dict())
+                    new_archive_id = self.key.id_hash(data)
+                    cdata = self.repo_objs.format(new_archive_id, {}, data, ro_type=ROBJ_ARCHIVE_META)
+                    add_reference(new_archive_id, len(data), cdata)
+                    self.manifest.archives[info.name] = (new_archive_id, info.ts)
+                    if incremental and not self.error_found:
+                        CheckedArchive.save(checked_path, archive_id, checked_at, references, self.repo_objs)
+                    self.error_found |= error_found
+                pi.finish()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
+        # forget the deleted archives. the checked archives got new ids if they were rebuilt differently,
+        # the cache files are stored under their original ids.
+        archive_infos_now = self.manifest.archives.list()
+        archive_names = {info.name for info in archive_infos_now}
+        archive_ids = {info.id for info in archive_infos_now}
+        archive_ids.update(info.id for info in archive_infos if info.name in archive_names)
+        prune_archive_caches(self.manifest, archive_ids)
 
     def orphan_chunks_check(self):
         if self.check_all:
@@ -2351,6 +3672,15 @@ def finish(self):
 
 
 class ArchiveRecreater:
+    """
+    Recreate archives, see borg recreate.
+
+    File content is only read if the archive gets rechunked, otherwise the items just reference the chunks again.
+    When rechunking with *workers* > 1, a thread pool parses (decrypts, decompresses) the chunks read from the
+    repository and hashes and compresses the new chunks. The caller's thread still reads the repository, chunks
+    the content and encrypts and stores the new chunks, so the items and their chunks stay in the same order.
+    """
+
     class Interrupted(Exception):
         def __init__(self, metadata=None):
             self.metadata = metadata or {}
@@ -2376,6 +3706,7 @@ def __init__(
         timestamp=None,
         checkpoint_interval=1800,
         checkpoint_volume=0,
+        workers=1,
     ):
         self.manifest = manifest
         self.repository = manifest.repository
@@ -2402,6 +3733,8 @@ def __init__(
         self.print_file_status = file_status_printer or (lambda *args: None)
         self.checkpoint_interval = None if dry_run else checkpoint_interval
         self.checkpoint_volume = None if dry_run else checkpoint_volume
+        self.workers = workers
+        self.executor = None
 
     def recreate(self, archive_name, comment=None, target_name=None):
         assert not self.is_temporary_archive(archive_name)
@@ -2420,14 +3753,21 @@ def recreate(self, archive_name, comment=None, target_name=None):
     def process_items(self, archive, target):
         matcher = self.matcher
 
-        for item in archive.iter_items():
-            if not matcher.match(item.path):
-                self.print_file_status("-", item.path)  # excluded (either by "-" or by "!")
-                continue
-            if self.dry_run:
-                self.print_file_status("+", item.path)  # included
-            else:
-                self.process_item(archive, target, item)
+        if self.workers > 1 and target.recreate_rechunkify and not self.dry_run:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for item in archive.iter_items():
+                if not matcher.match(item.path):
+                    self.print_file_status("-", item.path)  # excluded (either by "-" or by "!")
+                    continue
+                if self.dry_run:
+                    self.print_file_status("+", item.path)  # included
+                else:
+                    self.process_item(archive, target, item)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True, cancel_futures=True)
+                self.executor = None
         if self.progress:
             target.stats.show_progress(final=True)
 
@@ -2447,7 +3787,11 @@ def process_chunks(self, archive, target, item):
                 self.cache.chunk_incref(chunk_id, target.stats)
             return item.chunks
         chunk_iterator = self.iter_chunks(archive, target, list(item.chunks))
-        chunk_processor = partial(self.chunk_processor, target)
+        if self.executor is None:
+            chunk_processor = partial(self.chunk_processor, target)
+        else:
+            chunk_iterator = self.prepare_chunks(chunk_iterator)
+            chunk_processor = partial(self.prepared_chunk_processor, target)
         target.process_file_chunks(item, self.cache, target.stats, self.progress, chunk_iterator, chunk_processor)
 
     def chunk_processor(self, target, chunk):
@@ -2459,8 +3803,65 @@ def chunk_processor(self, target, chunk):
         self.seen_chunks.add(chunk_entry.id)
         return chunk_entry
 
+    def prepare_chunk(self, chunk):
+        """Hash and compress *chunk* (in a worker thread), return (chunk id, size, meta, compressed data)."""
+        chunk_id, data = cached_hash(chunk, self.key.id_hash)
+        meta, data_compressed = self.repo_objs.compressor.compress({}, data)
+        return chunk_id, len(data), meta, data_compressed
+
+    def prepare_chunks(self, chunks):
+        """Yield a callable returning the result of prepare_chunk for each of *chunks*, in order."""
+        pending = deque()
+        for chunk in chunks:
+            if isinstance(chunk.data, memoryview):
+                # the chunker reuses its buffer for the next chunks, but we process this chunk later.
+                chunk = Chunk(bytes(chunk.data), **chunk.meta)
+            pending.append(self.executor.submit(self.prepare_chunk, chunk).result)
+            if len(pending) > 4 * self.workers:
+                yield pending.popleft()
+        yield from pending
+
+    def prepared_chunk_processor(self, target, result):
+        chunk_id, size, meta, data = result()
+        if chunk_id in self.seen_chunks:
+            return self.cache.chunk_incref(chunk_id, target.stats)
+        # the chunk was compressed by a worker, encrypting it must be done here (the cipher's IV counter is shared).
+        chunk_entry = self.cache.add_chunk(
+            chunk_id,
+            meta,
+            data,
+            stats=target.stats,
+            wait=False,
+            compress=False,
+            size=size,
+            ctype=meta["ctype"],
+            clevel=meta["clevel"],
+            ro_type=ROBJ_FILE_STREAM,
+        )
+        self.cache.repository.async_response(wait=False)
+        self.seen_chunks.add(chunk_entry.id)
+        return chunk_entry
+
+    def fetch_many(self, archive, ids):
+        """Yield the data of the chunks *ids*, parsed by the workers."""
+        if self.executor is None:
+            yield from archive.pipeline.fetch_many(ids, ro_type=ROBJ_FILE_STREAM)
+            return
+
+        def parse(id, cdata):
+            _, data = self.repo_objs.parse(id, cdata, ro_type=ROBJ_FILE_STREAM)
+            return data
+
+        pending = deque()
+        for id, cdata in zip(ids, self.repository.get_many(ids)):
+            pending.append(self.executor.submit(parse, id, cdata))
+            if len(pending) > 4 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
     def iter_chunks(self, archive, target, chunks):
-        chunk_iterator = archive.pipeline.fetch_many([chunk_id for chunk_id, _ in chunks], ro_type=ROBJ_FILE_STREAM)
+        chunk_iterator = self.fetch_many(archive, [chunk_id for chunk_id, _ in chunks])
         if target.recreate_rechunkify:
             # The target.chunker will read the file contents through ChunkIteratorFileWrapper chunk-by-chunk
             # (does not load the entire file into memory)
@@ -10,6 +10,7 @@
 from ..helpers import Error
 from ..helpers import SortBySpec, positive_int_validator, location_validator, Location, relative_time_marker_validator
 from ..helpers import Highlander
+from ..helpers import parse_file_size
 from ..helpers.nanorst import rst_to_terminal
 from ..manifest import Manifest, AI_HUMAN_SORT_KEYS
 from ..patterns import PatternMatcher
@@ -344,6 +345,41 @@ def define_exclusion_group(subparser, **kwargs):
     return exclude_group
 
 
+def define_object_cache_option(subparser):
+    subparser.add_argument(
+        "--object-cache",
+        metavar="SIZE",
+        dest="object_cache",
+        type=parse_file_size,
+        default=0,
+        action=Highlander,
+        help="keep objects read from a remote repository in a persistent local cache of at most SIZE "
+        "(e.g. 10G), so they need not be downloaded again by later commands (default: 0=disabled)",
+    )
+
+
+def define_remote_connections_option(subparser):
+    subparser.add_argument(
+        "--remote-connections",
+        metavar="N",
+        dest="remote_connections",
+        type=positive_int_validator,
+        default=1,
+        action=Highlander,
+        help="use N parallel connections to read from a remote repository (default: 1)",
+    )
+
+
+def define_path_index_option(subparser):
+    subparser.add_argument(
+        "--path-index",
+        dest="path_index",
+        action="store_true",
+        help="use a path index of the archive to only read the metadata of items below the given PATHs. "
+        "The index is built and stored in the cache directory when it is used for the first time.",
+    )
+
+
 def define_archive_filters_group(subparser, *, sort_by=True, first_last=True, oldest_newest=True, older_newer=True):
     filters_group = subparser.add_argument_group(
         "Archive filters", "Archive filters can be applied to repository targets."
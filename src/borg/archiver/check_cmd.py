@@ -2,7 +2,9 @@
 from ._common import with_repository, Highlander
 from ..archive import ArchiveChecker
 from ..constants import *  # NOQA
-from ..helpers import set_ec, EXIT_WARNING, CancelledByUser, CommandError
+from ..helpers import set_ec, EXIT_WARNING, CancelledByUser, CommandError, positive_int_validator
+from ..helpers import non_negative_int_validator
+from ..helpers import parse_file_size
 from ..helpers import yes
 
 from ..logger import create_logger
@@ -31,10 +33,13 @@ def do_check(self, args, repository):
                 env_var_override="BORG_CHECK_I_KNOW_WHAT_I_AM_DOING",
             ):
                 raise CancelledByUser()
-        if args.repo_only and any((args.verify_data, args.first, args.last, args.match_archives)):
+        if args.repo_only and any((args.verify_data, args.first, args.last, args.match_archives, args.incremental)):
             raise CommandError(
-                "--repository-only contradicts --first, --last, -a / --match-archives and --verify-data arguments."
+                "--repository-only contradicts --first, --last, -a / --match-archives, --verify-data and "
+                "--incremental arguments."
             )
+        if args.repair and args.incremental:
+            raise CommandError("--repair does not allow --incremental argument.")
         if args.repair and args.max_duration:
             raise CommandError("--repair does not allow --max-duration argument.")
         if args.max_duration and not args.repo_only:
@@ -43,6 +48,8 @@ def do_check(self, args, repository):
             # thus, we should not do an archives check based on a unknown-quality on-disk repo index.
             # also, there is no max_duration support in the archives check code anyway.
             raise CommandError("--repository-only is required for --max-duration support.")
+        if (args.verify_max_duration or args.verify_max_size) and not args.verify_data:
+            raise CommandError("--verify-max-duration and --verify-max-size require --verify-data.")
         if not args.archives_only:
             if not repository.check(repair=args.repair, max_duration=args.max_duration):
                 set_ec(EXIT_WARNING)
@@ -58,13 +65,17 @@ def do_check(self, args, repository):
             newer=args.newer,
             oldest=args.oldest,
             newest=args.newest,
+            workers=args.workers,
+            verify_max_duration=args.verify_max_duration,
+            verify_max_size=args.verify_max_size,
+            incremental=args.incremental,
         ):
             set_ec(EXIT_WARNING)
             return
 
     def build_parser_check(self, subparsers, common_parser, mid_common_parser):
         from ._common import process_epilog
-        from ._common import define_archive_filters_group
+        from ._common import define_archive_filters_group, define_remote_connections_option
 
         check_epilog = process_epilog(
             """
@@ -90,6 +101,15 @@ def build_parser_check(self, subparsers, common_parser, mid_common_parser):
            machine because they require decrypting data and therefore the encryption
            key.
 
+        With ``--incremental``, every archive that passes the archive checks without errors
+        is remembered in the cache directory, together with the chunks it refers to. As
+        archives do not change, later ``--incremental`` checks only fully check the archives
+        that were not checked before (e.g. created since the last check). For the other
+        archives they just check that all chunks they refer to are still in the repository,
+        so missing chunks are still detected (and the affected archives get fully checked
+        then). Note that this needs about 40 bytes of disk space in the cache directory per
+        chunk reference of every archive, which can be a lot for big repositories.
+
         Both steps can also be run independently. Pass ``--repository-only`` to run the
         repository checks only, or pass ``--archives-only`` to run the archive checks
         only.
@@ -119,7 +139,21 @@ def build_parser_check(self, subparsers, common_parser, mid_common_parser):
         cryptographic verification and hence very time consuming, but will detect any
         accidental and malicious corruption. Tamper-resistance is only guaranteed for
         encrypted repositories against attackers without access to the keys. You can
-        not use ``--verify-data`` with ``--repository-only``.
+        not use ``--verify-data`` with ``--repository-only``. With ``--workers N``, the
+        data and the archive metadata are decrypted and decompressed by N threads.
+        The archive metadata is only processed ahead within an archive (the archives
+        and their items are still checked one after the other), so this helps most
+        with archives containing many files and little with many small archives.
+
+        Like the repository check, the data verification can be split into multiple
+        partial runs using ``--verify-max-duration SECONDS`` and / or
+        ``--verify-max-size SIZE``: it stops after the batch of chunks that exceeds
+        that time or amount of data read. Borg records in the cache directory which segment files were
+        verified and when, so the next run first verifies the segments that were never
+        verified (e.g. written by new backups) and then continues with the segments
+        that were not verified for the longest time. A daily ``borg check --verify-data
+        --verify-max-duration=3600`` thus verifies all data again and again, one hour
+        per day. The archive checks are done completely also in a partial run.
 
         About repair mode
         +++++++++++++++++
@@ -204,6 +238,13 @@ def build_parser_check(self, subparsers, common_parser, mid_common_parser):
             action="store_true",
             help="perform cryptographic archive data integrity verification " "(conflicts with ``--repository-only``)",
         )
+        subparser.add_argument(
+            "--incremental",
+            dest="incremental",
+            action="store_true",
+            help="do not check the archives again that passed a previous ``--incremental`` check, "
+            "only check that the chunks they refer to exist (needs cache space for the chunk references)",
+        )
         subparser.add_argument(
             "--repair", dest="repair", action="store_true", help="attempt to repair any inconsistencies found"
         )
@@ -216,4 +257,35 @@ def build_parser_check(self, subparsers, common_parser, mid_common_parser):
             action=Highlander,
             help="do only a partial repo check for max. SECONDS seconds (Default: unlimited)",
         )
+        subparser.add_argument(
+            "--workers",
+            metavar="N",
+            dest="workers",
+            type=positive_int_validator,
+            default=1,
+            action=Highlander,
+            help="use N threads to decrypt and decompress the archive metadata and, with ``--verify-data``, "
+            "the data (default: 1)",
+        )
+        subparser.add_argument(
+            "--verify-max-duration",
+            metavar="SECONDS",
+            dest="verify_max_duration",
+            type=non_negative_int_validator,
+            default=0,
+            action=Highlander,
+            help="stop ``--verify-data`` after SECONDS seconds, the next run with a limit continues "
+            "(Default: unlimited)",
+        )
+        subparser.add_argument(
+            "--verify-max-size",
+            metavar="SIZE",
+            dest="verify_max_size",
+            type=parse_file_size,
+            default=0,
+            action=Highlander,
+            help="stop ``--verify-data`` after reading SIZE bytes, the next run with a limit continues "
+            "(Default: unlimited)",
+        )
+        define_remote_connections_option(subparser)
         define_archive_filters_group(subparser)
@@ -1,8 +1,11 @@
 import argparse
 
 from ._common import with_repository, Highlander
+from ..cache import Cache
 from ..constants import *  # NOQA
+from ..helpers import ProgressIndicatorPercent
 from ..manifest import Manifest
+from ..repository import LIST_SCAN_LIMIT
 
 from ..logger import create_logger
 
@@ -13,12 +16,42 @@ class CompactMixIn:
     @with_repository(manifest=False, exclusive=True)
     def do_compact(self, args, repository):
         """compact segment files in the repository"""
+        if args.collect_garbage:
+            self.collect_garbage(args, repository)
         # see the comment in do_with_lock about why we do it like this:
         data = repository.get(Manifest.MANIFEST_ID)
         repository.put(Manifest.MANIFEST_ID, data)
         threshold = args.threshold / 100
         repository.commit(compact=True, threshold=threshold)
 
+    def collect_garbage(self, args, repository):
+        """Delete all objects from *repository* that are not referenced by any archive."""
+        manifest = Manifest.load(repository, (Manifest.Operation.DELETE,))
+        # the chunks index of a freshly synced cache has exactly the chunks referenced by the archives,
+        # it is built by merging the cached chunk indexes of the archives (chunks.archive.d).
+        with Cache(repository, manifest, sync=False, progress=args.progress, lock_wait=self.lock_wait) as cache:
+            cache.sync()
+            cache.commit()
+            garbage = []
+            marker = None
+            while True:
+                ids = repository.list(limit=LIST_SCAN_LIMIT, marker=marker)
+                if not ids:
+                    break
+                marker = ids[-1]
+                garbage.extend(id for id in ids if id not in cache.chunks and id != Manifest.MANIFEST_ID)
+        logger.info("Deleting %d unreferenced objects...", len(garbage))
+        pi = ProgressIndicatorPercent(total=len(garbage), msg="Deleting objects %3.0f%%", msgid="compact.gc")
+        for i, id in enumerate(garbage):
+            if args.progress:
+                pi.show(i)
+            repository.delete(id, wait=False)
+            # the repository is locked, so nothing else can have deleted the object meanwhile.
+            repository.async_response(wait=False)
+        while repository.async_response(wait=True) is not None:
+            pass
+        pi.finish()
+
     def build_parser_compact(self, subparsers, common_parser, mid_common_parser):
         from ._common import process_epilog
 
@@ -41,6 +74,12 @@ def build_parser_compact(self, subparsers, common_parser, mid_common_parser):
         When using ``--verbose``, borg will output an estimate of the freed space.
 
         See :ref:`separate_compaction` in Additional Notes for more details.
+
+        With ``--collect-garbage``, borg first deletes all objects that are not
+        referenced by any archive, e.g. the chunks of archives deleted or pruned with
+        ``--lazy``. The referenced chunks are determined from the chunk indexes the cache
+        keeps for every archive, so only the archives not seen before by this cache have
+        to be read. This needs the key.
         """
         )
         subparser = subparsers.add_parser(
@@ -62,3 +101,9 @@ def build_parser_compact(self, subparsers, common_parser, mid_common_parser):
             action=Highlander,
             help="set minimum threshold for saved space in PERCENT (Default: 10)",
         )
+        subparser.add_argument(
+            "--collect-garbage",
+            dest="collect_garbage",
+            action="store_true",
+            help="delete all objects not referenced by any archive before compacting",
+        )
@@ -2,8 +2,8 @@
 import logging
 
 from ._common import with_repository, Highlander
-from ..archive import Archive, Statistics
-from ..cache import Cache
+from ..archive import Archive, ArchiveDeleter, Statistics
+from ..cache import Cache, prune_archive_caches
 from ..constants import *  # NOQA
 from ..helpers import log_multi, format_archive, sig_int
 from ..manifest import Manifest
@@ -31,36 +31,26 @@ def do_delete(self, args, repository):
             return
 
         if args.forced == 2:
-            deleted = False
-            logger_list = logging.getLogger("borg.output.list")
-            for i, archive_name in enumerate(archive_names, 1):
-                try:
-                    current_archive = manifest.archives.pop(archive_name)
-                except KeyError:
-                    self.print_warning(f"Archive {archive_name} not found ({i}/{len(archive_names)}).")
-                else:
-                    deleted = True
-                    if self.output_list:
-                        msg = "Would delete: {} ({}/{})" if dry_run else "Deleted archive: {} ({}/{})"
-                        logger_list.info(msg.format(format_archive(current_archive), i, len(archive_names)))
-            if dry_run:
-                logger.info("Finished dry-run.")
-            elif deleted:
-                manifest.write()
-                # note: might crash in compact() after committing the repo
-                repository.commit(compact=False)
+            if self.remove_from_manifest(repository, manifest, archive_names, dry_run):
                 self.print_warning('Done. Run "borg check --repair" to clean up the mess.', wc=None)
-            else:
-                self.print_warning("Aborted.", wc=None)
+            return
+
+        if args.lazy:
+            # the chunks are not dereferenced, so we do not need the cache.
+            if self.remove_from_manifest(repository, manifest, archive_names, dry_run):
+                logger.info('Done. Run "borg compact --collect-garbage" to free the space.')
             return
 
         stats = Statistics(iec=args.iec)
         with Cache(repository, manifest, progress=args.progress, lock_wait=self.lock_wait, iec=args.iec) as cache:
+            deleter = ArchiveDeleter(manifest, cache, stats, progress=args.progress, forced=args.forced)
 
             def checkpoint_func():
+                deleter.flush()
                 manifest.write()
                 repository.commit(compact=False)
                 cache.commit()
+                prune_archive_caches(manifest)
 
             msg_delete = "Would delete archive: {} ({}/{})" if dry_run else "Deleting archive: {} ({}/{})"
             msg_not_found = "Archive {} not found ({}/{})."
@@ -78,8 +68,7 @@ def checkpoint_func():
                         logger_list.info(msg_delete.format(format_archive(archive_info), i, len(archive_names)))
 
                     if not dry_run:
-                        archive = Archive(manifest, archive_name, cache=cache)
-                        archive.delete(stats, progress=args.progress, forced=args.forced)
+                        deleter.add(Archive(manifest, archive_name, cache=cache))
                         checkpointed = self.maybe_checkpoint(
                             checkpoint_func=checkpoint_func, checkpoint_interval=args.checkpoint_interval
                         )
@@ -92,6 +81,32 @@ def checkpoint_func():
             if args.stats:
                 log_multi(str(stats), logger=logging.getLogger("borg.output.stats"))
 
+    def remove_from_manifest(self, repository, manifest, archive_names, dry_run):
+        """Only remove the archives from the manifest, return whether any were removed (and committed)."""
+        deleted = False
+        logger_list = logging.getLogger("borg.output.list")
+        for i, archive_name in enumerate(archive_names, 1):
+            try:
+                current_archive = manifest.archives.pop(archive_name)
+            except KeyError:
+                self.print_warning(f"Archive {archive_name} not found ({i}/{len(archive_names)}).")
+            else:
+                deleted = True
+                if self.output_list:
+                    msg = "Would delete: {} ({}/{})" if dry_run else "Deleted archive: {} ({}/{})"
+                    logger_list.info(msg.format(format_archive(current_archive), i, len(archive_names)))
+        if dry_run:
+            logger.info("Finished dry-run.")
+            return False
+        if not deleted:
+            self.print_warning("Aborted.", wc=None)
+            return False
+        manifest.write()
+        # note: might crash in compact() after committing the repo
+        repository.commit(compact=False)
+        prune_archive_caches(manifest)
+        return True
+
     def build_parser_delete(self, subparsers, common_parser, mid_common_parser):
         from ._common import process_epilog, define_archive_filters_group
 
@@ -114,6 +129,11 @@ def build_parser_delete(self, subparsers, common_parser, mid_common_parser):
         see :ref:`borg_patterns`).
 
         Always first use ``--dry-run --list`` to see what would be deleted.
+
+        With ``--lazy``, the archives are only removed from the manifest, their chunks
+        are not dereferenced. This is very fast, no matter how many and how big the
+        archives are. A later ``borg compact --collect-garbage`` then deletes all chunks
+        not referenced by any archive any more, in one pass.
         """
         )
         subparser = subparsers.add_parser(
@@ -146,6 +166,13 @@ def build_parser_delete(self, subparsers, common_parser, mid_common_parser):
             default=0,
             help="force deletion of corrupted archives, " "use ``--force --force`` in case ``--force`` does not work.",
         )
+        subparser.add_argument(
+            "--lazy",
+            dest="lazy",
+            action="store_true",
+            help="only remove the archives from the manifest, "
+            "leave freeing their chunks to ``borg compact --collect-garbage``",
+        )
         subparser.add_argument(
             "-c",
             "--checkpoint-interval",
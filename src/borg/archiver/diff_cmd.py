@@ -44,7 +44,11 @@ def do_diff(self, args, repository, manifest, archive):
         matcher = build_matcher(args.patterns, args.paths)
 
         diffs_iter = Archive.compare_archives_iter(
-            archive1, archive2, matcher, can_compare_chunk_ids=can_compare_chunk_ids
+            archive1,
+            archive2,
+            matcher,
+            can_compare_chunk_ids=can_compare_chunk_ids,
+            path_prefixes=matcher.path_prefixes() if args.path_index else None,
         )
         # Conversion to string and filtering for diff.equal to save memory if sorting
         diffs = (diff for diff in diffs_iter if not diff.equal(args.content_only))
@@ -79,7 +83,7 @@ def do_diff(self, args, repository, manifest, archive):
 
     def build_parser_diff(self, subparsers, common_parser, mid_common_parser):
         from ._common import process_epilog
-        from ._common import define_exclusion_group
+        from ._common import define_exclusion_group, define_object_cache_option, define_path_index_option
 
         diff_epilog = (
             process_epilog(
@@ -160,6 +164,8 @@ def build_parser_diff(self, subparsers, common_parser, mid_common_parser):
             action="store_true",
             help="Only compare differences in content (exclude metadata differences)",
         )
+        define_object_cache_option(subparser)
+        define_path_index_option(subparser)
         subparser.add_argument("name", metavar="ARCHIVE1", type=archivename_validator, help="ARCHIVE1 name")
         subparser.add_argument("other_name", metavar="ARCHIVE2", type=archivename_validator, help="ARCHIVE2 name")
         subparser.add_argument(
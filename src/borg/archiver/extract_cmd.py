@@ -4,16 +4,17 @@
 import os
 import stat
 
-from ._common import with_repository, with_archive
+from ._common import with_repository, with_archive, Highlander
 from ._common import build_filter, build_matcher
-from ..archive import BackupError
+from ..archive import BackupError, ChunkReuseCache, ExtractPlan, ExtractWorkers, RestoredFiles
 from ..constants import *  # NOQA
-from ..helpers import archivename_validator, PathSpec
+from ..helpers import archivename_validator, PathSpec, positive_int_validator, parse_file_size
 from ..helpers import remove_surrogates
 from ..helpers import HardLinkManager
 from ..helpers import ProgressIndicatorPercent
 from ..helpers import BackupWarning, IncludePatternNeverMatchedWarning
 from ..manifest import Manifest
+from ..repository import Repository
 
 from ..logger import create_logger
 
@@ -48,44 +49,110 @@ def do_extract(self, args, repository, manifest, archive):
         hlm = HardLinkManager(id_type=bytes, info_type=str)  # hlid -> path
 
         filter = build_filter(matcher, strip_components)
+        path_prefixes = matcher.path_prefixes() if args.path_index else None
+        plan = None
+        if args.physical_order and not (dry_run or stdout):
+            if isinstance(repository, Repository) and hasattr(os, "pwrite"):
+                plan = ExtractPlan(archive, sparse=sparse)
+            else:
+                logger.warning("--physical-order is only supported for local repositories, ignoring it.")
+        if args.workers > 1 and plan is None and not (dry_run or stdout) and hasattr(os, "pwrite"):
+            workers = ExtractWorkers(archive, args.workers, sparse=sparse)
+        else:
+            workers = None
+        if args.chunk_cache:
+            if workers is not None:
+                logger.warning("--chunk-cache is not supported with --workers, ignoring it.")
+            elif plan is None:
+                # the physical order extraction reads every chunk only once anyway.
+                archive.pipeline.chunk_cache = ChunkReuseCache(args.chunk_cache)
+        if args.reuse_identical and not (dry_run or stdout):
+            if plan is not None or workers is not None or sparse:
+                option = "--physical-order" if plan is not None else "--workers" if workers is not None else "--sparse"
+                logger.warning(f"--reuse-identical is not supported with {option}, ignoring it.")
+            else:
+                archive.pipeline.restored_files = RestoredFiles()
+
         if progress:
             pi = ProgressIndicatorPercent(msg="%5.1f%% Extracting: %s", step=0.1, msgid="extract")
             pi.output("Calculating total archive size for the progress indicator (might take long for large archives)")
-            extracted_size = sum(item.get_size() for item in archive.iter_items(filter))
-            pi.total = extracted_size
         else:
             pi = None
+        chunk_cache = archive.pipeline.chunk_cache
+        if pi or chunk_cache:
+            # one more pass over the archive metadata, to get the total size and count the chunk references.
+            extracted_size = 0
+            for item in archive.iter_items(filter, path_prefixes=path_prefixes):
+                extracted_size += item.get_size()
+                if chunk_cache:
+                    chunk_cache.add_references(item)
+            if pi:
+                pi.total = extracted_size
+        late_dirs = []  # with a plan, directory attributes are restored after the file contents were written
 
-        for item in archive.iter_items(filter, preload=True):
-            orig_path = item.path
-            if strip_components:
-                item.path = os.sep.join(orig_path.split(os.sep)[strip_components:])
-            if not args.dry_run:
-                while dirs and not item.path.startswith(dirs[-1].path):
-                    dir_item = dirs.pop(-1)
-                    try:
-                        archive.extract_item(dir_item, stdout=stdout)
-                    except BackupError as e:
-                        self.print_warning_instance(BackupWarning(remove_surrogates(dir_item.path), e))
-            if output_list:
-                logging.getLogger("borg.output.list").info(remove_surrogates(item.path))
-            try:
-                if dry_run:
-                    archive.extract_item(item, dry_run=True, hlm=hlm, pi=pi)
-                else:
-                    if stat.S_ISDIR(item.mode):
-                        dirs.append(item)
-                        archive.extract_item(item, stdout=stdout, restore_attrs=False)
+        def report_workers_warnings():
+            for item, e in workers.warnings():
+                self.print_warning_instance(BackupWarning(remove_surrogates(item.path), e))
+
+        try:
+            for item in archive.iter_items(filter, preload=plan is None, path_prefixes=path_prefixes):
+                orig_path = item.path
+                if strip_components:
+                    item.path = os.sep.join(orig_path.split(os.sep)[strip_components:])
+                if not args.dry_run:
+                    while dirs and not item.path.startswith(dirs[-1].path):
+                        dir_item = dirs.pop(-1)
+                        if plan is not None:
+                            late_dirs.append(dir_item)
+                            continue
+                        if workers is not None:
+                            workers.wait(dir_item.path)
+                        try:
+                            archive.extract_item(dir_item, stdout=stdout)
+                        except BackupError as e:
+                            self.print_warning_instance(BackupWarning(remove_surrogates(dir_item.path), e))
+                if output_list:
+                    logging.getLogger("borg.output.list").info(remove_surrogates(item.path))
+                try:
+                    if dry_run:
+                        archive.extract_item(item, dry_run=True, hlm=hlm, pi=pi)
                     else:
-                        archive.extract_item(
-                            item, stdout=stdout, sparse=sparse, hlm=hlm, pi=pi, continue_extraction=continue_extraction
-                        )
-            except BackupError as e:
-                self.print_warning_instance(BackupWarning(remove_surrogates(orig_path), e))
+                        if stat.S_ISDIR(item.mode):
+                            dirs.append(item)
+                            archive.extract_item(item, stdout=stdout, restore_attrs=False)
+                        else:
+                            archive.extract_item(
+                                item,
+                                stdout=stdout,
+                                sparse=sparse,
+                                hlm=hlm,
+                                pi=pi,
+                                continue_extraction=continue_extraction,
+                                workers=workers,
+                                plan=plan,
+                            )
+                except BackupError as e:
+                    self.print_warning_instance(BackupWarning(remove_surrogates(orig_path), e))
+                if workers is not None:
+                    report_workers_warnings()
+            if plan is not None:
+                plan.run(pi=pi)
+                for item, e in plan.warnings():
+                    self.print_warning_instance(BackupWarning(remove_surrogates(item.path), e))
+        finally:
+            if workers is not None:
+                workers.close()
+            if plan is not None:
+                plan.close()
+        if workers is not None:
+            report_workers_warnings()
         if pi:
             pi.finish()
+        if chunk_cache:
+            logger.debug(f"chunk cache: {chunk_cache.hits} hits, {chunk_cache.misses} misses")
 
         if not args.dry_run:
+            dirs += late_dirs[::-1]
             pi = ProgressIndicatorPercent(
                 total=len(dirs), msg="Setting directory permissions %3.0f%%", msgid="extract.permissions"
             )
@@ -104,7 +171,8 @@ def do_extract(self, args, repository, manifest, archive):
 
     def build_parser_extract(self, subparsers, common_parser, mid_common_parser):
         from ._common import process_epilog
-        from ._common import define_exclusion_group
+        from ._common import define_exclusion_group, define_object_cache_option, define_remote_connections_option
+        from ._common import define_path_index_option
 
         extract_epilog = process_epilog(
             """
@@ -174,6 +242,45 @@ def build_parser_extract(self, subparsers, common_parser, mid_common_parser):
             action="store_true",
             help="continue a previously interrupted extraction of same archive",
         )
+        define_object_cache_option(subparser)
+        define_remote_connections_option(subparser)
+        define_path_index_option(subparser)
+        subparser.add_argument(
+            "--physical-order",
+            dest="physical_order",
+            action="store_true",
+            help="read the chunks of all files in the order they are stored in a local repository, "
+            "faster for repositories on rotating disks (keeps the list of chunks to extract in memory, "
+            "--workers is not used)",
+        )
+        subparser.add_argument(
+            "--chunk-cache",
+            metavar="SIZE",
+            dest="chunk_cache",
+            type=parse_file_size,
+            default=0,
+            action=Highlander,
+            help="keep up to SIZE (e.g. 500M) of decompressed chunks in memory, which are needed again for "
+            "other files, so they need not be fetched and decompressed again (default: 0=disabled, "
+            "not used with --workers or --physical-order)",
+        )
+        subparser.add_argument(
+            "--reuse-identical",
+            dest="reuse_identical",
+            action="store_true",
+            help="copy files with the same content (chunks) as an already extracted file from that file, "
+            "instead of reading their chunks from the repository (not used with --sparse, --workers or "
+            "--physical-order)",
+        )
+        subparser.add_argument(
+            "--workers",
+            metavar="N",
+            dest="workers",
+            type=positive_int_validator,
+            default=1,
+            action=Highlander,
+            help="use N threads to decrypt, decompress and write the content of files (default: 1)",
+        )
         subparser.add_argument("name", metavar="NAME", type=archivename_validator, help="specify the archive name")
         subparser.add_argument(
             "paths", metavar="PATH", nargs="*", type=PathSpec, help="paths to extract; patterns are supported"
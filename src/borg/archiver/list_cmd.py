@@ -30,7 +30,11 @@ def do_list(self, args, repository, manifest):
         def _list_inner(cache):
             archive = Archive(manifest, args.name, cache=cache)
             formatter = ItemFormatter(archive, format)
-            for item in archive.iter_items(lambda item: matcher.match(item.path)):
+            path_prefixes = matcher.path_prefixes() if args.path_index else None
+            item_keys = formatter.item_keys(args.json_lines)
+            for item in archive.iter_items(
+                lambda item: matcher.match(item.path), path_prefixes=path_prefixes, item_keys=item_keys
+            ):
                 sys.stdout.write(formatter.format_item(item, args.json_lines, sort=True))
 
         # Only load the cache if it will be used
@@ -41,7 +45,8 @@ def _list_inner(cache):
             _list_inner(cache=None)
 
     def build_parser_list(self, subparsers, common_parser, mid_common_parser):
-        from ._common import process_epilog, define_exclusion_group
+        from ._common import process_epilog, define_exclusion_group, define_object_cache_option
+        from ._common import define_path_index_option
 
         list_epilog = (
             process_epilog(
@@ -115,6 +120,8 @@ def build_parser_list(self, subparsers, common_parser, mid_common_parser):
             "but keys used in it are added to the JSON output. "
             "Some keys are always present. Note: JSON can only represent text.",
         )
+        define_object_cache_option(subparser)
+        define_path_index_option(subparser)
         subparser.add_argument("name", metavar="NAME", type=archivename_validator, help="specify the archive name")
         subparser.add_argument(
             "paths", metavar="PATH", nargs="*", type=PathSpec, help="paths to list; patterns are supported"
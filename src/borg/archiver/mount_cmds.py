@@ -4,6 +4,7 @@
 from ._common import with_repository, Highlander
 from ..constants import *  # NOQA
 from ..helpers import RTError
+from ..helpers import non_negative_int_validator
 from ..helpers import PathSpec
 from ..helpers import umount
 from ..manifest import Manifest
@@ -104,6 +105,22 @@ def build_parser_mount_umount(self, subparsers, common_parser, mid_common_parser
         memory usage can be up to ~8 MiB times this number. The default is the number
         of CPU cores.
 
+        By default, the metadata of all items of an archive is processed when the archive is
+        accessed the first time. With ``--lazy-dirs``, only the directories actually visited
+        are loaded, which is much faster and needs less memory for big archives. This uses a
+        directory map of the archive, which is built once (by processing all items) and kept in
+        the cache directory. ``--lazy-dirs`` is not used with the ``versions`` mount option,
+        PATHs, patterns or ``--strip-components`` and shows hardlinks as separate files.
+
+        With ``--cache-inodes``, the inodes created when processing an archive are kept in the
+        cache directory, so mounting the archive again does not need to process its items again.
+        Like ``--lazy-dirs``, it is not used with the ``versions`` mount option, PATHs, patterns
+        or ``--strip-components``.
+
+        With ``--read-ahead N``, sequentially reading a file fetches its next N chunks in the
+        background, using up to 4 additional repository connections. With pyfuse3, reads of other
+        files are then served while a read waits for its chunks.
+
         When the daemonized process receives a signal or crashes, it does not unmount.
         Unmounting in these cases could cause an active rsync or similar process
         to delete data unintentionally.
@@ -155,7 +172,8 @@ def build_parser_borgfs(self, parser):
         return parser
 
     def _define_borg_mount(self, parser):
-        from ._common import define_exclusion_group, define_archive_filters_group
+        from ._common import define_exclusion_group, define_archive_filters_group, define_object_cache_option
+        from ._common import define_remote_connections_option, define_path_index_option
 
         parser.set_defaults(func=self.do_mount)
         parser.add_argument(
@@ -175,6 +193,31 @@ def _define_borg_mount(self, parser):
             action="store_true",
             help="use numeric user and group identifiers from archive(s)",
         )
+        define_object_cache_option(parser)
+        define_remote_connections_option(parser)
+        define_path_index_option(parser)
+        parser.add_argument(
+            "--lazy-dirs",
+            dest="lazy_dirs",
+            action="store_true",
+            help="load the contents of a directory only when it is accessed, using a directory map of the "
+            "archive kept in the cache directory",
+        )
+        parser.add_argument(
+            "--cache-inodes",
+            dest="cache_inodes",
+            action="store_true",
+            help="keep the inodes of processed archives in the cache directory, to speed up mounting them again",
+        )
+        parser.add_argument(
+            "--read-ahead",
+            metavar="N",
+            dest="read_ahead",
+            type=non_negative_int_validator,
+            default=0,
+            action=Highlander,
+            help="when reading a file sequentially, fetch its next N chunks in the background (default: 0, disabled)",
+        )
         define_archive_filters_group(parser)
         parser.add_argument(
             "paths", metavar="PATH", nargs="*", type=PathSpec, help="paths to extract; patterns are supported"
@@ -7,8 +7,8 @@
 import re
 
 from ._common import with_repository, Highlander
-from ..archive import Archive, Statistics
-from ..cache import Cache
+from ..archive import Archive, ArchiveDeleter, Statistics
+from ..cache import Cache, prune_archive_caches
 from ..constants import *  # NOQA
 from ..helpers import ArchiveFormatter, interval, sig_int, log_multi, ProgressIndicatorPercent, CommandError, Error
 from ..manifest import Manifest
@@ -127,15 +127,9 @@ def do_prune(self, args, repository, manifest):
                 keep += prune_split(archives, rule, num, kept_because)
 
         to_delete = (set(archives) | checkpoints) - (set(keep) | set(keep_checkpoints))
-        stats = Statistics(iec=args.iec)
-        with Cache(repository, manifest, lock_wait=self.lock_wait, iec=args.iec) as cache:
-
-            def checkpoint_func():
-                manifest.write()
-                repository.commit(compact=False)
-                cache.commit()
+        list_logger = logging.getLogger("borg.output.list")
 
-            list_logger = logging.getLogger("borg.output.list")
+        def prune(delete, checkpoint_func):
             # set up counters for the progress display
             to_delete_len = len(to_delete)
             archives_deleted = 0
@@ -151,8 +145,7 @@ def checkpoint_func():
                     else:
                         archives_deleted += 1
                         log_message = "Pruning archive (%d/%d):" % (archives_deleted, to_delete_len)
-                        archive = Archive(manifest, archive.name, cache)
-                        archive.delete(stats, forced=args.forced)
+                        delete(archive)
                         checkpointed = self.maybe_checkpoint(
                             checkpoint_func=checkpoint_func, checkpoint_interval=args.checkpoint_interval
                         )
@@ -176,6 +169,32 @@ def checkpoint_func():
                 raise Error("Got Ctrl-C / SIGINT.")
             elif uncommitted_deletes > 0:
                 checkpoint_func()
+
+        if args.lazy:
+            # the chunks are not dereferenced, so we do not need the cache.
+            def checkpoint_func():
+                manifest.write()
+                repository.commit(compact=False)
+                prune_archive_caches(manifest)
+
+            def delete(archive):
+                del manifest.archives[archive.name]
+
+            prune(delete, checkpoint_func)
+            return
+
+        stats = Statistics(iec=args.iec)
+        with Cache(repository, manifest, lock_wait=self.lock_wait, iec=args.iec) as cache:
+            deleter = ArchiveDeleter(manifest, cache, stats, forced=args.forced)
+
+            def checkpoint_func():
+                deleter.flush()
+                manifest.write()
+                repository.commit(compact=False)
+                cache.commit()
+                prune_archive_caches(manifest)
+
+            prune(lambda archive: deleter.add(Archive(manifest, archive.name, cache)), checkpoint_func)
             if args.stats:
                 log_multi(str(stats), logger=logging.getLogger("borg.output.stats"))
 
@@ -190,6 +209,11 @@ def build_parser_prune(self, subparsers, common_parser, mid_common_parser):
 
         Important: Repository disk space is **not** freed until you run ``borg compact``.
 
+        With ``--lazy``, the pruned archives are only removed from the manifest, their
+        chunks are not dereferenced. ``borg compact --collect-garbage`` then deletes all
+        chunks not referenced by any archive any more, in one pass. This is much faster
+        when pruning many archives.
+
         This command is normally used by automated backup scripts wanting to keep a
         certain number of historic backups. This retention policy is commonly referred to as
         `GFS <https://en.wikipedia.org/wiki/Backup_rotation_scheme#Grandfather-father-son>`_
@@ -262,6 +286,13 @@ def build_parser_prune(self, subparsers, common_parser, mid_common_parser):
             action="store_true",
             help="force pruning of corrupted archives, " "use ``--force --force`` in case ``--force`` does not work.",
         )
+        subparser.add_argument(
+            "--lazy",
+            dest="lazy",
+            action="store_true",
+            help="only remove the archives from the manifest, "
+            "leave freeing their chunks to ``borg compact --collect-garbage``",
+        )
         subparser.add_argument(
             "-s", "--stats", dest="stats", action="store_true", help="print statistics for the deleted archive"
         )
@@ -1,10 +1,12 @@
 import argparse
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 from ._common import with_repository, Highlander
 from ..constants import *  # NOQA
 from ..compress import CompressionSpec, ObfuscateSize, Auto, COMPRESSOR_TABLE
-from ..helpers import sig_int, ProgressIndicatorPercent
+from ..helpers import sig_int, ProgressIndicatorPercent, positive_int_validator
 
 from ..manifest import Manifest
 
@@ -49,25 +51,35 @@ def find_chunks(repository, repo_objs, stats, ctype, clevel, olevel):
     return recompress_ids
 
 
-def process_chunks(repository, repo_objs, stats, recompress_ids, olevel):
+def recompress_chunk(repo_objs, id, chunk, olevel):
+    """parse and recompress a chunk, but do not encrypt it (this is thread-safe)."""
+    meta, data = repo_objs.parse(id, chunk, ro_type=ROBJ_DONTCARE)
+    ro_type = meta.pop("type", None)
+    compr_old = meta["ctype"], meta["clevel"], meta.get("olevel", -1)
+    if olevel == -1:
+        # if the chunk was obfuscated, but should not be in future, remove related metadata
+        meta.pop("olevel", None)
+        meta.pop("psize", None)
+    size = len(data)
+    meta, data = repo_objs.compressor.compress(meta, data)
+    return ro_type, compr_old, size, meta, data
+
+
+def process_chunks(repository, repo_objs, stats, recompress_ids, olevel, *, executor=None, workers=1):
     """process some chunks (usually: recompress)"""
     compr_keys = stats["compr_keys"]
     if compr_keys == 0:  # work around defaultdict(int)
         compr_keys = stats["compr_keys"] = set()
-    for id, chunk in zip(recompress_ids, repository.get_many(recompress_ids, read_data=True)):
-        old_size = len(chunk)
-        stats["old_size"] += old_size
-        meta, data = repo_objs.parse(id, chunk, ro_type=ROBJ_DONTCARE)
-        ro_type = meta.pop("type", None)
-        compr_old = meta["ctype"], meta["clevel"], meta.get("olevel", -1)
-        if olevel == -1:
-            # if the chunk was obfuscated, but should not be in future, remove related metadata
-            meta.pop("olevel", None)
-            meta.pop("psize", None)
-        chunk = repo_objs.format(id, meta, data, ro_type=ro_type)
+
+    def store(id, old_size, result):
+        # encrypting and writing the chunks is done by the caller's thread, in the order of recompress_ids.
+        ro_type, compr_old, size, meta, data = result()
         compr_done = meta["ctype"], meta["clevel"], meta.get("olevel", -1)
         if compr_done != compr_old:
             # we actually changed something
+            chunk = repo_objs.format(
+                id, meta, data, compress=False, size=size, ctype=meta["ctype"], clevel=meta["clevel"], ro_type=ro_type
+            )
             repository.put(id, chunk, wait=False)
             repository.async_response(wait=False)
             stats["new_size"] += len(chunk)
@@ -86,6 +98,21 @@ def process_chunks(repository, repo_objs, stats, recompress_ids, olevel):
             stats[compr_old] += 1
             stats["kept_count"] += 1
 
+    pending = deque()  # (id, old_size, result) of the chunks being recompressed
+    max_pending = 4 * workers if executor is not None else 0
+    for id, chunk in zip(recompress_ids, repository.get_many(recompress_ids, read_data=True)):
+        old_size = len(chunk)
+        stats["old_size"] += old_size
+        if executor is None:
+            result = partial(recompress_chunk, repo_objs, id, chunk, olevel)
+        else:
+            result = executor.submit(recompress_chunk, repo_objs, id, chunk, olevel).result
+        pending.append((id, old_size, result))
+        while len(pending) > max_pending:
+            store(*pending.popleft())
+    while pending:
+        store(*pending.popleft())
+
 
 def format_compression_spec(ctype, clevel, olevel):
     obfuscation = "" if olevel == -1 else f"obfuscate,{olevel},"
@@ -137,16 +164,23 @@ def checkpoint_func():
         pi = ProgressIndicatorPercent(
             total=len(recompress_ids), msg="Recompressing %3.1f%%", step=0.1, msgid="rcompress.process_chunks"
         )
-        while recompress_ids:
-            if sig_int and sig_int.action_done():
-                break
-            ids, recompress_ids = recompress_ids[:chunks_limit], recompress_ids[chunks_limit:]
-            process_chunks(repository, repo_objs, stats_process, ids, olevel)
-            pi.show(increase=len(ids))
-            checkpointed = self.maybe_checkpoint(
-                checkpoint_func=checkpoint_func, checkpoint_interval=args.checkpoint_interval
-            )
-            uncommitted_chunks = 0 if checkpointed else (uncommitted_chunks + len(ids))
+        executor = ThreadPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+        try:
+            while recompress_ids:
+                if sig_int and sig_int.action_done():
+                    break
+                ids, recompress_ids = recompress_ids[:chunks_limit], recompress_ids[chunks_limit:]
+                process_chunks(
+                    repository, repo_objs, stats_process, ids, olevel, executor=executor, workers=args.workers
+                )
+                pi.show(increase=len(ids))
+                checkpointed = self.maybe_checkpoint(
+                    checkpoint_func=checkpoint_func, checkpoint_interval=args.checkpoint_interval
+                )
+                uncommitted_chunks = 0 if checkpointed else (uncommitted_chunks + len(ids))
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True, cancel_futures=True)
         pi.finish()
         if sig_int:
             # Ctrl-C / SIGINT: do not checkpoint (commit) again, we already have a checkpoint in this case.
@@ -205,6 +239,11 @@ def build_parser_rcompress(self, subparsers, common_parser, mid_common_parser):
         If the ``borg rcompress`` process receives a SIGINT signal (Ctrl-C), the repo
         will be committed and compacted and borg will terminate cleanly afterwards.
 
+        With ``--workers N``, N threads decrypt, decompress and recompress the chunks. The
+        recompressed chunks are still encrypted and written in on-disk order. As stronger
+        compression (e.g. ``zstd,19`` or ``lzma``) is CPU bound, this can speed up
+        ``borg rcompress`` nearly by a factor of N on a machine with N or more CPU cores.
+
         Both ``--progress`` and ``--stats`` are recommended when ``borg rcompress``
         is used interactively.
 
@@ -245,3 +284,12 @@ def build_parser_rcompress(self, subparsers, common_parser, mid_common_parser):
             action=Highlander,
             help="write checkpoint every SECONDS seconds (Default: 1800)",
         )
+        subparser.add_argument(
+            "--workers",
+            metavar="N",
+            dest="workers",
+            type=positive_int_validator,
+            default=1,
+            action=Highlander,
+            help="use N threads to decrypt, decompress and recompress the chunks (default: 1)",
+        )
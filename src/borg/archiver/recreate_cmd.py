@@ -6,7 +6,7 @@
 from ..constants import *  # NOQA
 from ..compress import CompressionSpec
 from ..helpers import archivename_validator, comment_validator, PathSpec, ChunkerParams, CommandError
-from ..helpers import timestamp
+from ..helpers import timestamp, positive_int_validator
 from ..manifest import Manifest
 
 from ..logger import create_logger
@@ -38,6 +38,7 @@ def do_recreate(self, args, repository, manifest, cache):
             checkpoint_volume=args.checkpoint_volume,
             dry_run=args.dry_run,
             timestamp=args.timestamp,
+            workers=args.workers,
         )
 
         archive_names = tuple(archive.name for archive in manifest.archives.list_considering(args))
@@ -90,6 +91,11 @@ def build_parser_recreate(self, subparsers, common_parser, mid_common_parser):
 
         With ``--target`` the original archive is not replaced, instead a new archive is created.
 
+        File contents are only read and written again when rechunking, other changes (like
+        excluding files or changing the comment) only write new archive metadata. When rechunking
+        with ``--workers N``, N threads decrypt and decompress the old chunks and hash and compress
+        the new chunks.
+
         When rechunking, space usage can be substantial - expect
         at least the entire deduplicated size of the archives using the previous
         chunker params.
@@ -202,6 +208,16 @@ def build_parser_recreate(self, subparsers, common_parser, mid_common_parser):
             "default: do not rechunk",
         )
 
+        archive_group.add_argument(
+            "--workers",
+            metavar="N",
+            dest="workers",
+            type=positive_int_validator,
+            default=1,
+            action=Highlander,
+            help="use N threads to process the file contents when rechunking (default: 1)",
+        )
+
         subparser.add_argument(
             "paths", metavar="PATH", nargs="*", type=PathSpec, help="paths to recreate; patterns are supported"
         )
@@ -22,8 +22,8 @@
 from ..helpers import log_multi
 from ..manifest import Manifest
 
-from ._common import with_repository, with_archive, Highlander, define_exclusion_group
-from ._common import build_matcher, build_filter
+from ._common import with_repository, with_archive, Highlander, define_exclusion_group, define_object_cache_option
+from ._common import build_matcher, build_filter, define_remote_connections_option
 
 from ..logger import create_logger
 
@@ -410,6 +410,8 @@ def build_parser_tar(self, subparsers, common_parser, mid_common_parser):
             action=Highlander,
             help="select tar format: BORG, PAX or GNU",
         )
+        define_object_cache_option(subparser)
+        define_remote_connections_option(subparser)
         subparser.add_argument("name", metavar="NAME", type=archivename_validator, help="specify the archive name")
         subparser.add_argument("tarfile", metavar="FILE", help='output tar file. "-" to write to stdout instead.')
         subparser.add_argument(
@@ -1,13 +1,13 @@
 import argparse
 
 from ._common import with_repository, with_other_repository, Highlander
-from ..archive import Archive
+from ..archive import Archive, ChunkTransfer
 from ..compress import CompressionSpec
 from ..constants import *  # NOQA
 from ..crypto.key import uses_same_id_hash, uses_same_chunker_secret
 from ..helpers import Error
 from ..helpers import location_validator, Location, archivename_validator, comment_validator
-from ..helpers import format_file_size
+from ..helpers import format_file_size, positive_int_validator
 from ..manifest import Manifest
 
 from ..logger import create_logger
@@ -84,74 +84,48 @@ def do_transfer(self, args, *, repository, manifest, cache, other_repository=Non
                     Archive(manifest, name, cache=cache, create=True, progress=args.progress) if not dry_run else None
                 )
                 upgrader.new_archive(archive=archive)
-                for item in other_archive.iter_items():
-                    is_part = bool(item.get("part", False))
-                    if is_part:
-                        # borg 1.x created part files while checkpointing (in addition to the full
-                        # file in the final archive), like <filename>.borg_part_<part> with item.part >= 1.
-                        # borg2 archives do not have such special part items anymore.
-                        # so let's remove them from old archives also, considering there is no
-                        # code any more that deals with them in special ways (e.g. to get stats right).
-                        continue
-                    if "chunks" in item:
-                        chunks = []
-                        for chunk_id, size in item.chunks:
-                            refcount = cache.seen_chunk(chunk_id, size)
-                            if refcount == 0:  # target repo does not yet have this chunk
-                                if not dry_run:
-                                    cdata = other_repository.get(chunk_id)
-                                    if args.recompress == "never":
-                                        # keep compressed payload same, verify via assert_id (that will
-                                        # decompress, but avoid needing to compress it again):
-                                        meta, data = other_manifest.repo_objs.parse(
-                                            chunk_id,
-                                            cdata,
-                                            decompress=True,
-                                            want_compressed=True,
-                                            ro_type=ROBJ_FILE_STREAM,
-                                        )
-                                        meta, data = upgrader.upgrade_compressed_chunk(meta, data)
-                                        chunk_entry = cache.add_chunk(
-                                            chunk_id,
-                                            meta,
-                                            data,
-                                            stats=archive.stats,
-                                            wait=False,
-                                            compress=False,
-                                            size=size,
-                                            ctype=meta["ctype"],
-                                            clevel=meta["clevel"],
-                                            ro_type=ROBJ_FILE_STREAM,
-                                        )
-                                    elif args.recompress == "always":
-                                        # always decompress and re-compress file data chunks
-                                        meta, data = other_manifest.repo_objs.parse(
-                                            chunk_id, cdata, ro_type=ROBJ_FILE_STREAM
-                                        )
-                                        chunk_entry = cache.add_chunk(
-                                            chunk_id,
-                                            meta,
-                                            data,
-                                            stats=archive.stats,
-                                            wait=False,
-                                            ro_type=ROBJ_FILE_STREAM,
-                                        )
-                                    else:
-                                        raise ValueError(f"unsupported recompress mode: {args.recompress}")
-                                    cache.repository.async_response(wait=False)
-                                    chunks.append(chunk_entry)
+                if dry_run:
+                    for item in other_archive.iter_items():
+                        if item.get("part", False):
+                            continue
+                        for chunk_id, size in item.get("chunks", []):
+                            if cache.seen_chunk(chunk_id, size) == 0:  # target repo does not yet have this chunk
                                 transfer_size += size
                             else:
-                                if not dry_run:
-                                    chunk_entry = cache.chunk_incref(chunk_id, archive.stats)
-                                    chunks.append(chunk_entry)
                                 present_size += size
-                        if not dry_run:
-                            item.chunks = chunks  # TODO: overwrite? IDs and sizes are same.
-                            archive.stats.nfiles += 1
-                    if not dry_run:
-                        item = upgrader.upgrade_item(item=item)
-                        archive.add_item(item, show_progress=args.progress)
+                else:
+                    transfer = ChunkTransfer(
+                        other_repository,
+                        other_manifest.repo_objs,
+                        cache,
+                        archive.stats,
+                        recompress=args.recompress,
+                        upgrader=upgrader,
+                        workers=args.workers,
+                    )
+
+                    def add_items(items):
+                        for item in items:
+                            if "chunks" in item:
+                                archive.stats.nfiles += 1
+                            item = upgrader.upgrade_item(item=item)
+                            archive.add_item(item, show_progress=args.progress)
+
+                    try:
+                        for item in other_archive.iter_items():
+                            is_part = bool(item.get("part", False))
+                            if is_part:
+                                # borg 1.x created part files while checkpointing (in addition to the full
+                                # file in the final archive), like <filename>.borg_part_<part> with item.part >= 1.
+                                # borg2 archives do not have such special part items anymore.
+                                # so let's remove them from old archives also, considering there is no
+                                # code any more that deals with them in special ways (e.g. to get stats right).
+                                continue
+                            add_items(transfer.add(item))
+                        add_items(transfer.flush())
+                    finally:
+                        transfer.close()
+                    transfer_size, present_size = transfer.transfer_size, transfer.present_size
                 if not dry_run:
                     if args.progress:
                         archive.stats.show_progress(final=True)
@@ -173,7 +147,7 @@ def do_transfer(self, args, *, repository, manifest, cache, other_repository=Non
 
     def build_parser_transfer(self, subparsers, common_parser, mid_common_parser):
         from ._common import process_epilog
-        from ._common import define_archive_filters_group
+        from ._common import define_archive_filters_group, define_remote_connections_option
 
         transfer_epilog = process_epilog(
             """
@@ -276,5 +250,15 @@ def build_parser_transfer(self, subparsers, common_parser, mid_common_parser):
             "If no MODE is given, `always` will be used. "
             'Not passing --recompress is equivalent to "--recompress never".',
         )
+        subparser.add_argument(
+            "--workers",
+            metavar="N",
+            dest="workers",
+            type=positive_int_validator,
+            default=1,
+            action=Highlander,
+            help="use N threads to decrypt, decompress and recompress the transferred data chunks (default: 1)",
+        )
+        define_remote_connections_option(subparser)
 
         define_archive_filters_group(subparser)
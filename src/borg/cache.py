@@ -11,10 +11,10 @@
 
 files_cache_logger = create_logger("borg.debug.files_cache")
 
-from .constants import CACHE_README, FILES_CACHE_MODE_DISABLED, ROBJ_FILE_STREAM
+from .constants import CACHE_README, FILES_CACHE_MODE_DISABLED, ROBJ_FILE_STREAM, ROBJ_LOCAL_CACHE
 from .hashindex import ChunkIndex, ChunkIndexEntry, CacheSynchronizer
 from .helpers import Location
-from .helpers import Error
+from .helpers import Error, IntegrityError
 from .helpers import get_cache_dir, get_security_dir
 from .helpers import bin_to_hex, hex_to_bin, parse_stringified_list
 from .helpers import format_file_size
@@ -28,6 +28,7 @@
 from .helpers.msgpack import int_to_timestamp, timestamp_to_int
 from .item import ArchiveItem, ChunkListEntry
 from .crypto.key import PlaintextKey
+from .crypto.low_level import IntegrityError as IntegrityErrorBase
 from .crypto.file_integrity import IntegrityCheckedFile, DetachedIntegrityCheckedFile, FileIntegrityError
 from .locking import Lock
 from .manifest import Manifest
@@ -39,6 +40,17 @@
 FileCacheEntry = namedtuple("FileCacheEntry", "age inode size cmtime chunk_ids")
 
 
+def decref_many(chunks, id, count):
+    """Remove *count* references to chunk *id* from ChunkIndex *chunks*, return the new (refcount, size)."""
+    refcount, size = chunks[id]
+    if refcount < ChunkIndex.MAX_VALUE:  # a saturated refcount stays as it is, see ChunkIndex.decref
+        if count > refcount:
+            raise KeyError(id)
+        refcount -= count
+        chunks[id] = ChunkIndexEntry(refcount, size)
+    return refcount, size
+
+
 class SecurityManager:
     """
     Tracks repositories. Ensures that nothing bad happens (repository swaps,
@@ -248,6 +260,91 @@ def cache_dir(repository, path=None):
     return path or os.path.join(get_cache_dir(), repository.id_str)
 
 
+# the cache directory subdirectories with a <repository id>/<archive id> file per archive
+ARCHIVE_CACHE_DIRS = ("path-index", "directory-map", "mount-inodes", "checked-archives")
+# the cache directory subdirectories with a <repository id> file or directory per repository
+REPOSITORY_CACHE_DIRS = ARCHIVE_CACHE_DIRS + ("verify-data",)
+
+
+def pack_cache_object(obj, repo_objs):
+    """
+    Return (id, cdata) of *obj*, msgpacked, then encrypted and authenticated with the repository key.
+
+    The cache directory is not trusted, so everything derived from the repository contents that borg keeps there
+    is stored like this (with type ROBJ_LOCAL_CACHE, so it can not be confused with a repository object).
+    """
+    data = msgpack.packb(obj)
+    id = repo_objs.id_hash(data)
+    return id, repo_objs.format(id, {}, data, ro_type=ROBJ_LOCAL_CACHE)
+
+
+def unpack_cache_object(id, cdata, repo_objs):
+    """Return the object packed by pack_cache_object, raise IntegrityError if it was tampered with."""
+    _, data = repo_objs.parse(id, cdata, ro_type=ROBJ_LOCAL_CACHE)
+    return msgpack.unpackb(data)
+
+
+def save_cache_object(path, obj, repo_objs):
+    """Save the dict *obj* (with "version" and maybe "archive_id" keys) to the cache file at *path*."""
+    id, cdata = pack_cache_object(obj, repo_objs)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with SaveFile(path, binary=True) as fd:
+        fd.write(id)
+        fd.write(cdata)
+
+
+def load_cache_object(path, repo_objs, version, archive_id=None, what="cache file"):
+    """
+    Return the dict saved to the cache file at *path* by save_cache_object or None.
+
+    None is returned if the file does not exist or is not usable: unreadable, tampered with or with another
+    *version* or *archive_id* (if given) than expected.
+    """
+    try:
+        with open(path, "rb") as fd:
+            id = fd.read(32)
+            cdata = fd.read()
+        obj = unpack_cache_object(id, cdata, repo_objs)
+        if obj["version"] != version or (archive_id is not None and obj["archive_id"] != archive_id):
+            return None
+        return obj
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError, msgpack.UnpackException, IntegrityError, IntegrityErrorBase) as e:
+        logger.warning(f"Ignoring unusable {what} {path}: {e}")
+        return None
+
+
+def prune_archive_caches(manifest, archive_ids=None):
+    """
+    Remove the files kept in the cache directory for the deleted archives of the repository.
+
+    The files of the archives with *archive_ids* are kept, default: the archives in the *manifest*.
+    """
+    if archive_ids is None:
+        archive_ids = [info.id for info in manifest.archives.list()]
+    keep = {bin_to_hex(id) for id in archive_ids}
+    for name in ARCHIVE_CACHE_DIRS:
+        path = os.path.join(get_cache_dir(), name, bin_to_hex(manifest.repository.id))
+        try:
+            filenames = os.listdir(path)
+        except FileNotFoundError:
+            continue
+        for filename in filenames:
+            if filename not in keep:
+                safe_unlink(os.path.join(path, filename))
+
+
+def destroy_repository_caches(repository_id):
+    """Remove everything kept in the cache directory for the repository outside of its cache (see Cache.destroy)."""
+    for name in REPOSITORY_CACHE_DIRS:
+        path = os.path.join(get_cache_dir(), name, bin_to_hex(repository_id))
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            safe_unlink(path)
+
+
 def files_cache_name():
     suffix = os.environ.get("BORG_FILES_CACHE_SUFFIX", "")
     return "files." + suffix if suffix else "files"
@@ -402,6 +499,7 @@ def destroy(repository, path=None):
         if os.path.exists(config):
             os.remove(config)  # kill config first
             shutil.rmtree(path)
+        destroy_repository_caches(repository.id)
 
     def __new__(
         cls,
@@ -787,18 +885,7 @@ def fetch_and_build_idx(archive_id, decrypted_repository, chunk_idx):
 
         def write_archive_index(archive_id, chunk_idx):
             nonlocal compact_chunks_archive_saved_space
-            compact_chunks_archive_saved_space += chunk_idx.compact()
-            fn = mkpath(archive_id, suffix=".compact")
-            fn_tmp = mkpath(archive_id, suffix=".tmp")
-            try:
-                with DetachedIntegrityCheckedFile(
-                    path=fn_tmp, write=True, filename=bin_to_hex(archive_id) + ".compact"
-                ) as fd:
-                    chunk_idx.write(fd)
-            except Exception:
-                safe_unlink(fn_tmp)
-            else:
-                os.replace(fn_tmp, fn)
+            compact_chunks_archive_saved_space += self.write_archive_index(archive_id, chunk_idx)
 
         def read_archive_index(archive_id, archive_name):
             archive_chunk_idx_path = mkpath(archive_id)
@@ -854,6 +941,7 @@ def create_master_idx(chunk_idx):
             # deallocates old hashindex, creates empty hashindex:
             chunk_idx.clear()
             cleanup_outdated(cached_ids - archive_ids)
+            prune_archive_caches(self.manifest)
             # Explicitly set the usable initial hash table capacity to avoid performance issues
             # due to hash table "resonance".
             master_index_capacity = len(self.repository)
@@ -911,6 +999,43 @@ def create_master_idx(chunk_idx):
             self.do_cache = os.path.isdir(archive_path)
             self.chunks = create_master_idx(self.chunks)
 
+    def read_archive_index(self, archive_id):
+        """Return the cached chunk index of archive *archive_id* (see :meth:`.sync`), None if it is not cached."""
+        fn = os.path.join(self.path, "chunks.archive.d", bin_to_hex(archive_id) + ".compact")
+        try:
+            with DetachedIntegrityCheckedFile(path=fn, write=False) as fd:
+                return ChunkIndex.read(fd, permit_compact=True)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        except FileIntegrityError as fie:
+            # the caller builds the index again and replaces the corrupted one.
+            logger.debug("Cached archive chunk index of %s is corrupted: %s", bin_to_hex(archive_id), fie)
+            return None
+
+    def write_archive_index(self, archive_id, chunk_idx):
+        """
+        Cache the chunk index of archive *archive_id* (see :meth:`.sync`).
+
+        The index is compacted and can't be modified afterwards. Return the number of bytes saved by compacting it.
+        """
+        archive_path = os.path.join(self.path, "chunks.archive.d")
+        if not os.path.isdir(archive_path):
+            # archive index caching is disabled, see sync().
+            return 0
+        saved_space = chunk_idx.compact()
+        fn = os.path.join(archive_path, bin_to_hex(archive_id) + ".compact")
+        fn_tmp = os.path.join(archive_path, bin_to_hex(archive_id) + ".tmp")
+        try:
+            with DetachedIntegrityCheckedFile(
+                path=fn_tmp, write=True, filename=bin_to_hex(archive_id) + ".compact"
+            ) as fd:
+                chunk_idx.write(fd)
+        except Exception:
+            safe_unlink(fn_tmp)
+        else:
+            os.replace(fn_tmp, fn)
+        return saved_space
+
     def check_cache_compatibility(self):
         my_features = Manifest.SUPPORTED_REPO_FEATURES
         if self.cache_config.ignored_features & my_features:
@@ -997,16 +1122,21 @@ def chunk_incref(self, id, stats, size=None):
         stats.update(_size, False)
         return ChunkListEntry(id, _size)
 
-    def chunk_decref(self, id, stats, wait=True):
+    def chunk_decref(self, id, stats, wait=True, count=1):
+        """Remove *count* references to chunk *id*, delete it from the repository when it is not referenced any more."""
         if not self.txn_active:
             self.begin_txn()
-        count, size = self.chunks.decref(id)
-        if count == 0:
+        if count == 1:
+            refcount, size = self.chunks.decref(id)
+        else:
+            refcount, size = decref_many(self.chunks, id, count)
+        if refcount == 0:
             del self.chunks[id]
             self.repository.delete(id, wait=wait)
+            stats.update(-size * (count - 1), False)
             stats.update(-size, True)
         else:
-            stats.update(-size, False)
+            stats.update(-size * count, False)
 
     def file_known_and_unchanged(self, hashed_path, path_hash, st):
         """
@@ -1138,6 +1268,12 @@ def file_known_and_unchanged(self, hashed_path, path_hash, st):
     def memorize_file(self, hashed_path, path_hash, st, ids):
         pass
 
+    def read_archive_index(self, archive_id):
+        return None
+
+    def write_archive_index(self, archive_id, chunk_idx):
+        return 0
+
     def add_chunk(self, id, meta, data, *, stats, wait=True, compress=True, size=None, ro_type=ROBJ_FILE_STREAM):
         assert ro_type is not None
         if not self._txn_active:
@@ -1177,16 +1313,21 @@ def chunk_incref(self, id, stats, size=None):
         stats.update(size, False)
         return ChunkListEntry(id, size)
 
-    def chunk_decref(self, id, stats, wait=True):
+    def chunk_decref(self, id, stats, wait=True, count=1):
+        """Remove *count* references to chunk *id*, delete it from the repository when it is not referenced any more."""
         if not self._txn_active:
             self.begin_txn()
-        count, size = self.chunks.decref(id)
-        if count == 0:
+        if count == 1:
+            refcount, size = self.chunks.decref(id)
+        else:
+            refcount, size = decref_many(self.chunks, id, count)
+        if refcount == 0:
             del self.chunks[id]
             self.repository.delete(id, wait=wait)
+            stats.update(-size * (count - 1), False)
             stats.update(-size, True)
         else:
-            stats.update(-size, False)
+            stats.update(-size * count, False)
 
     def commit(self):
         if not self._txn_active:
@@ -13,11 +13,16 @@ for the actual compression).
 Decompression is normally handled through Compressor.decompress which will detect
 which compressor has been used to compress the data and dispatch to the correct
 decompressor.
+
+All compressors are thread-safe: the output buffers and the LZ4 / ZSTD contexts are
+per-thread and the GIL is released while (de)compressing, so multiple threads can
+(de)compress at the same time (also using the same compressor instance).
 """
 
 from argparse import ArgumentTypeError
 import random
 from struct import Struct
+import threading
 import zlib
 
 try:
@@ -29,17 +34,31 @@ except ImportError:
 from .constants import MAX_DATA_SIZE
 from .helpers import Buffer, DecompressionError
 
-API_VERSION = '1.2_02'
+from cpython cimport PyMem_Malloc, PyMem_Free
+
+API_VERSION = '1.2_03'
 
 cdef extern from "lz4.h":
-    int LZ4_compress_default(const char* source, char* dest, int inputSize, int maxOutputSize) nogil
+    int LZ4_compress_fast_extState(void* state, const char* source, char* dest, int inputSize, int maxOutputSize,
+                                   int acceleration) nogil
     int LZ4_decompress_safe(const char* source, char* dest, int inputSize, int maxOutputSize) nogil
     int LZ4_compressBound(int inputSize) nogil
+    int LZ4_sizeofState() nogil
 
 
 cdef extern from "zstd.h":
-    size_t ZSTD_compress(void* dst, size_t dstCapacity, const void* src, size_t srcSize, int  compressionLevel) nogil
-    size_t ZSTD_decompress(void* dst, size_t dstCapacity, const void* src, size_t compressedSize) nogil
+    ctypedef struct ZSTD_CCtx:
+        pass
+    ctypedef struct ZSTD_DCtx:
+        pass
+    ZSTD_CCtx* ZSTD_createCCtx() nogil
+    size_t ZSTD_freeCCtx(ZSTD_CCtx* cctx) nogil
+    ZSTD_DCtx* ZSTD_createDCtx() nogil
+    size_t ZSTD_freeDCtx(ZSTD_DCtx* dctx) nogil
+    size_t ZSTD_compressCCtx(ZSTD_CCtx* cctx, void* dst, size_t dstCapacity, const void* src, size_t srcSize,
+                             int compressionLevel) nogil
+    size_t ZSTD_decompressDCtx(ZSTD_DCtx* dctx, void* dst, size_t dstCapacity, const void* src,
+                               size_t compressedSize) nogil
     size_t ZSTD_compressBound(size_t srcSize) nogil
     unsigned long long ZSTD_CONTENTSIZE_UNKNOWN
     unsigned long long ZSTD_CONTENTSIZE_ERROR
@@ -48,7 +67,59 @@ cdef extern from "zstd.h":
     const char* ZSTD_getErrorName(size_t code) nogil
 
 
-buffer = Buffer(bytearray, size=0)
+buffer = Buffer(bytearray, size=0)  # Buffer is thread-local, every thread gets its own output buffer.
+
+
+cdef class LZ4State:
+    """LZ4 compression state, to avoid LZ4 allocating it for every compression."""
+    cdef void *state
+
+    def __cinit__(self):
+        self.state = PyMem_Malloc(LZ4_sizeofState())
+        if not self.state:
+            raise MemoryError
+
+    def __dealloc__(self):
+        PyMem_Free(self.state)
+
+
+cdef class ZSTDContexts:
+    """ZSTD compression and decompression contexts, to avoid ZSTD allocating them for every (de)compression."""
+    cdef ZSTD_CCtx *cctx
+    cdef ZSTD_DCtx *dctx
+
+    def __cinit__(self):
+        self.cctx = ZSTD_createCCtx()
+        self.dctx = ZSTD_createDCtx()
+        if not self.cctx or not self.dctx:
+            raise MemoryError
+
+    def __dealloc__(self):
+        ZSTD_freeCCtx(self.cctx)  # freeing NULL is a no-op
+        ZSTD_freeDCtx(self.dctx)
+
+
+class ThreadContexts(threading.local):
+    """The per-thread (de)compression contexts, created when a thread uses them first."""
+    lz4 = None
+    zstd = None
+
+
+contexts = ThreadContexts()
+
+
+cdef LZ4State lz4_state():
+    state = contexts.lz4
+    if state is None:
+        state = contexts.lz4 = LZ4State()
+    return state
+
+
+cdef ZSTDContexts zstd_contexts():
+    ctxs = contexts.zstd
+    if ctxs is None:
+        ctxs = contexts.zstd = ZSTDContexts()
+    return ctxs
 
 
 cdef class CompressorBase:
@@ -223,11 +294,12 @@ class LZ4(DecidingCompressor):
         cdef int osize
         cdef char *source = idata
         cdef char *dest
+        cdef void *state = lz4_state().state
         osize = LZ4_compressBound(isize)
         buf = buffer.get(osize)
         dest = <char *> buf
         with nogil:
-            osize = LZ4_compress_default(source, dest, isize, osize)
+            osize = LZ4_compress_fast_extState(state, source, dest, isize, osize, 1)
         if not osize:
             raise Exception('lz4 compress failed')
         # only compress if the result actually is smaller
@@ -305,10 +377,11 @@ class LZMA(DecidingCompressor):
 
 
 class ZSTD(DecidingCompressor):
-    """zstd compression / decompression (pypi: zstandard, gh: python-zstandard)"""
-    # This is a NOT THREAD SAFE implementation.
-    # Only ONE python context must be created at a time.
-    # It should work flawlessly as long as borg will call ONLY ONE compression job at time.
+    """
+    zstd compression / decompression (libzstd).
+
+    Every thread reuses its own compression and decompression context (see ZSTDContexts).
+    """
     ID = 0x03
     name = 'zstd'
 
@@ -329,11 +402,12 @@ class ZSTD(DecidingCompressor):
         cdef char *source = idata
         cdef char *dest
         cdef int level = self.level
+        cdef ZSTD_CCtx *cctx = zstd_contexts().cctx
         osize = ZSTD_compressBound(isize)
         buf = buffer.get(osize)
         dest = <char *> buf
         with nogil:
-            osize = ZSTD_compress(dest, osize, source, isize, level)
+            osize = ZSTD_compressCCtx(cctx, dest, osize, source, isize, level)
         if ZSTD_isError(osize):
             raise Exception('zstd compress failed: %s' % ZSTD_getErrorName(osize))
         # only compress if the result actually is smaller
@@ -351,6 +425,7 @@ class ZSTD(DecidingCompressor):
         cdef unsigned long long rsize
         cdef char *source = idata
         cdef char *dest
+        cdef ZSTD_DCtx *dctx = zstd_contexts().dctx
         osize = ZSTD_getFrameContentSize(source, isize)
         if osize == ZSTD_CONTENTSIZE_ERROR:
             raise DecompressionError('zstd get size failed: data was not compressed by zstd')
@@ -362,7 +437,7 @@ class ZSTD(DecidingCompressor):
             raise DecompressionError('MemoryError')
         dest = <char *> buf
         with nogil:
-            rsize = ZSTD_decompress(dest, osize, source, isize)
+            rsize = ZSTD_decompressDCtx(dctx, dest, osize, source, isize)
         if ZSTD_isError(rsize):
             raise DecompressionError('zstd decompress failed: %s' % ZSTD_getErrorName(rsize))
         if rsize != osize:
@@ -39,6 +39,7 @@
 ROBJ_ARCHIVE_CHUNKIDS = "C"  # objects with a list of archive metadata stream chunkids
 ROBJ_ARCHIVE_STREAM = "S"  # archive metadata stream chunk (containing items)
 ROBJ_FILE_STREAM = "F"  # file content stream chunk (containing user data)
+ROBJ_LOCAL_CACHE = "L"  # data kept in the local cache directory (never stored in the repository)
 ROBJ_DONTCARE = "*"  # used to parse without type assertion (= accept any type)
 
 # in borg < 1.3, this has been defined like this:
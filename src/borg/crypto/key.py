@@ -2,6 +2,7 @@
 import hmac
 import os
 import textwrap
+import threading
 from hashlib import sha256, pbkdf2_hmac
 from typing import Literal, Callable, ClassVar
 
@@ -819,6 +820,10 @@ class AEADKeyBase(KeyBase):
 
     MAX_IV = 2**48 - 1
 
+    def __init__(self, repository):
+        super().__init__(repository)
+        self.iv_lock = threading.Lock()  # serializes the iv reservation of concurrent encrypt calls
+
     def assert_id(self, id, data):
         # Comparing the id hash here would not be needed any more for the new AEAD crypto **IF** we
         # could be sure that chunks were created by normal (not tampered, not evil) borg code:
@@ -841,12 +846,17 @@ def assert_id(self, id, data):
     def encrypt(self, id, data):
         # to encrypt new data in this session we use always self.cipher and self.sessionid
         reserved = b"\0"
-        iv = self.cipher.next_iv()
-        if iv > self.MAX_IV:  # see the data-structures docs about why the IV range is enough
-            raise IntegrityError("IV overflow, should never happen.")
+        with self.iv_lock:
+            # reserve the iv, so that concurrent encrypt calls from other threads never reuse it.
+            iv = self.cipher.next_iv()
+            if iv > self.MAX_IV:  # see the data-structures docs about why the IV range is enough
+                raise IntegrityError("IV overflow, should never happen.")
+            self.cipher.set_iv(iv)
         iv_48bit = iv.to_bytes(6, "big")
         header = self.TYPE_STR + reserved + iv_48bit + self.sessionid
-        return self.cipher.encrypt(data, header=header, iv=iv, aad=id)
+        # the actual encryption does not need the lock, it works with a cipher of its own for the reserved iv.
+        cipher = self._get_cipher(self.sessionid, iv)
+        return cipher.encrypt(data, header=header, aad=id)
 
     def decrypt(self, id, data):
         # to decrypt existing data, we need to get a cipher configured for the sessionid and iv from header
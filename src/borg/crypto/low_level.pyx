@@ -25,6 +25,14 @@ garbage.
 
 Newly designed envelope layouts can just authenticate the whole header.
 
+Thread safety:
+
+    encrypt() and decrypt() use a new OpenSSL cipher context for every call and release
+    the GIL while OpenSSL works, so multiple threads can en-/decrypt at the same time.
+    But the iv handling needs the caller's care: each encrypt() call must use a different iv,
+    so getting the next iv and setting it (for the next encrypt() call) must not be interleaved
+    by another thread.
+
 IV handling:
 
     iv = ...  # just never repeat!
@@ -40,8 +48,9 @@ from math import ceil
 
 from cpython cimport PyMem_Malloc, PyMem_Free
 from cpython.buffer cimport PyBUF_SIMPLE, PyObject_GetBuffer, PyBuffer_Release
+from libc.string cimport memcpy
 
-API_VERSION = '1.3_01'
+API_VERSION = '1.3_02'
 
 cdef extern from "openssl/crypto.h":
     int CRYPTO_memcmp(const void *a, const void *b, size_t len)
@@ -49,7 +58,7 @@ cdef extern from "openssl/crypto.h":
 cdef extern from "openssl/opensslv.h":
     long OPENSSL_VERSION_NUMBER
 
-cdef extern from "openssl/evp.h":
+cdef extern from "openssl/evp.h" nogil:
     ctypedef struct EVP_MD:
         pass
     ctypedef struct EVP_CIPHER:
@@ -168,7 +177,6 @@ class UNENCRYPTED:
 cdef class AES256_CTR_BASE:
     # Layout: HEADER + MAC 32 + IV 8 + CT (same as attic / borg < 2.0 IF HEADER = TYPE_BYTE, no AAD)
 
-    cdef EVP_CIPHER_CTX *ctx
     cdef unsigned char enc_key[32]
     cdef int cipher_blk_len
     cdef int iv_len, iv_len_short
@@ -198,12 +206,6 @@ cdef class AES256_CTR_BASE:
         else:
             self.blocks = -1  # make sure set_iv is called before encrypt
 
-    def __cinit__(self, mac_key, enc_key, iv=None, header_len=1, aad_offset=1):
-        self.ctx = EVP_CIPHER_CTX_new()
-
-    def __dealloc__(self):
-        EVP_CIPHER_CTX_free(self.ctx)
-
     cdef mac_compute(self, const unsigned char *data1, int data1_len,
                      const unsigned char *data2, int data2_len,
                      unsigned char *mac_buf):
@@ -236,6 +238,9 @@ cdef class AES256_CTR_BASE:
             raise MemoryError
         cdef int olen = 0
         cdef int offset
+        cdef unsigned char iv_buf[16]
+        cdef const char *failed = NULL
+        cdef EVP_CIPHER_CTX *ctx = NULL
         cdef Py_buffer idata = ro_buffer(data)
         cdef Py_buffer hdata = ro_buffer(header)
         try:
@@ -244,22 +249,31 @@ cdef class AES256_CTR_BASE:
                 odata[offset+i] = header[i]
             offset += hlen
             offset += self.mac_len
-            self.store_iv(odata+offset, self.iv)
+            memcpy(iv_buf, self.iv, self.iv_len)
+            self.store_iv(odata+offset, iv_buf)
             offset += self.iv_len_short
-            if not EVP_EncryptInit_ex(self.ctx, EVP_aes_256_ctr(), NULL, self.enc_key, self.iv):
-                raise CryptoError('EVP_EncryptInit_ex failed')
-            if not EVP_EncryptUpdate(self.ctx, odata+offset, &olen, <const unsigned char*> idata.buf, ilen):
-                raise CryptoError('EVP_EncryptUpdate failed')
-            offset += olen
-            if not EVP_EncryptFinal_ex(self.ctx, odata+offset, &olen):
-                raise CryptoError('EVP_EncryptFinal_ex failed')
-            offset += olen
+            ctx = EVP_CIPHER_CTX_new()
+            if not ctx:
+                raise MemoryError
+            with nogil:
+                if not EVP_EncryptInit_ex(ctx, EVP_aes_256_ctr(), NULL, self.enc_key, iv_buf):
+                    failed = 'EVP_EncryptInit_ex failed'
+                elif not EVP_EncryptUpdate(ctx, odata+offset, &olen, <const unsigned char*> idata.buf, ilen):
+                    failed = 'EVP_EncryptUpdate failed'
+                else:
+                    offset += olen
+                    if not EVP_EncryptFinal_ex(ctx, odata+offset, &olen):
+                        failed = 'EVP_EncryptFinal_ex failed'
+                    offset += olen
+            if failed:
+                raise CryptoError(failed.decode())
             self.mac_compute(<const unsigned char *> hdata.buf+aoffset, alen,
                               odata+hlen+self.mac_len, offset-hlen-self.mac_len,
                               odata+hlen)
             self.blocks += self.block_count(ilen)
             return odata[:offset]
         finally:
+            EVP_CIPHER_CTX_free(ctx)
             PyMem_Free(odata)
             PyBuffer_Release(&hdata)
             PyBuffer_Release(&idata)
@@ -279,6 +293,9 @@ cdef class AES256_CTR_BASE:
         cdef int offset
         cdef unsigned char mac_buf[32]
         assert sizeof(mac_buf) == self.mac_len
+        cdef const unsigned char *iv_ptr
+        cdef const char *failed = NULL
+        cdef EVP_CIPHER_CTX *ctx = NULL
         cdef Py_buffer idata = ro_buffer(envelope)
         try:
             self.mac_verify(<const unsigned char *> idata.buf+aoffset, alen,
@@ -286,20 +303,29 @@ cdef class AES256_CTR_BASE:
                              mac_buf, <const unsigned char *> idata.buf+hlen)
             iv = self.fetch_iv(<unsigned char *> idata.buf+hlen+self.mac_len)
             self.set_iv(iv)
-            if not EVP_DecryptInit_ex(self.ctx, EVP_aes_256_ctr(), NULL, self.enc_key, iv):
-                raise CryptoError('EVP_DecryptInit_ex failed')
+            iv_ptr = iv
+            ctx = EVP_CIPHER_CTX_new()
+            if not ctx:
+                raise MemoryError
             offset = 0
-            if not EVP_DecryptUpdate(self.ctx, odata+offset, &olen,
-                                     <const unsigned char*> idata.buf+hlen+self.mac_len+self.iv_len_short,
-                                     ilen-hlen-self.mac_len-self.iv_len_short):
-                raise CryptoError('EVP_DecryptUpdate failed')
-            offset += olen
-            if not EVP_DecryptFinal_ex(self.ctx, odata+offset, &olen):
-                raise CryptoError('EVP_DecryptFinal_ex failed')
-            offset += olen
+            with nogil:
+                if not EVP_DecryptInit_ex(ctx, EVP_aes_256_ctr(), NULL, self.enc_key, iv_ptr):
+                    failed = 'EVP_DecryptInit_ex failed'
+                elif not EVP_DecryptUpdate(ctx, odata+offset, &olen,
+                                           <const unsigned char*> idata.buf+hlen+self.mac_len+self.iv_len_short,
+                                           ilen-hlen-self.mac_len-self.iv_len_short):
+                    failed = 'EVP_DecryptUpdate failed'
+                else:
+                    offset += olen
+                    if not EVP_DecryptFinal_ex(ctx, odata+offset, &olen):
+                        failed = 'EVP_DecryptFinal_ex failed'
+                    offset += olen
+            if failed:
+                raise CryptoError(failed.decode())
             self.blocks += self.block_count(offset)
             return odata[:offset]
         finally:
+            EVP_CIPHER_CTX_free(ctx)
             PyMem_Free(odata)
             PyBuffer_Release(&idata)
 
@@ -352,9 +378,8 @@ cdef class AES256_CTR_HMAC_SHA256(AES256_CTR_BASE):
                      const unsigned char *data2, int data2_len,
                      unsigned char *mac_buf):
         data = data1[:data1_len] + data2[:data2_len]
-        mac = hmac.digest(self.mac_key[:self.mac_len], data, 'sha256')
-        for i in range(self.mac_len):
-            mac_buf[i] = mac[i]
+        mac = hmac.digest(self.mac_key[:self.mac_len], data, 'sha256')  # releases the GIL for bigger data
+        memcpy(mac_buf, <const unsigned char *> mac, self.mac_len)
 
     cdef mac_verify(self, const unsigned char *data1, int data1_len,
                     const unsigned char *data2, int data2_len,
@@ -382,9 +407,8 @@ cdef class AES256_CTR_BLAKE2b(AES256_CTR_BASE):
                      const unsigned char *data2, int data2_len,
                      unsigned char *mac_buf):
         data = self.mac_key[:128] + data1[:data1_len] + data2[:data2_len]
-        mac = hashlib.blake2b(data, digest_size=self.mac_len).digest()
-        for i in range(self.mac_len):
-            mac_buf[i] = mac[i]
+        mac = hashlib.blake2b(data, digest_size=self.mac_len).digest()  # releases the GIL for bigger data
+        memcpy(mac_buf, <const unsigned char *> mac, self.mac_len)
 
     cdef mac_verify(self, const unsigned char *data1, int data1_len,
                     const unsigned char *data2, int data2_len,
@@ -402,7 +426,6 @@ cdef class _AEAD_BASE:
     # Layout: HEADER + MAC 16 + CT
 
     cdef CIPHER cipher
-    cdef EVP_CIPHER_CTX *ctx
     cdef unsigned char key[32]
     cdef int cipher_blk_len
     cdef int iv_len
@@ -438,12 +461,6 @@ cdef class _AEAD_BASE:
         else:
             self.blocks = -1  # make sure set_iv is called before encrypt
 
-    def __cinit__(self, key, iv=None, header_len=0, aad_offset=0):
-        self.ctx = EVP_CIPHER_CTX_new()
-
-    def __dealloc__(self):
-        EVP_CIPHER_CTX_free(self.ctx)
-
     def encrypt(self, data, header=b'', iv=None, aad=b''):
         """
         encrypt data, compute auth tag over aad + header + cdata.
@@ -472,6 +489,10 @@ cdef class _AEAD_BASE:
             raise MemoryError
         cdef int olen = 0
         cdef int offset
+        cdef unsigned char iv_buf[12]
+        cdef const EVP_CIPHER *cipher = self.cipher()
+        cdef const char *failed = NULL
+        cdef EVP_CIPHER_CTX *ctx = NULL
         cdef Py_buffer idata = ro_buffer(data)
         cdef Py_buffer hdata = ro_buffer(header)
         cdef Py_buffer aadata = ro_buffer(aad)
@@ -481,27 +502,36 @@ cdef class _AEAD_BASE:
                 odata[offset+i] = header[i]
             offset += hlen
             offset += self.mac_len
-            if not EVP_EncryptInit_ex(self.ctx, self.cipher(), NULL, NULL, NULL):
-                raise CryptoError('EVP_EncryptInit_ex failed')
-            if not EVP_CIPHER_CTX_ctrl(self.ctx, EVP_CTRL_AEAD_SET_IVLEN, self.iv_len, NULL):
-                raise CryptoError('EVP_CIPHER_CTX_ctrl SET IVLEN failed')
-            if not EVP_EncryptInit_ex(self.ctx, NULL, NULL, self.key, self.iv):
-                raise CryptoError('EVP_EncryptInit_ex failed')
-            if not EVP_EncryptUpdate(self.ctx, NULL, &olen, <const unsigned char*> aadata.buf, aadlen):
-                raise CryptoError('EVP_EncryptUpdate failed')
-            if not EVP_EncryptUpdate(self.ctx, NULL, &olen, <const unsigned char*> hdata.buf+aoffset, alen):
-                raise CryptoError('EVP_EncryptUpdate failed')
-            if not EVP_EncryptUpdate(self.ctx, odata+offset, &olen, <const unsigned char*> idata.buf, ilen):
-                raise CryptoError('EVP_EncryptUpdate failed')
-            offset += olen
-            if not EVP_EncryptFinal_ex(self.ctx, odata+offset, &olen):
-                raise CryptoError('EVP_EncryptFinal_ex failed')
-            offset += olen
-            if not EVP_CIPHER_CTX_ctrl(self.ctx, EVP_CTRL_AEAD_GET_TAG, self.mac_len, odata + hlen):
-                raise CryptoError('EVP_CIPHER_CTX_ctrl GET TAG failed')
+            memcpy(iv_buf, self.iv, self.iv_len)
+            ctx = EVP_CIPHER_CTX_new()
+            if not ctx:
+                raise MemoryError
+            with nogil:
+                if not EVP_EncryptInit_ex(ctx, cipher, NULL, NULL, NULL):
+                    failed = 'EVP_EncryptInit_ex failed'
+                elif not EVP_CIPHER_CTX_ctrl(ctx, EVP_CTRL_AEAD_SET_IVLEN, self.iv_len, NULL):
+                    failed = 'EVP_CIPHER_CTX_ctrl SET IVLEN failed'
+                elif not EVP_EncryptInit_ex(ctx, NULL, NULL, self.key, iv_buf):
+                    failed = 'EVP_EncryptInit_ex failed'
+                elif not EVP_EncryptUpdate(ctx, NULL, &olen, <const unsigned char*> aadata.buf, aadlen):
+                    failed = 'EVP_EncryptUpdate failed'
+                elif not EVP_EncryptUpdate(ctx, NULL, &olen, <const unsigned char*> hdata.buf+aoffset, alen):
+                    failed = 'EVP_EncryptUpdate failed'
+                elif not EVP_EncryptUpdate(ctx, odata+offset, &olen, <const unsigned char*> idata.buf, ilen):
+                    failed = 'EVP_EncryptUpdate failed'
+                else:
+                    offset += olen
+                    if not EVP_EncryptFinal_ex(ctx, odata+offset, &olen):
+                        failed = 'EVP_EncryptFinal_ex failed'
+                    elif not EVP_CIPHER_CTX_ctrl(ctx, EVP_CTRL_AEAD_GET_TAG, self.mac_len, odata + hlen):
+                        failed = 'EVP_CIPHER_CTX_ctrl GET TAG failed'
+                    offset += olen
+            if failed:
+                raise CryptoError(failed.decode())
             self.blocks = block_count
             return odata[:offset]
         finally:
+            EVP_CIPHER_CTX_free(ctx)
             PyMem_Free(odata)
             PyBuffer_Release(&hdata)
             PyBuffer_Release(&idata)
@@ -527,34 +557,51 @@ cdef class _AEAD_BASE:
             raise MemoryError
         cdef int olen = 0
         cdef int offset
+        cdef unsigned char iv_buf[12]
+        cdef const EVP_CIPHER *cipher = self.cipher()
+        cdef const char *failed = NULL
+        cdef bint integrity_failed = False
+        cdef EVP_CIPHER_CTX *ctx = NULL
         cdef Py_buffer idata = ro_buffer(envelope)
         cdef Py_buffer aadata = ro_buffer(aad)
         try:
-            if not EVP_DecryptInit_ex(self.ctx, self.cipher(), NULL, NULL, NULL):
-                raise CryptoError('EVP_DecryptInit_ex failed')
-            if not EVP_CIPHER_CTX_ctrl(self.ctx, EVP_CTRL_AEAD_SET_IVLEN, self.iv_len, NULL):
-                raise CryptoError('EVP_CIPHER_CTX_ctrl SET IVLEN failed')
-            if not EVP_DecryptInit_ex(self.ctx, NULL, NULL, self.key, self.iv):
-                raise CryptoError('EVP_DecryptInit_ex failed')
-            if not EVP_DecryptUpdate(self.ctx, NULL, &olen, <const unsigned char*> aadata.buf, aadlen):
-                raise CryptoError('EVP_DecryptUpdate failed')
-            if not EVP_DecryptUpdate(self.ctx, NULL, &olen, <const unsigned char*> idata.buf+aoffset, alen):
-                raise CryptoError('EVP_DecryptUpdate failed')
+            memcpy(iv_buf, self.iv, self.iv_len)
+            ctx = EVP_CIPHER_CTX_new()
+            if not ctx:
+                raise MemoryError
             offset = 0
-            if not EVP_DecryptUpdate(self.ctx, odata+offset, &olen,
-                                     <const unsigned char*> idata.buf+hlen+self.mac_len,
-                                     ilen-hlen-self.mac_len):
-                raise CryptoError('EVP_DecryptUpdate failed')
-            offset += olen
-            if not EVP_CIPHER_CTX_ctrl(self.ctx, EVP_CTRL_AEAD_SET_TAG, self.mac_len, <unsigned char *> idata.buf + hlen):
-                raise CryptoError('EVP_CIPHER_CTX_ctrl SET TAG failed')
-            if not EVP_DecryptFinal_ex(self.ctx, odata+offset, &olen):
-                # a failure here means corrupted or tampered tag (mac) or data.
+            with nogil:
+                if not EVP_DecryptInit_ex(ctx, cipher, NULL, NULL, NULL):
+                    failed = 'EVP_DecryptInit_ex failed'
+                elif not EVP_CIPHER_CTX_ctrl(ctx, EVP_CTRL_AEAD_SET_IVLEN, self.iv_len, NULL):
+                    failed = 'EVP_CIPHER_CTX_ctrl SET IVLEN failed'
+                elif not EVP_DecryptInit_ex(ctx, NULL, NULL, self.key, iv_buf):
+                    failed = 'EVP_DecryptInit_ex failed'
+                elif not EVP_DecryptUpdate(ctx, NULL, &olen, <const unsigned char*> aadata.buf, aadlen):
+                    failed = 'EVP_DecryptUpdate failed'
+                elif not EVP_DecryptUpdate(ctx, NULL, &olen, <const unsigned char*> idata.buf+aoffset, alen):
+                    failed = 'EVP_DecryptUpdate failed'
+                elif not EVP_DecryptUpdate(ctx, odata+offset, &olen,
+                                           <const unsigned char*> idata.buf+hlen+self.mac_len,
+                                           ilen-hlen-self.mac_len):
+                    failed = 'EVP_DecryptUpdate failed'
+                else:
+                    offset += olen
+                    if not EVP_CIPHER_CTX_ctrl(ctx, EVP_CTRL_AEAD_SET_TAG, self.mac_len,
+                                               <unsigned char *> idata.buf + hlen):
+                        failed = 'EVP_CIPHER_CTX_ctrl SET TAG failed'
+                    elif not EVP_DecryptFinal_ex(ctx, odata+offset, &olen):
+                        # a failure here means corrupted or tampered tag (mac) or data.
+                        integrity_failed = True
+                    offset += olen
+            if failed:
+                raise CryptoError(failed.decode())
+            if integrity_failed:
                 raise IntegrityError('Authentication / EVP_DecryptFinal_ex failed')
-            offset += olen
             self.blocks = self.block_count(offset)
             return odata[:offset]
         finally:
+            EVP_CIPHER_CTX_free(ctx)
             PyMem_Free(odata)
             PyBuffer_Release(&idata)
             PyBuffer_Release(&aadata)
@@ -606,7 +653,6 @@ cdef class CHACHA20_POLY1305(_AEAD_BASE):
 cdef class AES:  # legacy
     """A thin wrapper around the OpenSSL EVP cipher API - for legacy code, like key file encryption"""
     cdef CIPHER cipher
-    cdef EVP_CIPHER_CTX *ctx
     cdef unsigned char enc_key[32]
     cdef int cipher_blk_len
     cdef int iv_len
@@ -625,12 +671,6 @@ cdef class AES:  # legacy
         else:
             self.blocks = -1  # make sure set_iv is called before encrypt
 
-    def __cinit__(self, enc_key, iv=None):
-        self.ctx = EVP_CIPHER_CTX_new()
-
-    def __dealloc__(self):
-        EVP_CIPHER_CTX_free(self.ctx)
-
     def encrypt(self, data, iv=None):
         if iv is not None:
             self.set_iv(iv)
@@ -642,19 +682,32 @@ cdef class AES:  # legacy
         cdef unsigned char *odata = <unsigned char *>PyMem_Malloc(ilen + self.cipher_blk_len)
         if not odata:
             raise MemoryError
+        cdef unsigned char iv_buf[16]
+        cdef const EVP_CIPHER *cipher = self.cipher()
+        cdef const char *failed = NULL
+        cdef EVP_CIPHER_CTX *ctx = NULL
         try:
-            if not EVP_EncryptInit_ex(self.ctx, self.cipher(), NULL, self.enc_key, self.iv):
-                raise Exception('EVP_EncryptInit_ex failed')
+            memcpy(iv_buf, self.iv, self.iv_len)
+            ctx = EVP_CIPHER_CTX_new()
+            if not ctx:
+                raise MemoryError
             offset = 0
-            if not EVP_EncryptUpdate(self.ctx, odata, &olen, <const unsigned char*> idata.buf, ilen):
-                raise Exception('EVP_EncryptUpdate failed')
-            offset += olen
-            if not EVP_EncryptFinal_ex(self.ctx, odata+offset, &olen):
-                raise Exception('EVP_EncryptFinal failed')
-            offset += olen
+            with nogil:
+                if not EVP_EncryptInit_ex(ctx, cipher, NULL, self.enc_key, iv_buf):
+                    failed = 'EVP_EncryptInit_ex failed'
+                elif not EVP_EncryptUpdate(ctx, odata, &olen, <const unsigned char*> idata.buf, ilen):
+                    failed = 'EVP_EncryptUpdate failed'
+                else:
+                    offset += olen
+                    if not EVP_EncryptFinal_ex(ctx, odata+offset, &olen):
+                        failed = 'EVP_EncryptFinal failed'
+                    offset += olen
+            if failed:
+                raise Exception(failed.decode())
             self.blocks = self.block_count(offset)
             return odata[:offset]
         finally:
+            EVP_CIPHER_CTX_free(ctx)
             PyMem_Free(odata)
             PyBuffer_Release(&idata)
 
@@ -666,23 +719,36 @@ cdef class AES:  # legacy
         cdef unsigned char *odata = <unsigned char *>PyMem_Malloc(ilen + self.cipher_blk_len)
         if not odata:
             raise MemoryError
+        cdef unsigned char iv_buf[16]
+        cdef const EVP_CIPHER *cipher = self.cipher()
+        cdef const char *failed = NULL
+        cdef EVP_CIPHER_CTX *ctx = NULL
         try:
-            # Set cipher type and mode
-            if not EVP_DecryptInit_ex(self.ctx, self.cipher(), NULL, self.enc_key, self.iv):
-                raise Exception('EVP_DecryptInit_ex failed')
+            memcpy(iv_buf, self.iv, self.iv_len)
+            ctx = EVP_CIPHER_CTX_new()
+            if not ctx:
+                raise MemoryError
             offset = 0
-            if not EVP_DecryptUpdate(self.ctx, odata, &olen, <const unsigned char*> idata.buf, ilen):
-                raise Exception('EVP_DecryptUpdate failed')
-            offset += olen
-            if not EVP_DecryptFinal_ex(self.ctx, odata+offset, &olen):
-                # this error check is very important for modes with padding or
-                # authentication. for them, a failure here means corrupted data.
-                # CTR mode does not use padding nor authentication.
-                raise Exception('EVP_DecryptFinal failed')
-            offset += olen
+            with nogil:
+                # Set cipher type and mode
+                if not EVP_DecryptInit_ex(ctx, cipher, NULL, self.enc_key, iv_buf):
+                    failed = 'EVP_DecryptInit_ex failed'
+                elif not EVP_DecryptUpdate(ctx, odata, &olen, <const unsigned char*> idata.buf, ilen):
+                    failed = 'EVP_DecryptUpdate failed'
+                else:
+                    offset += olen
+                    if not EVP_DecryptFinal_ex(ctx, odata+offset, &olen):
+                        # this error check is very important for modes with padding or
+                        # authentication. for them, a failure here means corrupted data.
+                        # CTR mode does not use padding nor authentication.
+                        failed = 'EVP_DecryptFinal failed'
+                    offset += olen
+            if failed:
+                raise Exception(failed.decode())
             self.blocks = self.block_count(ilen)
             return odata[:offset]
         finally:
+            EVP_CIPHER_CTX_free(ctx)
             PyMem_Free(odata)
             PyBuffer_Release(&idata)
 
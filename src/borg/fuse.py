@@ -1,13 +1,17 @@
 import errno
 import functools
 import io
+import itertools
 import os
 import stat
 import struct
 import sys
 import tempfile
+import threading
 import time
-from collections import defaultdict
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from signal import SIGINT
 
 from .constants import ROBJ_FILE_STREAM
@@ -37,9 +41,10 @@ def async_wrapper(fn):
 
 from .crypto.low_level import blake2b_128
 from .archiver._common import build_matcher, build_filter
-from .archive import Archive, get_item_uid_gid
+from .archive import Archive, ArchivePathIndex, get_item_uid_gid
+from .cache import save_cache_object, load_cache_object
 from .hashindex import FuseVersionsIndex
-from .helpers import daemonize, daemonizing, signal_handler, format_file_size
+from .helpers import daemonize, daemonizing, signal_handler, format_file_size, get_cache_dir, bin_to_hex
 from .helpers import HardLinkManager
 from .helpers import msgpack
 from .helpers.lrucache import LRUCache
@@ -47,6 +52,7 @@ def async_wrapper(fn):
 from .platform import uid2user, gid2group
 from .platformflags import is_darwin
 from .remote import RemoteRepository
+from .repository import Repository
 
 
 def fuse_main():
@@ -125,6 +131,12 @@ def __init__(self, decrypted_repository):
         # Count of direct items, i.e. data is in self.fd
         self.direct_items = 0
 
+        # Maps chunk IDs to their offset in the meta-array, for entries added by add_item.
+        self.chunk_id_offsets = {}
+
+        # Offsets of the direct item entries in the meta-array, ascending.
+        self.direct_entries = []
+
     def get(self, inode):
         offset = inode - self.offset
         if offset < 0:
@@ -149,95 +161,258 @@ def get(self, inode):
         else:
             raise ValueError("Invalid entry type in self.meta")
 
-    def iter_archive_items(self, archive_item_ids, filter=None):
-        unpacker = msgpack.Unpacker()
-
-        # Current offset in the metadata stream, which consists of all metadata chunks glued together
-        stream_offset = 0
-        # Offset of the current chunk in the metadata stream
-        chunk_begin = 0
-        # Length of the chunk preceding the current chunk
-        last_chunk_length = 0
-        msgpacked_bytes = b""
+    def iter_archive_items(self, archive_item_ids, filter=None, spans=None):
+        """Yield (inode, item) of the items in the archive (or only those in *spans*, see ArchivePathIndex)."""
+        if spans is None:
+            spans = [(0, 0, len(archive_item_ids), 0)]  # the whole item stream
+        chunk_indexes = ArchivePathIndex.span_chunks(spans)
+        chunks = zip(chunk_indexes, self.decrypted_repository.get_many([archive_item_ids[i] for i in chunk_indexes]))
+        chunk_index = chunk = None
 
         write_offset = self.write_offset
         meta = self.meta
         pack_indirect_into = self.indirect_entry_struct.pack_into
 
-        for key, (csize, data) in zip(archive_item_ids, self.decrypted_repository.get_many(archive_item_ids)):
-            # Store the chunk ID in the meta-array
-            if write_offset + 32 >= len(meta):
-                self.meta = meta = meta + bytes(self.GROW_META_BY)
-            meta[write_offset : write_offset + 32] = key
-            current_id_offset = write_offset
-            write_offset += 32
+        for span in spans:
+            unpacker = msgpack.Unpacker()
 
-            chunk_begin += last_chunk_length
-            last_chunk_length = len(data)
+            # Current offset in the metadata stream, which consists of all metadata chunks (pieces) glued together
+            stream_offset = 0
+            # Offset of the current chunk in the metadata stream
+            chunk_begin = 0
+            # Length of the chunk preceding the current chunk
+            last_chunk_length = 0
+            msgpacked_bytes = b""
+
+            for i, piece_start, piece_end in ArchivePathIndex.span_pieces(span):
+                while chunk_index != i:
+                    chunk_index, (csize, chunk) = next(chunks)
+                key = archive_item_ids[i]
+                # a span might start or end in the middle of a chunk
+                data = chunk if piece_start == 0 and piece_end is None else chunk[piece_start:piece_end]
+                # Store the chunk ID in the meta-array
+                if write_offset + 32 >= len(meta):
+                    self.meta = meta = meta + bytes(self.GROW_META_BY)
+                meta[write_offset : write_offset + 32] = key
+                current_id_offset = write_offset
+                write_offset += 32
 
-            unpacker.feed(data)
-            while True:
-                try:
-                    item = unpacker.unpack()
-                    need_more_data = False
-                except msgpack.OutOfData:
-                    need_more_data = True
-
-                start = stream_offset - chunk_begin
-                # tell() is not helpful for the need_more_data case, but we know it is the remainder
-                # of the data in that case. in the other case, tell() works as expected.
-                length = (len(data) - start) if need_more_data else (unpacker.tell() - stream_offset)
-                msgpacked_bytes += data[start : start + length]
-                stream_offset += length
-
-                if need_more_data:
-                    # Need more data, feed the next chunk
-                    break
+                chunk_begin += last_chunk_length
+                last_chunk_length = len(data)
 
-                item = Item(internal_dict=item)
-                if filter and not filter(item):
+                unpacker.feed(data)
+                while True:
+                    try:
+                        item = unpacker.unpack()
+                        need_more_data = False
+                    except msgpack.OutOfData:
+                        need_more_data = True
+
+                    start = stream_offset - chunk_begin
+                    # tell() is not helpful for the need_more_data case, but we know it is the remainder
+                    # of the data in that case. in the other case, tell() works as expected.
+                    length = (len(data) - start) if need_more_data else (unpacker.tell() - stream_offset)
+                    msgpacked_bytes += data[start : start + length]
+                    stream_offset += length
+
+                    if need_more_data:
+                        # Need more data, feed the next chunk
+                        break
+
+                    item = Item(internal_dict=item)
+                    if filter and not filter(item):
+                        msgpacked_bytes = b""
+                        continue
+
+                    current_item = msgpacked_bytes
+                    current_item_length = len(current_item)
+                    current_spans_chunks = stream_offset - current_item_length < chunk_begin
                     msgpacked_bytes = b""
-                    continue
 
-                current_item = msgpacked_bytes
-                current_item_length = len(current_item)
-                current_spans_chunks = stream_offset - current_item_length < chunk_begin
-                msgpacked_bytes = b""
+                    if write_offset + 9 >= len(meta):
+                        self.meta = meta = meta + bytes(self.GROW_META_BY)
+
+                    # item entries in the meta-array come in two different flavours, both nine bytes long.
+                    # (1) for items that span chunks:
+                    #
+                    #     'S' + 8 byte offset into the self.fd file, where the msgpacked item starts.
+                    #
+                    # (2) for items that are completely contained in one chunk, which usually is the great majority
+                    #     (about 700:1 for system backups)
+                    #
+                    #     'I' + 4 byte offset where the chunk ID is + 4 byte offset in the chunk
+                    #     where the msgpacked items starts
+                    #
+                    #     The chunk ID offset is the number of bytes _back_ from the start of the entry, i.e.:
+                    #
+                    #     |Chunk ID| ....          |S1234abcd|
+                    #      ^------ offset ----------^
+
+                    if current_spans_chunks:
+                        pos = self.fd.seek(0, io.SEEK_END)
+                        self.fd.write(current_item)
+                        meta[write_offset : write_offset + 9] = b"S" + pos.to_bytes(8, "little")
+                        self.direct_entries.append(write_offset)
+                        self.direct_items += 1
+                    else:
+                        item_offset = stream_offset - current_item_length - chunk_begin + piece_start
+                        pack_indirect_into(meta, write_offset, b"I", write_offset - current_id_offset, item_offset)
+                        self.indirect_items += 1
+                    inode = write_offset + self.offset
+                    write_offset += 9
+
+                    yield inode, item
 
-                if write_offset + 9 >= len(meta):
-                    self.meta = meta = meta + bytes(self.GROW_META_BY)
+        self.write_offset = write_offset
 
-                # item entries in the meta-array come in two different flavours, both nine bytes long.
-                # (1) for items that span chunks:
-                #
-                #     'S' + 8 byte offset into the self.fd file, where the msgpacked item starts.
-                #
-                # (2) for items that are completely contained in one chunk, which usually is the great majority
-                #     (about 700:1 for system backups)
-                #
-                #     'I' + 4 byte offset where the chunk ID is + 4 byte offset in the chunk
-                #     where the msgpacked items starts
-                #
-                #     The chunk ID offset is the number of bytes _back_ from the start of the entry, i.e.:
-                #
-                #     |Chunk ID| ....          |S1234abcd|
-                #      ^------ offset ----------^
-
-                if current_spans_chunks:
-                    pos = self.fd.seek(0, io.SEEK_END)
-                    self.fd.write(current_item)
-                    meta[write_offset : write_offset + 9] = b"S" + pos.to_bytes(8, "little")
-                    self.direct_items += 1
-                else:
-                    item_offset = stream_offset - current_item_length - chunk_begin
-                    pack_indirect_into(meta, write_offset, b"I", write_offset - current_id_offset, item_offset)
-                    self.indirect_items += 1
-                inode = write_offset + self.offset
-                write_offset += 9
+    def add_item(self, archive_item_ids, span):
+        """Add an entry for the item at *span* of the item stream (see ArchivePathIndex.spans), return its inode."""
+        start_chunk, start_offset, end_chunk, end_offset = span
+        if self.write_offset + 32 + 9 >= len(self.meta):
+            self.meta = self.meta + bytes(self.GROW_META_BY)
+        meta = self.meta
+        write_offset = self.write_offset
+        if end_chunk == start_chunk or (end_chunk == start_chunk + 1 and end_offset == 0):
+            # the item is completely contained in one chunk, see iter_archive_items for the entry formats.
+            chunk_id = archive_item_ids[start_chunk]
+            id_offset = self.chunk_id_offsets.get(chunk_id)
+            if id_offset is None or write_offset - id_offset >= 2**32:
+                meta[write_offset : write_offset + 32] = chunk_id
+                id_offset = self.chunk_id_offsets[chunk_id] = write_offset
+                write_offset += 32
+            self.indirect_entry_struct.pack_into(meta, write_offset, b"I", write_offset - id_offset, start_offset)
+            self.indirect_items += 1
+        else:
+            pieces = list(ArchivePathIndex.span_pieces(span))
+            chunks = self.decrypted_repository.get_many([archive_item_ids[i] for i, _, _ in pieces])
+            current_item = b"".join(chunk[start:end] for (_, start, end), (csize, chunk) in zip(pieces, chunks))
+            pos = self.fd.seek(0, io.SEEK_END)
+            self.fd.write(current_item)
+            meta[write_offset : write_offset + 9] = b"S" + pos.to_bytes(8, "little")
+            self.direct_entries.append(write_offset)
+            self.direct_items += 1
+        inode = write_offset + self.offset
+        self.write_offset = write_offset + 9
+        return inode
 
-                yield inode, item
+    def export_entries(self, meta_start, fd_start):
+        """
+        Return the entries written since the meta-array offset *meta_start* as (meta, direct items, direct entries).
+
+        The direct items are those written to self.fd since *fd_start*. The entries are made relocatable,
+        i.e. the offsets of direct entries and of their items are relative to *meta_start* and *fd_start*.
+        """
+        meta = self.meta[meta_start : self.write_offset]
+        direct_entries = [
+            offset - meta_start for offset in self.direct_entries[bisect_left(self.direct_entries, meta_start) :]
+        ]
+        for offset in direct_entries:
+            fd_offset = int.from_bytes(meta[offset + 1 : offset + 9], "little")
+            meta[offset + 1 : offset + 9] = (fd_offset - fd_start).to_bytes(8, "little")
+        self.fd.seek(fd_start, io.SEEK_SET)
+        return bytes(meta), self.fd.read(), direct_entries
+
+    def import_entries(self, meta, direct_items, direct_entries):
+        """Add entries returned by export_entries, return the meta-array offset where they start."""
+        meta_start = self.write_offset
+        if meta_start + len(meta) >= len(self.meta):
+            self.meta = self.meta + bytes(meta_start + len(meta) - len(self.meta) + self.GROW_META_BY)
+        self.meta[meta_start : meta_start + len(meta)] = meta
+        fd_start = self.fd.seek(0, io.SEEK_END)
+        self.fd.write(direct_items)
+        for offset in direct_entries:
+            offset += meta_start
+            fd_offset = int.from_bytes(self.meta[offset + 1 : offset + 9], "little")
+            self.meta[offset + 1 : offset + 9] = (fd_offset + fd_start).to_bytes(8, "little")
+            self.direct_entries.append(offset)
+        self.direct_items += len(direct_entries)
+        self.write_offset = meta_start + len(meta)
+        return meta_start
+
+
+class ArchiveInodes:
+    """
+    The inodes of an archive, as created by FuseBackend._process_archive, kept in the local cache directory.
+
+    This contains the ItemCache entries of the archive's items as well as the directory structure,
+    with inode numbers relative to the archive (see FuseBackend._save_archive), so mounting an archive
+    again does not need to process its item stream (see save_cache_object).
+    """
+
+    VERSION = 1
+
+    @staticmethod
+    def cache_path(repository_id, archive_id):
+        return os.path.join(get_cache_dir(), "mount-inodes", bin_to_hex(repository_id), bin_to_hex(archive_id))
+
+    @classmethod
+    def load(cls, path, archive_id, repo_objs):
+        """Return the inodes stored at *path* (as dict) or None, if they do not exist (or are not usable)."""
+        return load_cache_object(path, repo_objs, cls.VERSION, archive_id, what="mount inodes cache")
+
+    @classmethod
+    def save(cls, path, archive_id, inodes, repo_objs):
+        save_cache_object(path, dict(inodes, version=cls.VERSION, archive_id=archive_id), repo_objs)
 
-        self.write_offset = write_offset
+
+class ChunkFetcher:
+    """
+    Fetch file content chunks in background threads, so they are ready when they get read.
+
+    Repository objects are not thread-safe, thus every thread uses its own repository connection,
+    which it opens (using *open_repository*) when it fetches its first chunk.
+    """
+
+    def __init__(self, open_repository, repo_objs, *, threads, capacity):
+        self.open_repository = open_repository
+        self.repo_objs = repo_objs
+        self.threads = threads
+        self.capacity = capacity
+        self.executor = None
+        self.futures = OrderedDict()  # chunk id -> Future, oldest first
+        self.local = threading.local()
+        self.repositories = []
+        self.lock = threading.Lock()
+
+    def _fetch(self, id):
+        repository = getattr(self.local, "repository", None)
+        if repository is None:
+            repository = self.local.repository = self.open_repository()
+            with self.lock:
+                self.repositories.append(repository)
+        _, data = self.repo_objs.parse(id, repository.get(id), ro_type=ROBJ_FILE_STREAM)
+        return data
+
+    def _start(self, id):
+        if self.executor is None:
+            # created lazily, so there are no threads yet when the mount process daemonizes (forks).
+            self.executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="borg-mount-fetch")
+        return self.executor.submit(self._fetch, id)
+
+    def prefetch(self, ids):
+        """Start fetching the chunks *ids* (unless already in progress)."""
+        for id in ids:
+            if id not in self.futures:
+                while len(self.futures) >= self.capacity:
+                    _, future = self.futures.popitem(last=False)
+                    future.cancel()
+                self.futures[id] = self._start(id)
+
+    def take(self, id):
+        """Return (and forget) the future of chunk *id*, start fetching it if it is not in progress."""
+        future = self.futures.pop(id, None)
+        return future if future is not None else self._start(id)
+
+    def close(self):
+        for future in self.futures.values():
+            future.cancel()
+        self.futures.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        for repository in self.repositories:
+            repository.close()
+        self.repositories = []
 
 
 class FuseBackend:
@@ -267,6 +442,12 @@ def __init__(self, manifest, args, decrypted_repository):
         self.default_dir = None
         # Archives to be loaded when first accessed, mapped by their placeholder inode
         self.pending_archives = {}
+        # With lazy_dirs, directories to be loaded when first accessed, mapped by their inode to
+        # (archive item stream chunk IDs, ArchiveDirectoryMap, reference of the directory's record)
+        self.lazy_dirs = False
+        self.pending_dirs = {}
+        # With cache_inodes, the inodes of processed archives are kept in the cache directory (see ArchiveInodes)
+        self.cache_inodes = False
         self.cache = ItemCache(decrypted_repository)
         self.allow_damaged_files = False
         self.versions = False
@@ -276,6 +457,16 @@ def __init__(self, manifest, args, decrypted_repository):
 
     def _create_filesystem(self):
         self._create_dir(parent=1)  # first call, create root dir (inode == 1)
+        if self._args.lazy_dirs:
+            if self.versions or self._args.paths or self._args.patterns or self._args.strip_components:
+                logger.warning("--lazy-dirs can not be used with versions, PATHs, patterns or --strip-components.")
+            else:
+                self.lazy_dirs = True
+        elif self._args.cache_inodes:
+            if self.versions or self._args.paths or self._args.patterns or self._args.strip_components:
+                logger.warning("--cache-inodes can not be used with versions, PATHs, patterns or --strip-components.")
+            else:
+                self.cache_inodes = True
         self.versions_index = FuseVersionsIndex()
         for archive in self._manifest.archives.list_considering(self._args):
             if self.versions:
@@ -301,10 +492,18 @@ def get_item(self, inode):
             return item
 
     def check_pending_archive(self, inode):
-        # Check if this is an archive we need to load
+        # Check if this is an archive (or with lazy_dirs: a directory) we need to load
         archive_name = self.pending_archives.pop(inode, None)
         if archive_name is not None:
-            self._process_archive(archive_name, [os.fsencode(archive_name)])
+            if self.lazy_dirs:
+                archive = Archive(self._manifest, archive_name)
+                self.pending_dirs[inode] = archive.metadata.items, archive.directory_map(), None
+            elif self.cache_inodes:
+                self._load_archive(archive_name, inode)
+            else:
+                self._process_archive(archive_name, [os.fsencode(archive_name)])
+        if inode in self.pending_dirs:
+            self._process_dir(inode)
 
     def _allocate_inode(self):
         self.inode_count += 1
@@ -338,7 +537,9 @@ def _process_archive(self, archive_name, prefix=[]):
         hlm = HardLinkManager(id_type=bytes, info_type=str)  # hlid -> path
 
         filter = build_filter(matcher, strip_components)
-        for item_inode, item in self.cache.iter_archive_items(archive.metadata.items, filter=filter):
+        path_prefixes = matcher.path_prefixes() if self._args.path_index else None
+        spans = archive.path_index().spans(path_prefixes) if path_prefixes is not None else None
+        for item_inode, item in self.cache.iter_archive_items(archive.metadata.items, filter=filter, spans=spans):
             if strip_components:
                 item.path = os.sep.join(item.path.split(os.sep)[strip_components:])
             path = os.fsencode(item.path)
@@ -362,6 +563,106 @@ def _process_archive(self, archive_name, prefix=[]):
         duration = time.perf_counter() - t0
         logger.debug("fuse: _process_archive completed in %.1f s for archive %s", duration, archive.name)
 
+    def _load_archive(self, archive_name, archive_inode):
+        """Like _process_archive, but reuse the archive's inodes kept in the cache directory (see ArchiveInodes)"""
+        archive_id = self._manifest.archives[archive_name].id
+        path = ArchiveInodes.cache_path(self._manifest.repository.id, archive_id)
+        t0 = time.perf_counter()
+        inodes = ArchiveInodes.load(path, archive_id, self.repo_objs)
+        if inodes is not None:
+            self._restore_archive(archive_inode, inodes)
+            duration = time.perf_counter() - t0
+            logger.debug("fuse: _load_archive completed in %.1f s for archive %s", duration, archive_name)
+            return
+        self._save_archive(archive_name, archive_inode, path)
+
+    def _save_archive(self, archive_name, archive_inode, path):
+        """Process the archive, then save the created inodes to *path*, see ArchiveInodes."""
+        inode_count = self.inode_count
+        meta_start, fd_start = self.cache.write_offset, self.cache.fd.seek(0, io.SEEK_END)
+        # _items, parent and contents only get new keys while processing an archive (and dicts keep their
+        # insertion order), so the archive's entries are those after the current ones.
+        items_count, parents_count, contents_count = len(self._items), len(self.parent), len(self.contents)
+        self._process_archive(archive_name, [os.fsencode(archive_name)])
+        synthetic = self.inode_count - inode_count
+
+        def relative(inode):
+            # 0: the archive directory, then the synthetic inodes, then the ItemCache inodes of the archive.
+            if inode == archive_inode:
+                return 0
+            if inode <= self.inode_count:
+                assert inode > inode_count
+                return inode - inode_count
+            return synthetic + 1 + inode - self.cache.offset - meta_start
+
+        meta, direct_items, direct_entries = self.cache.export_entries(meta_start, fd_start)
+        items = [
+            (relative(inode), None if item is self.default_dir else item.as_dict())
+            for inode, item in itertools.islice(self._items.items(), items_count, None)
+        ]
+        parents = []
+        for inode, parent in itertools.islice(self.parent.items(), parents_count, None):
+            parents += relative(inode), relative(parent)
+        contents = [
+            (relative(inode), list(entries), [relative(entry_inode) for entry_inode in entries.values()])
+            for inode, entries in itertools.islice(self.contents.items(), contents_count, None)
+            if inode != archive_inode
+        ]
+        entries = self.contents[archive_inode]
+        contents.append((0, list(entries), [relative(entry_inode) for entry_inode in entries.values()]))
+        inodes = dict(
+            meta=meta,
+            direct_items=direct_items,
+            direct_entries=direct_entries,
+            synthetic=synthetic,
+            items=items,
+            parents=parents,
+            contents=contents,
+        )
+        try:
+            ArchiveInodes.save(path, self._manifest.archives[archive_name].id, inodes, self.repo_objs)
+        except OSError as e:
+            logger.warning(f"Could not save mount inodes cache {path}: {e}")
+
+    def _restore_archive(self, archive_inode, inodes):
+        """Recreate the inodes of an archive saved by _save_archive."""
+        inode_count = self.inode_count
+        synthetic = inodes["synthetic"]
+        self.inode_count += synthetic
+        meta_start = self.cache.import_entries(inodes["meta"], inodes["direct_items"], inodes["direct_entries"])
+        item_inodes = self.cache.offset + meta_start - synthetic - 1
+
+        def absolute(relative):
+            if relative == 0:
+                return archive_inode
+            if relative <= synthetic:
+                return inode_count + relative
+            return item_inodes + relative
+
+        for relative, item in inodes["items"]:
+            self._items[absolute(relative)] = Item(internal_dict=item) if item is not None else self.default_dir
+        parents = inodes["parents"]
+        for i in range(0, len(parents), 2):
+            self.parent[absolute(parents[i])] = absolute(parents[i + 1])
+        for relative, names, entry_inodes in inodes["contents"]:
+            self.contents[absolute(relative)].update(zip(names, map(absolute, entry_inodes)))
+
+    def _process_dir(self, inode):
+        """Create the inodes of the entries of a (lazily loaded) directory, see ArchiveDirectoryMap"""
+        archive_item_ids, dmap, ref = self.pending_dirs.pop(inode)
+        contents = self.contents[inode]
+        # note: hardlinks are not detected here, every hardlink to the same inode gets its own inode.
+        for name, span, dir_ref in dmap.entries(ref if ref is not None else dmap.root):
+            if span is None:
+                # the archive has items below this directory, but no item for it
+                entry_inode = self._create_dir(inode)
+            else:
+                entry_inode = self.cache.add_item(archive_item_ids, span)
+                self.parent[entry_inode] = inode
+            contents[os.fsencode(name)] = entry_inode
+            if dir_ref is not None:
+                self.pending_dirs[entry_inode] = archive_item_ids, dmap, dir_ref
+
     def _process_leaf(self, name, item, parent, prefix, is_dir, item_inode, hlm):
         path = item.path
         del item.path  # save some space
@@ -449,6 +750,24 @@ def __init__(self, manifest, args, decrypted_repository):
         logger.debug("mount data cache capacity: %d chunks", data_cache_capacity)
         self.data_cache = LRUCache(capacity=data_cache_capacity)
         self._last_pos = LRUCache(capacity=FILES)
+        # with read-ahead, sequential reads of a file fetch its next chunks in the background
+        self.read_ahead = args.read_ahead
+        self.fetcher = None
+        if self.read_ahead:
+            threads = min(self.read_ahead, 4)
+            logger.debug("mount read-ahead: %d chunks, %d threads", self.read_ahead, threads)
+            self.fetcher = ChunkFetcher(
+                self._open_repository, self.repo_objs, threads=threads, capacity=self.read_ahead * FILES
+            )
+
+    def _open_repository(self):
+        """Open another (unlocked, read-only used) connection to the repository."""
+        repository = self.repository_uncached
+        if isinstance(repository, RemoteRepository):
+            return RemoteRepository(repository.location, lock=False, args=self._args, read_connection=True)
+        repository = Repository(repository.path, lock=False)
+        repository.open(repository.path, exclusive=False, lock=False)
+        return repository
 
     def sig_info_handler(self, sig_no, stack):
         logger.debug(
@@ -567,6 +886,8 @@ def pop_option(options, key, present, not_present, wanted_type, int_base=0):
             umount = signal is None or (signal == SIGINT and foreground)
         finally:
             llfuse.close(umount)
+            if self.fetcher is not None:
+                self.fetcher.close()
 
     @async_wrapper
     def statfs(self, ctx=None):
@@ -660,20 +981,26 @@ def opendir(self, inode, ctx=None):
         self.check_pending_archive(inode)
         return inode
 
-    @async_wrapper
-    def read(self, fh, offset, size):
-        parts = []
+    def _plan_read(self, fh, offset, size):
+        """
+        Return the chunk pieces to read for a read request as list of (id, offset, n) and the ids of
+        the chunks to read ahead (if the read continues the previous read of this file handle).
+        """
+        pieces = []
         item = self.get_item(fh)
 
         # optimize for linear reads:
-        # we cache the chunk number and the in-file offset of the chunk in _last_pos[fh]
-        chunk_no, chunk_offset = self._last_pos.get(fh, (0, 0))
+        # we cache the chunk number, the in-file offset of the chunk and the end of the last read in _last_pos[fh]
+        chunk_no, chunk_offset, read_end = self._last_pos.get(fh, (0, 0, 0))
+        sequential = offset == read_end
+        read_end = offset + size
         if chunk_offset > offset:
             # this is not a linear read, so we lost track and need to start from beginning again...
             chunk_no, chunk_offset = (0, 0)
 
         offset -= chunk_offset
         chunks = item.chunks
+        next_no = len(chunks)
         # note: using index iteration to avoid frequently copying big (sub)lists by slicing
         for idx in range(chunk_no, len(chunks)):
             id, s = chunks[idx]
@@ -683,27 +1010,85 @@ def read(self, fh, offset, size):
                 chunk_no += 1
                 continue
             n = min(size, s - offset)
-            if id in self.data_cache:
-                data = self.data_cache[id]
-                if offset + n == len(data):
-                    # evict fully read chunk from cache
-                    del self.data_cache[id]
-            else:
-                _, data = self.repo_objs.parse(id, self.repository_uncached.get(id), ro_type=ROBJ_FILE_STREAM)
-                if offset + n < len(data):
-                    # chunk was only partially read, cache it
-                    self.data_cache[id] = data
-            parts.append(data[offset : offset + n])
+            pieces.append((id, offset, n))
             offset = 0
             size -= n
             if not size:
+                next_no = idx + 1
                 if fh in self._last_pos:
-                    self._last_pos.replace(fh, (chunk_no, chunk_offset))
+                    self._last_pos.replace(fh, (chunk_no, chunk_offset, read_end))
                 else:
-                    self._last_pos[fh] = (chunk_no, chunk_offset)
+                    self._last_pos[fh] = (chunk_no, chunk_offset, read_end)
                 break
+        ahead = []
+        if sequential and self.fetcher is not None:
+            for idx in range(next_no, min(next_no + self.read_ahead, len(chunks))):
+                id, _ = chunks[idx]
+                if id not in self.data_cache:
+                    ahead.append(id)
+        return pieces, ahead
+
+    def _read_piece(self, id, data, offset, n):
+        if id in self.data_cache:
+            if offset + n == len(data):
+                # evict fully read chunk from cache
+                del self.data_cache[id]
+        elif offset + n < len(data):
+            # chunk was only partially read, cache it
+            self.data_cache[id] = data
+        return data[offset : offset + n]
+
+    def _fetch_chunk(self, id):
+        _, data = self.repo_objs.parse(id, self.repository_uncached.get(id), ro_type=ROBJ_FILE_STREAM)
+        return data
+
+    def _read(self, fh, offset, size):
+        """
+        Generator doing the work of read, shared by the pyfuse3 and llfuse variants of it.
+
+        It yields the futures of the chunks being fetched and expects their data to be sent back when they are
+        done, so every variant waits for them its own way. Its return value is the data read.
+        """
+        pieces, ahead = self._plan_read(fh, offset, size)
+        parts = []
+        for id, offset, n in pieces:
+            if id in self.data_cache:
+                data = self.data_cache[id]
+            elif self.fetcher is not None:
+                future = self.fetcher.take(id)
+                self.fetcher.prefetch(ahead)
+                data = yield future
+            else:
+                data = self._fetch_chunk(id)
+            parts.append(self._read_piece(id, data, offset, n))
+        if ahead:
+            self.fetcher.prefetch(ahead)
         return b"".join(parts)
 
+    # note: with pyfuse3 and read-ahead, a read waits for its chunks outside of the event loop,
+    #       so other requests are served concurrently.
+    if has_pyfuse3:
+
+        async def read(self, fh, offset, size):  # type: ignore[misc]
+            reading = self._read(fh, offset, size)
+            try:
+                future = next(reading)
+                while True:
+                    future = reading.send(await trio.to_thread.run_sync(future.result))
+            except StopIteration as stop:
+                return stop.value
+
+    else:
+
+        def read(self, fh, offset, size):  # type: ignore[misc]
+            reading = self._read(fh, offset, size)
+            try:
+                future = next(reading)
+                while True:
+                    future = reading.send(future.result())
+            except StopIteration as stop:
+                return stop.value
+
     # note: we can't have a generator (with yield) and not a generator (async) in the same method
     if has_pyfuse3:
 
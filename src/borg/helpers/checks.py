@@ -21,9 +21,9 @@ def check_extension_modules():
         raise RTError(msg)
     if chunker.API_VERSION != "1.2_01":
         raise RTError(msg)
-    if compress.API_VERSION != "1.2_02":
+    if compress.API_VERSION != "1.2_03":
         raise RTError(msg)
-    if crypto.low_level.API_VERSION != "1.3_01":
+    if crypto.low_level.API_VERSION != "1.3_02":
         raise RTError(msg)
     if item.API_VERSION != "1.2_01":
         raise RTError(msg)
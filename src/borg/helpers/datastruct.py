@@ -1,3 +1,5 @@
+import threading
+
 from .errors import Error
 
 
@@ -8,9 +10,11 @@ def items(self):
         return sorted(super().items())
 
 
-class Buffer:
+class Buffer(threading.local):
     """
     Provides a managed, resizable buffer.
+
+    Every thread gets its own buffer, so module-level buffers can be used from multiple threads.
     """
 
     class MemoryLimitExceeded(Error, OSError):
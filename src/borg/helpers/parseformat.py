@@ -125,6 +125,14 @@ def positive_int_validator(value):
     return int_value
 
 
+def non_negative_int_validator(value):
+    """argparse type for non-negative integers"""
+    int_value = int(value)
+    if int_value < 0:
+        raise argparse.ArgumentTypeError("A non-negative integer is required: %s" % value)
+    return int_value
+
+
 def interval(s):
     """Convert a string representing a valid interval to a number of hours."""
     multiplier = {"H": 1, "d": 24, "w": 24 * 7, "m": 24 * 31, "y": 24 * 365}
@@ -862,6 +870,37 @@ class ItemFormatter(BaseFormatter):
 
     KEYS_REQUIRING_CACHE = ("dsize", "unique_chunks")
 
+    # the groups of keys computed by get_item_data (json lines always contain all of them)
+    ITEM_DATA_GROUPS = {
+        "path": ("path",),
+        "target": ("target", "extra"),
+        "hlid": ("hlid",),
+        "mode": ("type", "mode"),
+        "owner": ("uid", "gid", "user", "group"),
+        "health": ("health",),
+        "flags": ("flags",),
+    }
+    # the item keys needed to compute the item data groups and the call keys, see item_keys
+    ITEM_KEYS_NEEDED = {
+        "path": ("path",),
+        "target": ("target",),
+        "hlid": ("hlid",),
+        "mode": ("mode",),
+        "owner": ("uid", "gid", "user", "group"),
+        "health": ("chunks_healthy",),
+        "flags": ("bsdflags",),
+        "size": ("size", "mode", "target", "source"),  # items with chunks have a precomputed size
+        "dsize": ("chunks",),
+        "num_chunks": ("chunks",),
+        "unique_chunks": ("chunks",),
+        "mtime": ("mtime",),
+        "ctime": ("ctime", "mtime"),
+        "atime": ("atime", "mtime"),
+        "isomtime": ("mtime",),
+        "isoctime": ("ctime", "mtime"),
+        "isoatime": ("atime", "mtime"),
+    }
+
     @classmethod
     def format_needs_cache(cls, format):
         format_keys = {f[1] for f in Formatter().parse(format)}
@@ -891,36 +930,60 @@ def __init__(self, archive, format):
         for hash_function in self.hash_algorithms:
             self.call_keys[hash_function] = partial(self.hash_item, hash_function)
         self.used_call_keys = set(self.call_keys) & self.format_keys
+        # e.g. {mtime.year} uses the mtime key
+        field_keys = {re.split(r"[.\[]", key, maxsplit=1)[0] for key in self.format_keys if key}
+        self.used_groups = {group for group, keys in self.ITEM_DATA_GROUPS.items() if field_keys.intersection(keys)}
+
+    def item_keys(self, jsonline=False):
+        """
+        Return the item keys needed to format items (see Archive.iter_items).
+
+        Items only having these keys are cheaper to unpack, e.g. the chunk lists are only needed for some keys.
+        """
+        keys = {"path"}  # also needed for matching the items
+        for group in self.ITEM_DATA_GROUPS if jsonline else self.used_groups:
+            keys.update(self.ITEM_KEYS_NEEDED[group])
+        for key in self.used_call_keys:
+            keys.update(self.ITEM_KEYS_NEEDED.get(key, ("chunks",)))  # hash algorithms need the chunks
+        return keys
 
     def get_item_data(self, item, jsonline=False):
         item_data = {}
         item_data.update({} if jsonline else self.static_data)
-
-        item_data.update(text_to_json("path", item.path))
-        target = item.get("target", "")
-        item_data.update(text_to_json("target", target))
-        if not jsonline:
-            item_data["extra"] = "" if not target else f" -> {item_data['target']}"
-
-        hlid = item.get("hlid")
-        hlid = bin_to_hex(hlid) if hlid else ""
-        item_data["hlid"] = hlid
-
-        mode = stat.filemode(item.mode)
-        item_type = mode[0]
-        item_data["type"] = item_type
-        item_data["mode"] = mode
-
-        item_data["uid"] = item.get("uid")  # int or None
-        item_data["gid"] = item.get("gid")  # int or None
-        item_data.update(text_to_json("user", item.get("user", str(item_data["uid"]))))
-        item_data.update(text_to_json("group", item.get("group", str(item_data["gid"]))))
-
-        if jsonline:
-            item_data["healthy"] = "chunks_healthy" not in item
-        else:
-            item_data["health"] = "broken" if "chunks_healthy" in item else "healthy"
-        item_data["flags"] = item.get("bsdflags")  # int if flags known, else (if flags unknown) None
+        groups = self.ITEM_DATA_GROUPS if jsonline else self.used_groups
+
+        if "path" in groups:
+            item_data.update(text_to_json("path", item.path))
+        if "target" in groups:
+            target = item.get("target", "")
+            item_data.update(text_to_json("target", target))
+            if not jsonline:
+                item_data["extra"] = "" if not target else f" -> {item_data['target']}"
+
+        if "hlid" in groups:
+            hlid = item.get("hlid")
+            hlid = bin_to_hex(hlid) if hlid else ""
+            item_data["hlid"] = hlid
+
+        if "mode" in groups:
+            mode = stat.filemode(item.mode)
+            item_type = mode[0]
+            item_data["type"] = item_type
+            item_data["mode"] = mode
+
+        if "owner" in groups:
+            item_data["uid"] = item.get("uid")  # int or None
+            item_data["gid"] = item.get("gid")  # int or None
+            item_data.update(text_to_json("user", item.get("user", str(item_data["uid"]))))
+            item_data.update(text_to_json("group", item.get("group", str(item_data["gid"]))))
+
+        if "health" in groups:
+            if jsonline:
+                item_data["healthy"] = "chunks_healthy" not in item
+            else:
+                item_data["health"] = "broken" if "chunks_healthy" in item else "healthy"
+        if "flags" in groups:
+            item_data["flags"] = item.get("bsdflags")  # int if flags known, else (if flags unknown) None
         for key in self.used_call_keys:
             item_data[key] = self.call_keys[key](item)
         return item_data
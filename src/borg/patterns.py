@@ -130,6 +130,27 @@ def get_unmatched_include_patterns(self):
         """
         return [p for p in self.include_patterns if p.match_count == 0 and not isinstance(p, PathFullPattern)]
 
+    def path_prefixes(self):
+        """
+        Return a list of path prefixes all paths matched by this matcher are equal to or below of,
+        or None if there are no such prefixes (e.g. if an include pattern is not a path).
+
+        Prefixes ending with a path separator are directory prefixes (see PathPrefixPattern),
+        others are full paths (see PathFullPattern).
+        """
+        if self.fallback is not False:
+            return None  # everything not excluded matches
+        prefixes = []
+        for pattern, cmd in self._items:
+            if self.is_include_cmd[cmd]:
+                if not isinstance(pattern, PathPrefixPattern):
+                    return None
+                prefixes.append(pattern.pattern)
+        for path, cmd in self._path_full_patterns.items():
+            if self.is_include_cmd[cmd]:
+                prefixes.append(path)
+        return prefixes
+
     def add_inclexcl(self, patterns):
         """Add list of patterns (of type CmdTuple) to internal list."""
         for pattern, cmd in patterns:
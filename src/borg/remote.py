@@ -15,6 +15,7 @@
 import textwrap
 import time
 import traceback
+from collections import Counter, deque, namedtuple
 from subprocess import Popen, PIPE
 
 import borg.logger
@@ -30,9 +31,11 @@
 from .helpers import safe_unlink
 from .helpers import prepare_subprocess_env, ignore_sigint
 from .helpers import get_socket_filename
-from .locking import LockTimeout, NotLocked, NotMyLock, LockFailed
+from .helpers import get_cache_dir
+from .locking import ExclusiveLock, LockTimeout, NotLocked, NotMyLock, LockFailed
 from .logger import create_logger, borg_serve_log_queue
 from .helpers import msgpack
+from .manifest import Manifest
 from .repository import Repository
 from .version import parse_version, format_version
 from .checksums import xxh64
@@ -45,6 +48,14 @@
 
 MAX_INFLIGHT = 100
 
+# yielded by RemoteRepository.call_many(poll=True) instead of blocking in select, see fetch_many
+SelectFds = namedtuple("SelectFds", "r w x")
+
+# upper limit for the amount of preloaded data kept in RemoteRepository (received, but not consumed yet,
+# plus an estimate for the preload responses still in flight). when reached, no further preload requests
+# are sent to the server until the consumer catches up.
+MAX_PRELOAD_BUFFER = 64 * 1024 * 1024
+
 RATELIMIT_PERIOD = 0.1
 
 
@@ -148,6 +159,7 @@ class RepositoryServer:  # pragma: no cover
         "scan",
         "negotiate",
         "open",
+        "open_session",
         "close",
         "info",
         "put",
@@ -382,6 +394,37 @@ def open(
         self.repository.__enter__()  # clean exit handled by serve() method
         return self.repository.id
 
+    def open_session(
+        self,
+        client_data,
+        path,
+        create=False,
+        lock_wait=None,
+        lock=True,
+        exclusive=None,
+        append_only=False,
+        make_parent_dirs=False,
+    ):
+        """negotiate, open the repository and return all the client needs to get started in one RPC"""
+        session = self.negotiate(client_data)
+        session["id"] = self.open(
+            path,
+            create=create,
+            lock_wait=lock_wait,
+            lock=lock,
+            exclusive=exclusive,
+            append_only=append_only,
+            make_parent_dirs=make_parent_dirs,
+        )
+        session["info"] = self.repository.info()
+        session["key"] = self.repository.load_key()
+        try:
+            session["manifest"] = self.repository.get(Manifest.MANIFEST_ID)
+        except Exception:
+            # e.g. no manifest yet or a damaged one: let the client run into this with a normal get().
+            session["manifest"] = None
+        return session
+
     def close(self):
         if self.repository is not None:
             self.repository.__exit__(None, None, None)
@@ -555,9 +598,18 @@ def __init__(
         append_only=False,
         make_parent_dirs=False,
         args=None,
+        read_connection=False,
     ):
         self.location = self._location = location
-        self.preload_ids = []
+        self.read_connections = []  # additional connections used to get objects in parallel
+        self.preload_ids = deque()  # chunk ids to preload, not requested from the server yet
+        self.preload_queued = Counter()  # chunk id -> number of its occurrences in preload_ids
+        self.preload_msgids = {}  # msgid -> response size (None while still in flight) for preload requests
+        self.preload_inflight = 0
+        self.preload_buffered = 0  # bytes received for preload requests, not consumed yet
+        self.preload_buffer_limit = MAX_PRELOAD_BUFFER
+        self.preload_rx_count = self.preload_rx_bytes = 0
+        self.cancelled_msgids = set()  # responses for these msgids are discarded when they arrive
         self.msgid = 0
         self.rx_bytes = 0
         self.tx_bytes = 0
@@ -574,6 +626,9 @@ def __init__(
         self.unpacker = get_limited_unpacker("client")
         self.server_version = None  # we update this after server sends its version
         self.p = self.sock = None
+        self.object_cache = None
+        self.session_key = None  # key blob received by open_session
+        self.session_manifest = None  # manifest received by open_session, until the repository gets modified
         self._args = args
         if self.location.proto == "ssh":
             testing = location.host == "__testsuite__"
@@ -622,29 +677,52 @@ def __init__(
             os.set_blocking(self.stderr_fd, False)
             assert not os.get_blocking(self.stderr_fd)
 
+        open_args = dict(
+            path=self.location.path,
+            create=create,
+            lock_wait=lock_wait,
+            lock=lock,
+            exclusive=exclusive,
+            append_only=append_only,
+            make_parent_dirs=make_parent_dirs,
+        )
         try:
             try:
-                version = self.call("negotiate", {"client_data": {"client_version": BORG_VERSION}})
+                # newer servers can do negotiate, open, info, load_key and get the manifest in one round trip.
+                session = self.call("open_session", dict(open_args, client_data={"client_version": BORG_VERSION}))
             except ConnectionClosed:
                 raise ConnectionClosedWithHint("Is borg working on the server?") from None
-            if isinstance(version, dict):
-                self.server_version = version["server_version"]
+            except InvalidRPCMethod:
+                session = None  # older server, fall back to separate RPCs.
+            if session is not None:
+                self.server_version = session["server_version"]
+                self.id = session["id"]
+                info = session["info"]
+                self.session_key = session["key"]
+                self.session_manifest = session["manifest"]
             else:
-                raise Exception("Server insisted on using unsupported protocol version %s" % version)
-
-            self.id = self.open(
-                path=self.location.path,
-                create=create,
-                lock_wait=lock_wait,
-                lock=lock,
-                exclusive=exclusive,
-                append_only=append_only,
-                make_parent_dirs=make_parent_dirs,
-            )
-            info = self.info()
+                version = self.call("negotiate", {"client_data": {"client_version": BORG_VERSION}})
+                if isinstance(version, dict):
+                    self.server_version = version["server_version"]
+                else:
+                    raise Exception("Server insisted on using unsupported protocol version %s" % version)
+                self.id = self.open(**open_args)
+                info = self.info()
             self.version = info["version"]
             self.append_only = info["append_only"]
 
+            if not read_connection:
+                object_cache_size = getattr(args, "object_cache", 0)
+                self.object_cache = PersistentObjectCache(self.id, object_cache_size) if object_cache_size else None
+                connections = getattr(args, "remote_connections", 1)
+                if connections > 1 and not create:
+                    # the server side repositories are not locked, they rely on the lock held by this connection.
+                    # they are only used for reading and get closed as soon as we modify the repository.
+                    for _ in range(connections - 1):
+                        self.read_connections.append(
+                            RemoteRepository(location, lock=False, args=args, read_connection=True)
+                        )
+
         except Exception:
             self.close()
             raise
@@ -742,12 +820,28 @@ def ssh_cmd(self, location):
         return args
 
     def call(self, cmd, args, **kw):
+        if cmd == "load_key" and self.session_key is not None:
+            return self.session_key  # received by open_session, no need for another round trip.
         for resp in self.call_many(cmd, [args], **kw):
             return resp
 
-    def call_many(self, cmd, calls, wait=True, is_preloaded=False, async_wait=True):
+    def call_many(self, cmd, calls, wait=True, is_preloaded=False, async_wait=True, poll=False):
+        """
+        Yield the results of the *calls* of *cmd*.
+
+        With *poll*, a SelectFds tuple of the fds to wait for is yielded instead of blocking in select, so the
+        caller can wait for several connections at once and then continue the generator.
+        """
         if not calls and cmd != "async_responses":
             return
+        if cmd in ("put", "delete", "commit", "rollback", "destroy") or (
+            cmd == "check" and any(call.get("repair") for call in calls)
+        ):
+            self.session_manifest = None  # may be outdated now
+            if self.read_connections:
+                self.close_read_connections()  # they would not see our modifications
+        elif cmd == "save_key":
+            self.session_key = None
 
         def send_buffer():
             if self.to_send:
@@ -762,11 +856,13 @@ def send_buffer():
                     if e.errno not in [errno.EAGAIN, errno.EWOULDBLOCK]:
                         raise
 
-        def pop_preload_msgid(chunkid):
-            msgid = self.chunkid_to_msgids[chunkid].pop(0)
-            if not self.chunkid_to_msgids[chunkid]:
-                del self.chunkid_to_msgids[chunkid]
-            return msgid
+        def preloading():
+            return bool(self.preload_ids) and self.may_preload()
+
+        def send(cmd, args):
+            self.msgid += 1
+            self.to_send.push_back(msgpack.packb({MSGID: self.msgid, MSG: cmd, ARGS: args}))
+            return self.msgid
 
         def handle_error(unpacked):
             if "exception_class" not in unpacked:
@@ -812,127 +908,159 @@ def handle_error(unpacked):
         waiting_for = []
         maximum_to_send = 0 if wait else self.upload_buffer_size_limit
         send_buffer()  # Try to send data, as some cases (async_response) will never try to send data otherwise.
-        while wait or calls:
-            if self.shutdown_time and time.monotonic() > self.shutdown_time:
-                # we are shutting this RemoteRepository down already, make sure we do not waste
-                # a lot of time in case a lot of async stuff is coming in or remote is gone or slow.
-                logger.debug(
-                    "shutdown_time reached, shutting down with %d waiting_for and %d async_responses.",
-                    len(waiting_for),
-                    len(self.async_responses),
-                )
-                return
-            while waiting_for:
-                try:
-                    unpacked = self.responses.pop(waiting_for[0])
-                    waiting_for.pop(0)
-                    handle_error(unpacked)
-                    yield unpacked[RESULT]
-                    if not waiting_for and not calls:
-                        return
-                except KeyError:
-                    break
-            if cmd == "async_responses":
-                while True:
+        try:
+            while wait or calls:
+                if self.shutdown_time and time.monotonic() > self.shutdown_time:
+                    # we are shutting this RemoteRepository down already, make sure we do not waste
+                    # a lot of time in case a lot of async stuff is coming in or remote is gone or slow.
+                    logger.debug(
+                        "shutdown_time reached, shutting down with %d waiting_for and %d async_responses.",
+                        len(waiting_for),
+                        len(self.async_responses),
+                    )
+                    return
+                while waiting_for:
                     try:
-                        msgid, unpacked = self.async_responses.popitem()
-                    except KeyError:
-                        # there is nothing left what we already have received
-                        if async_wait and self.ignore_responses:
-                            # but do not return if we shall wait and there is something left to wait for:
-                            break
-                        else:
-                            return
-                    else:
+                        unpacked = self.responses.pop(waiting_for[0])
+                        msgid = waiting_for.pop(0)
+                        if msgid in self.preload_msgids:
+                            self.preload_buffered -= self.preload_msgids.pop(msgid)
                         handle_error(unpacked)
                         yield unpacked[RESULT]
-            if self.to_send or ((calls or self.preload_ids) and len(waiting_for) < MAX_INFLIGHT):
-                w_fds = [self.stdin_fd]
-            else:
-                w_fds = []
-            r, w, x = select.select(self.r_fds, w_fds, self.x_fds, 1)
-            if x:
-                raise Exception("FD exception occurred")
-            for fd in r:
-                if fd is self.stdout_fd:
-                    data = os.read(fd, BUFSIZE)
-                    if not data:
-                        raise ConnectionClosed()
-                    self.rx_bytes += len(data)
-                    self.unpacker.feed(data)
-                    for unpacked in self.unpacker:
-                        if not isinstance(unpacked, dict):
-                            raise UnexpectedRPCDataFormatFromServer(data)
-
-                        lr_dict = unpacked.get(LOG)
-                        if lr_dict is not None:
-                            # Re-emit remote log messages locally.
-                            _logger = logging.getLogger(lr_dict["name"])
-                            if _logger.isEnabledFor(lr_dict["level"]):
-                                _logger.handle(logging.LogRecord(**lr_dict))
-                            continue
-
-                        msgid = unpacked[MSGID]
-                        if msgid in self.ignore_responses:
-                            self.ignore_responses.remove(msgid)
-                            # async methods never return values, but may raise exceptions.
-                            if "exception_class" in unpacked:
-                                self.async_responses[msgid] = unpacked
+                        if not waiting_for and not calls:
+                            return
+                    except KeyError:
+                        break
+                if cmd == "async_responses":
+                    while True:
+                        try:
+                            msgid, unpacked = self.async_responses.popitem()
+                        except KeyError:
+                            # there is nothing left what we already have received
+                            if async_wait and self.ignore_responses:
+                                # but do not return if we shall wait and there is something left to wait for:
+                                break
                             else:
-                                # we currently do not have async result values except "None",
-                                # so we do not add them into async_responses.
-                                if unpacked[RESULT] is not None:
-                                    self.async_responses[msgid] = unpacked
+                                return
                         else:
-                            self.responses[msgid] = unpacked
-                elif fd is self.stderr_fd:
-                    data = os.read(fd, 32768)
-                    if not data:
-                        raise ConnectionClosed()
-                    self.rx_bytes += len(data)
-                    # deal with incomplete lines (may appear due to block buffering)
-                    if self.stderr_received:
-                        data = self.stderr_received + data
-                        self.stderr_received = b""
-                    lines = data.splitlines(keepends=True)
-                    if lines and not lines[-1].endswith((b"\r", b"\n")):
-                        self.stderr_received = lines.pop()
-                    # now we have complete lines in <lines> and any partial line in self.stderr_received.
-                    _logger = logging.getLogger()
-                    for line in lines:
-                        # borg serve (remote/server side) should not emit stuff on stderr,
-                        # but e.g. the ssh process (local/client side) might output errors there.
-                        assert line.endswith((b"\r", b"\n"))
-                        # something came in on stderr, log it to not lose it.
-                        # decode late, avoid partial utf-8 sequences.
-                        _logger.warning("stderr: " + line.decode().strip())
-            if w:
-                while (
-                    (len(self.to_send) <= maximum_to_send)
-                    and (calls or self.preload_ids)
-                    and len(waiting_for) < MAX_INFLIGHT
-                ):
-                    if calls:
-                        if is_preloaded:
-                            assert cmd == "get", "is_preload is only supported for 'get'"
-                            if calls[0]["id"] in self.chunkid_to_msgids:
-                                waiting_for.append(pop_preload_msgid(calls.pop(0)["id"]))
-                        else:
-                            args = calls.pop(0)
-                            if cmd == "get" and args["id"] in self.chunkid_to_msgids:
-                                waiting_for.append(pop_preload_msgid(args["id"]))
+                            handle_error(unpacked)
+                            yield unpacked[RESULT]
+                if self.to_send or ((calls or preloading()) and len(waiting_for) < MAX_INFLIGHT):
+                    w_fds = [self.stdin_fd]
+                else:
+                    w_fds = []
+                r, w, x = select.select(self.r_fds, w_fds, self.x_fds, 0 if poll else 1)
+                if poll and not (r or w or x):
+                    yield SelectFds(self.r_fds, w_fds, self.x_fds)
+                    continue
+                if x:
+                    raise Exception("FD exception occurred")
+                for fd in r:
+                    if fd is self.stdout_fd:
+                        data = os.read(fd, BUFSIZE)
+                        if not data:
+                            raise ConnectionClosed()
+                        self.rx_bytes += len(data)
+                        self.unpacker.feed(data)
+                        for unpacked in self.unpacker:
+                            if not isinstance(unpacked, dict):
+                                raise UnexpectedRPCDataFormatFromServer(data)
+
+                            lr_dict = unpacked.get(LOG)
+                            if lr_dict is not None:
+                                # Re-emit remote log messages locally.
+                                _logger = logging.getLogger(lr_dict["name"])
+                                if _logger.isEnabledFor(lr_dict["level"]):
+                                    _logger.handle(logging.LogRecord(**lr_dict))
+                                continue
+
+                            msgid = unpacked[MSGID]
+                            if msgid in self.preload_msgids:
+                                self.preload_inflight -= 1
+                            if msgid in self.cancelled_msgids:
+                                # nobody is interested in this response any more.
+                                self.cancelled_msgids.remove(msgid)
+                                self.preload_msgids.pop(msgid, None)
+                                continue
+                            if msgid in self.ignore_responses:
+                                self.ignore_responses.remove(msgid)
+                                # async methods never return values, but may raise exceptions.
+                                if "exception_class" in unpacked:
+                                    self.async_responses[msgid] = unpacked
+                                else:
+                                    # we currently do not have async result values except "None",
+                                    # so we do not add them into async_responses.
+                                    if unpacked[RESULT] is not None:
+                                        self.async_responses[msgid] = unpacked
                             else:
-                                self.msgid += 1
-                                waiting_for.append(self.msgid)
-                                self.to_send.push_back(msgpack.packb({MSGID: self.msgid, MSG: cmd, ARGS: args}))
-                    if not self.to_send and self.preload_ids:
-                        chunk_id = self.preload_ids.pop(0)
-                        args = {"id": chunk_id}
-                        self.msgid += 1
-                        self.chunkid_to_msgids.setdefault(chunk_id, []).append(self.msgid)
-                        self.to_send.push_back(msgpack.packb({MSGID: self.msgid, MSG: "get", ARGS: args}))
-
-                send_buffer()
+                                if msgid in self.preload_msgids:
+                                    size = len(unpacked.get(RESULT) or b"")
+                                    self.preload_msgids[msgid] = size
+                                    self.preload_buffered += size
+                                    self.preload_rx_count += 1
+                                    self.preload_rx_bytes += size
+                                self.responses[msgid] = unpacked
+                    elif fd is self.stderr_fd:
+                        data = os.read(fd, 32768)
+                        if not data:
+                            raise ConnectionClosed()
+                        self.rx_bytes += len(data)
+                        # deal with incomplete lines (may appear due to block buffering)
+                        if self.stderr_received:
+                            data = self.stderr_received + data
+                            self.stderr_received = b""
+                        lines = data.splitlines(keepends=True)
+                        if lines and not lines[-1].endswith((b"\r", b"\n")):
+                            self.stderr_received = lines.pop()
+                        # now we have complete lines in <lines> and any partial line in self.stderr_received.
+                        _logger = logging.getLogger()
+                        for line in lines:
+                            # borg serve (remote/server side) should not emit stuff on stderr,
+                            # but e.g. the ssh process (local/client side) might output errors there.
+                            assert line.endswith((b"\r", b"\n"))
+                            # something came in on stderr, log it to not lose it.
+                            # decode late, avoid partial utf-8 sequences.
+                            _logger.warning("stderr: " + line.decode().strip())
+                if w:
+                    while (
+                        (len(self.to_send) <= maximum_to_send)
+                        and (calls or preloading())
+                        and len(waiting_for) < MAX_INFLIGHT
+                    ):
+                        if calls:
+                            if is_preloaded:
+                                assert cmd == "get", "is_preload is only supported for 'get'"
+                                id = calls[0]["id"]
+                                if id in self.chunkid_to_msgids:
+                                    waiting_for.append(self.pop_preload_msgid(calls.pop(0)["id"]))
+                                else:
+                                    # not requested from the server yet: the preload is still queued (throttled)
+                                    # or it was cancelled. the caller waits for it, so request it right now.
+                                    if self.preload_queued[id]:
+                                        self.unqueue_preload(id)
+                                    waiting_for.append(send(cmd, calls.pop(0)))
+                            else:
+                                args = calls.pop(0)
+                                if cmd == "get" and args["id"] in self.chunkid_to_msgids:
+                                    waiting_for.append(self.pop_preload_msgid(args["id"]))
+                                else:
+                                    waiting_for.append(send(cmd, args))
+                        if not self.to_send and preloading():
+                            chunk_id = self.preload_ids[0]
+                            self.unqueue_preload(chunk_id)
+                            msgid = send("get", {"id": chunk_id})
+                            self.chunkid_to_msgids.setdefault(chunk_id, []).append(msgid)
+                            self.preload_msgids[msgid] = None
+                            self.preload_inflight += 1
+
+                    send_buffer()
+        except BaseException:
+            # the caller is not interested in the remaining results (it closed the generator early or we raise),
+            # make sure their responses do not accumulate in self.responses.
+            self.discard_responses(waiting_for)
+            if is_preloaded:
+                self.cancel_preload([args["id"] for args in calls])
+            raise
         self.ignore_responses |= set(waiting_for)  # we lose order here
 
     @api(
@@ -994,11 +1122,94 @@ def flags_many(self, ids, mask=0xFFFFFFFF, value=None):
         """actual remoting is done via self.call in the @api decorator"""
 
     def get(self, id, read_data=True):
+        if id == Manifest.MANIFEST_ID and read_data and self.session_manifest is not None:
+            # received by open_session, no need for another round trip.
+            data, self.session_manifest = self.session_manifest, None
+            return data
         for resp in self.get_many([id], read_data=read_data):
             return resp
 
     def get_many(self, ids, read_data=True, is_preloaded=False):
-        yield from self.call_many("get", [{"id": id, "read_data": read_data} for id in ids], is_preloaded=is_preloaded)
+        if self.object_cache is None or not read_data:
+            yield from self.fetch_many(ids, read_data=read_data, is_preloaded=is_preloaded)
+            return
+        ids = list(ids)
+        cached = {id for id in ids if id in self.object_cache}
+        responses = self.fetch_many([id for id in ids if id not in cached], is_preloaded=is_preloaded)
+        for id in ids:
+            if id in cached:
+                data = self.object_cache.get(id)
+                if data is None:
+                    # evicted or corrupted meanwhile, e.g. by another borg process using the same cache.
+                    data = self.call("get", {"id": id})
+                    self.object_cache.put(id, data)
+            else:
+                data = next(responses)
+                self.object_cache.put(id, data)
+            yield data
+
+    def fetch_many(self, ids, read_data=True, is_preloaded=False):
+        """Get objects from the server(s), distributed over all connections, yielding them in order of *ids*."""
+        if not self.read_connections:
+            yield from self.call_many(
+                "get", [{"id": id, "read_data": read_data} for id in ids], is_preloaded=is_preloaded
+            )
+            return
+        ids = list(ids)
+        connections = self.connections
+        conn_ids = [[] for _ in connections]
+        for id in ids:
+            conn_ids[self.connection_index(id)].append(id)
+        # each connection pipelines the requests for its share of the ids, all connections are driven
+        # from this loop (waiting for all of them in one select), so the servers work in parallel.
+        calls = [
+            conn.call_many(
+                "get", [{"id": id, "read_data": read_data} for id in c_ids], is_preloaded=is_preloaded, poll=True
+            )
+            for conn, c_ids in zip(connections, conn_ids)
+        ]
+        pending = [len(c_ids) for c_ids in conn_ids]  # results not received yet
+        results = [deque() for _ in connections]  # results received, not yielded yet
+        try:
+            for id in ids:
+                index = self.connection_index(id)
+                while not results[index]:
+                    waiting = []
+                    for i, conn_calls in enumerate(calls):
+                        # do not buffer too many results of connections ahead of the others.
+                        while pending[i] and len(results[i]) < MAX_INFLIGHT:
+                            result = next(conn_calls)
+                            if isinstance(result, SelectFds):
+                                waiting.append(result)
+                                break
+                            results[i].append(result)
+                            pending[i] -= 1
+                    if not results[index]:
+                        select.select(
+                            [fd for fds in waiting for fd in fds.r],
+                            [fd for fds in waiting for fd in fds.w],
+                            [fd for fds in waiting for fd in fds.x],
+                            1,
+                        )
+                yield results[index].popleft()
+        finally:
+            for conn_calls in calls:
+                conn_calls.close()
+
+    @property
+    def connections(self):
+        return [self] + self.read_connections
+
+    def connection_index(self, id):
+        """Return the index of the connection used for getting (and preloading) *id*."""
+        # ids are (keyed) hashes, so this distributes them evenly. the same id always uses the same
+        # connection, so preloading and getting the preloaded objects happen on the same connection.
+        return id[0] % (1 + len(self.read_connections))
+
+    def close_read_connections(self):
+        read_connections, self.read_connections = self.read_connections, []
+        for conn in read_connections:
+            conn.close()
 
     @api(since=parse_version("1.0.0"))
     def put(self, id, data, wait=True):
@@ -1021,6 +1232,10 @@ def break_lock(self):
         """actual remoting is done via self.call in the @api decorator"""
 
     def close(self):
+        self.close_read_connections()
+        if self.object_cache is not None:
+            self.object_cache.close()
+            self.object_cache = None
         if self.p or self.sock:
             self.call("close", {}, wait=True)
         if self.p:
@@ -1042,7 +1257,98 @@ def async_response(self, wait=True):
             return resp
 
     def preload(self, ids):
-        self.preload_ids += ids
+        if self.object_cache is not None:
+            ids = [id for id in ids if id not in self.object_cache]
+        if self.read_connections:
+            connections = self.connections
+            for id in ids:
+                connection = connections[self.connection_index(id)]
+                connection.preload_ids.append(id)
+                connection.preload_queued[id] += 1
+        else:
+            self.preload_ids.extend(ids)
+            self.preload_queued.update(ids)
+
+    def unqueue_preload(self, chunkid):
+        """Remove (the first occurrence of) *chunkid* from the preload queue."""
+        if self.preload_ids[0] == chunkid:
+            self.preload_ids.popleft()  # the usual case, chunks are requested in preload order
+        else:
+            self.preload_ids.remove(chunkid)
+        self.preload_queued[chunkid] -= 1
+        if not self.preload_queued[chunkid]:
+            del self.preload_queued[chunkid]
+
+    def may_preload(self):
+        """Return whether sending more preload requests stays within the preload buffer limit."""
+        if self.preload_inflight >= MAX_INFLIGHT:
+            return False
+        if self.preload_rx_count:
+            avg_size = self.preload_rx_bytes // self.preload_rx_count
+        else:
+            avg_size = 2**HASH_MASK_BITS  # no response received yet, assume the statistical chunk size.
+        return self.preload_buffered + self.preload_inflight * avg_size < self.preload_buffer_limit
+
+    def pop_preload_msgid(self, chunkid):
+        msgid = self.chunkid_to_msgids[chunkid].pop(0)
+        if not self.chunkid_to_msgids[chunkid]:
+            del self.chunkid_to_msgids[chunkid]
+        return msgid
+
+    def discard_responses(self, msgids):
+        """Discard the responses for *msgids*, no matter whether they were already received or not."""
+        for msgid in msgids:
+            if msgid in self.responses:
+                del self.responses[msgid]
+                if msgid in self.preload_msgids:
+                    self.preload_buffered -= self.preload_msgids.pop(msgid)
+            else:
+                self.cancelled_msgids.add(msgid)
+
+    def cancel_preload(self, ids=None):
+        """Cancel preloading of *ids* (one preload per occurrence), or of everything if *ids* is None.
+
+        Chunks not requested yet are removed from the preload queue, preloaded data already received
+        is dropped and responses still in flight will be dropped when they arrive.
+        Cancelling ids which are not (or no longer) preloaded is a no-op.
+        """
+        if self.read_connections:
+            connections = self.connections
+            if ids is None:
+                conn_ids = [None] * len(connections)
+            else:
+                conn_ids = [[] for _ in connections]
+                for id in ids:
+                    conn_ids[self.connection_index(id)].append(id)
+            for conn, c_ids in zip(connections, conn_ids):
+                conn._cancel_preload(c_ids)
+        else:
+            self._cancel_preload(ids)
+
+    def _cancel_preload(self, ids):
+        if ids is None:
+            msgids = [msgid for msgids in self.chunkid_to_msgids.values() for msgid in msgids]
+            self.chunkid_to_msgids.clear()
+            self.preload_ids.clear()
+            self.preload_queued.clear()
+        else:
+            msgids = []
+            unsent = Counter()
+            for id in ids:
+                if id in self.chunkid_to_msgids:
+                    msgids.append(self.pop_preload_msgid(id))
+                else:
+                    unsent[id] += 1
+            if unsent and self.preload_ids:
+                preload_ids = deque()
+                for id in self.preload_ids:
+                    if unsent[id]:
+                        unsent[id] -= 1
+                    else:
+                        preload_ids.append(id)
+                self.preload_ids = preload_ids
+                self.preload_queued = Counter(preload_ids)
+        self.discard_responses(msgids)
 
 
 class RepositoryNoCache:
@@ -1208,6 +1514,189 @@ def get_many(self, keys, read_data=True, cache=True):
             pass
 
 
+class PersistentObjectCache:
+    """
+    A persistent, size-bounded local cache for objects read from a remote repository.
+
+    Objects are stored as they come from the repository (encrypted), one file per object id
+    below <cache dir>/objects/<repository id>/, prefixed with a xxh64 checksum to detect
+    local corruption. When the cache grows beyond *size_limit* bytes, the least recently used
+    objects are evicted (a cache hit updates the file's mtime).
+
+    Multiple borg processes may use the same cache concurrently: objects are written to a
+    temporary file which is then atomically renamed, vanished or corrupted files are treated
+    as a cache miss, and eviction is serialized by a lock.
+
+    The cache size is not determined when opening the cache, but read from a small file: eviction
+    (which scans the whole cache anyway) stores the real size there and every process adds the
+    size of the objects it added when closing the cache. So the size is an estimate, that gets
+    corrected by the next eviction.
+
+    The manifest is never cached, all other objects are immutable for a given id.
+    """
+
+    checksum_size = 8  # xxh64
+
+    def __init__(self, repository_id, size_limit, path=None):
+        self.path = path or os.path.join(get_cache_dir(), "objects", bin_to_hex(repository_id))
+        self.size_path = os.path.join(self.path, "size")
+        self.size_limit = size_limit
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, exist_ok=True)
+            self.write_size(0)
+        self.size = self.read_size()  # None: unknown, gets determined by the next eviction
+        self.added = 0  # size of the objects added by this process, not yet added to the stored size
+        # Instrumentation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.corruptions = 0
+
+    def key_filename(self, key):
+        hex_key = bin_to_hex(key)
+        return os.path.join(self.path, hex_key[:2], hex_key)
+
+    def cacheable(self, key):
+        return key != Manifest.MANIFEST_ID  # the only object which gets modified.
+
+    def __contains__(self, key):
+        return self.cacheable(key) and os.path.exists(self.key_filename(key))
+
+    def get(self, key):
+        """Return the cached object for *key* or None (cache miss)."""
+        file = self.key_filename(key)
+        try:
+            with open(file, "rb") as fd:
+                data = fd.read()
+            os.utime(file)  # mark as recently used
+        except FileNotFoundError:
+            return None
+        data = memoryview(data)
+        if xxh64(data[self.checksum_size :]) != data[: self.checksum_size]:
+            self.corruptions += 1
+            self.remove(file)
+            return None
+        self.hits += 1
+        return bytes(data[self.checksum_size :])
+
+    def put(self, key, data):
+        """Add the object *data* fetched from the repository (after a cache miss)."""
+        if not self.cacheable(key):
+            return
+        self.misses += 1
+        file = self.key_filename(key)
+        dir = os.path.dirname(file)
+        os.makedirs(dir, exist_ok=True)
+        # no need to fsync, we detect corrupted entries when reading them.
+        fd, tmp_file = tempfile.mkstemp(prefix=os.path.basename(file) + "-", suffix=".tmp", dir=dir)
+        try:
+            with open(fd, "wb") as f:
+                f.write(xxh64(data))
+                f.write(data)
+            os.replace(tmp_file, file)
+        except OSError as os_error:
+            safe_unlink(tmp_file)
+            if os_error.errno == errno.ENOSPC:
+                self.evict()
+                return
+            raise
+        if self.size is None:
+            self.evict()  # determines the cache size
+            return
+        self.size += self.checksum_size + len(data)
+        self.added += self.checksum_size + len(data)
+        if self.size > self.size_limit:
+            self.evict()
+
+    def read_size(self):
+        try:
+            with open(self.size_path) as fd:
+                return int(fd.read())
+        except (OSError, ValueError):
+            return None
+
+    def write_size(self, size):
+        # only called while holding the lock (or for a new cache), so a fixed temporary file name is fine.
+        with open(self.size_path + ".tmp", "w") as fd:
+            fd.write(str(size))
+        os.replace(self.size_path + ".tmp", self.size_path)
+
+    def scan(self):
+        """Yield (mtime_ns, size, path) of all cached objects."""
+        for dir_entry in os.scandir(self.path):
+            if len(dir_entry.name) != 2 or not dir_entry.is_dir():
+                continue  # not one of the key_filename directories, e.g. the lock
+            for entry in os.scandir(dir_entry.path):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue  # evicted by another process
+                if entry.name.endswith(".tmp"):
+                    if st.st_mtime < time.time() - 3600:
+                        self.remove(entry.path)  # left over by a crashed borg process
+                    continue
+                yield st.st_mtime_ns, st.st_size, entry.path
+
+    def remove(self, file):
+        try:
+            safe_unlink(file)
+        except FileNotFoundError:
+            pass  # removed by another borg process
+
+    def evict(self):
+        """Evict least recently used objects until the cache size is below 90% of the size limit."""
+        try:
+            lock = ExclusiveLock(os.path.join(self.path, "lock"), timeout=0).acquire()
+        except LockTimeout:
+            return  # some other borg process is evicting objects right now
+        try:
+            entries = sorted(self.scan())
+            size = sum(size for _, size, _ in entries)
+            target_size = int(0.9 * self.size_limit)
+            for _, entry_size, path in entries:
+                if size <= target_size:
+                    break
+                self.remove(path)
+                size -= entry_size
+                self.evictions += 1
+            self.write_size(size)
+            self.size = size
+            self.added = 0
+        finally:
+            lock.release()
+
+    def store_added_size(self):
+        """Add the size of the objects added by this process to the stored cache size."""
+        if not self.added:
+            return
+        try:
+            lock = ExclusiveLock(os.path.join(self.path, "lock"), timeout=1).acquire()
+        except LockTimeout:
+            return  # the next eviction will correct the stored size
+        try:
+            size = self.read_size()
+            if size is not None:
+                self.write_size(size + self.added)
+            self.added = 0
+        finally:
+            lock.release()
+
+    def log_instrumentation(self):
+        logger.debug(
+            "PersistentObjectCache: size %s / %s, %d hits, %d misses, %d evictions, %d corrupted",
+            "unknown" if self.size is None else format_file_size(self.size),
+            format_file_size(self.size_limit),
+            self.hits,
+            self.misses,
+            self.evictions,
+            self.corruptions,
+        )
+
+    def close(self):
+        self.store_added_size()
+        self.log_instrumentation()
+
+
 def cache_if_remote(repository, *, decrypted_cache=False, pack=None, unpack=None, transform=None, force_cache=False):
     """
     Return a Repository(No)Cache for *repository*.
@@ -1249,6 +1249,8 @@ def scan(self, limit=None, state=None):
 
         state can either be None (initially, when starting to scan) or the object
         returned from a previous scan call (meaning "continue scanning").
+        The state is (segment, offset, end_segment): the location of the last returned object and the last
+        segment to scan. (start_segment, 0, end_segment) scans only the segments start_segment..end_segment.
 
         returns: list of chunk ids, state
 
@@ -1297,6 +1299,20 @@ def scan(self, limit=None, state=None):
                             return ids, (segment, offset, end_segment)
         return ids, (segment, offset, end_segment)
 
+    def physical_order(self, ids):
+        """
+        return <ids> sorted by the on-disk location (segment, offset) of the objects, so that a client
+        fetching them in this order does (mostly) linear reads. IDs not in the repository are sorted to the end.
+        """
+        if not self.index:
+            self.index = self.open_index(self.get_transaction_id())
+
+        def location(id):
+            in_index = self.index.get(id)
+            return (0, in_index.segment, in_index.offset) if in_index is not None else (1, 0, 0)
+
+        return sorted(ids, key=location)
+
     def flags(self, id, mask=0xFFFFFFFF, value=None):
         """
         query and optionally set flags
@@ -1396,6 +1412,9 @@ def async_response(self, wait=True):
     def preload(self, ids):
         """Preload objects (only applies to remote repositories)"""
 
+    def cancel_preload(self, ids=None):
+        """Cancel preloading objects (only applies to remote repositories)"""
+
 
 class LoggedIO:
     class SegmentFull(Exception):
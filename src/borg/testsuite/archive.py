@@ -1,5 +1,6 @@
 import json
 import os
+import sys
 from collections import OrderedDict
 from datetime import datetime, timezone
 from io import StringIO
@@ -11,10 +12,14 @@
 from ..crypto.key import PlaintextKey
 from ..archive import Archive, CacheChunkBuffer, RobustUnpacker, valid_msgpacked_dict, ITEM_KEYS, Statistics
 from ..archive import BackupOSError, backup_io, backup_io_iter, get_item_uid_gid
+from ..archive import ArchiveDirectoryMap, ArchivePathIndex, ChunkReuseCache, DownloadPipeline, RestoredFiles
+from ..archive import ChunkTransfer, VerifiedSegments
 from ..helpers import msgpack
+from ..cache import ChunkListEntry
 from ..item import Item, ArchiveItem
 from ..manifest import Manifest
 from ..platform import uid2user, gid2group, is_win32
+from ..repoobj import RepoObj
 
 
 @pytest.fixture()
@@ -171,6 +176,147 @@ def test_partial_cache_chunk_buffer():
     assert data == [Item(internal_dict=d) for d in unpacker]
 
 
+class MockPipeline(DownloadPipeline):
+    def __init__(self, chunks):
+        super().__init__(repository=None, repo_objs=None)
+        self.chunks = chunks
+
+    def fetch_many(self, ids, is_preloaded=False, ro_type=None):
+        for id in ids:
+            yield self.chunks[id]
+
+
+def test_archive_path_index(tmp_path):
+    paths = ["a", "a/b", "a/b/c", "a/bc", "a-b", "a/b/d", "b", "b/a", "c/" + "x" * 300, "c/y", "ab"]
+    stream = b"".join(msgpack.packb({"path": path}) for path in paths)
+    # metadata chunks are not aligned with the items
+    ids = [bytes([i]) for i in range(0, len(stream) // 100 + 1)]
+    pipeline = MockPipeline({id: stream[i * 100 : (i + 1) * 100] for i, id in enumerate(ids)})
+    locations = []
+    assert [item.path for item in pipeline.unpack_many(ids, locations=locations)] == paths
+    index = ArchivePathIndex.from_locations(b"archive id", locations, len(ids))
+    repo_objs = RepoObj(PlaintextKey(None))
+    index.save(tmp_path / "index", repo_objs)
+    index = ArchivePathIndex.load(tmp_path / "index", b"archive id", repo_objs)
+    assert ArchivePathIndex.load(tmp_path / "index", b"other archive", repo_objs) is None
+    for prefixes, expected in [
+        (["a/"], ["a", "a/b", "a/b/c", "a/bc", "a/b/d"]),
+        (["a/b/"], ["a/b", "a/b/c", "a/b/d"]),
+        (["a/b"], ["a/b"]),
+        (["b/", "c/"], ["b", "b/a", "c/" + "x" * 300, "c/y"]),
+        (["a/b/c/d/"], []),
+        (["x/"], []),
+    ]:
+        items = pipeline.unpack_spans(ids, index.spans(prefixes))
+        assert [item.path for item in items] == expected
+
+
+def test_unpack_skip_chunks():
+    paths = ["a" * (i % 7) + "b" * (i % 90) + str(i) for i in range(60)]
+    packed = [msgpack.packb({"path": path}) for path in paths]
+    stream = b"".join(packed)
+    ids = [bytes([i]) for i in range(0, len(stream) // 100 + 1)]
+    pipeline = MockPipeline({id: stream[i * 100 : (i + 1) * 100] for i, id in enumerate(ids)})
+    starts = [sum(len(p) for p in packed[:i]) for i in range(len(packed))]
+    for skip_chunks in [{0}, {1}, {2, 3}, {0, 2, 4, 5}, set(range(len(ids)))]:
+        # only the items completely contained in a skipped chunk are skipped
+        expected = [
+            path
+            for path, start, p in zip(paths, starts, packed)
+            if not (start // 100 in skip_chunks and start // 100 == (start + len(p) - 1) // 100)
+        ]
+        assert [item.path for item in pipeline.unpack_many(ids, skip_chunks=skip_chunks)] == expected
+
+
+def test_unpack_item_keys():
+    items = [{"path": "dir", "mode": 0o40755}, {"path": "file", "mode": 0o100644, "size": 3, "chunks": [(b"id", 3)]}]
+    pipeline = MockPipeline({b"0": b"".join(msgpack.packb(item) for item in items)})
+    items = list(pipeline.unpack_many([b"0"], item_keys={"path", "size"}))
+    assert [item.as_dict() for item in items] == [{"path": "dir"}, {"path": "file", "size": 3}]
+    items = list(pipeline.unpack_many([b"0"], item_keys={"path", "chunks"}))
+    assert items[1].chunks == [ChunkListEntry(b"id", 3)]
+    assert items[1].chunks[0].id == b"id"
+
+
+def test_verified_segments(tmp_path):
+    verified = VerifiedSegments()
+    assert verified.todo(9) == [(0, 9)]
+    verified.add(0, 3, 100)
+    verified.add(4, 5, 100)
+    assert verified.ranges == [[0, 5, 100]]
+    verified.add(8, 12, 200)
+    assert verified.todo(20) == [(6, 7), (13, 20), (0, 5), (8, 12)]
+    assert verified.todo(9) == [(6, 7), (0, 5), (8, 9)]
+    verified.add(2, 9, 300)
+    assert verified.ranges == [[0, 1, 100], [2, 9, 300], [10, 12, 200]]
+    assert verified.todo(12) == [(0, 1), (10, 12), (2, 9)]
+    verified.resume = (10, 42)
+    repo_objs = RepoObj(PlaintextKey(None))
+    path = str(tmp_path / "verify-data")
+    verified.save(path, repo_objs)
+    loaded = VerifiedSegments.load(path, repo_objs)
+    assert (loaded.ranges, loaded.resume) == (verified.ranges, verified.resume)
+    with open(path, "r+b") as fd:
+        fd.seek(40)
+        fd.write(b"X")
+    assert VerifiedSegments.load(path, repo_objs).ranges == []
+
+
+def test_archive_directory_map(tmp_path):
+    paths = ["a", "a/b", "a/b/c", "a/bc", "a-b", "a/b/d", "c/" + "x" * 300, "d/e/f", "c/y"]
+    stream = b"".join(msgpack.packb({"path": path}) for path in paths)
+    ids = [bytes([i]) for i in range(0, len(stream) // 100 + 1)]
+    pipeline = MockPipeline({id: stream[i * 100 : (i + 1) * 100] for i, id in enumerate(ids)})
+    locations = []
+    for _ in pipeline.unpack_many(ids, locations=locations):
+        pass
+    repo_objs = RepoObj(PlaintextKey(None))
+    ArchiveDirectoryMap.save(tmp_path / "map", b"archive id", locations, len(ids), repo_objs)
+    assert ArchiveDirectoryMap.load(tmp_path / "map", b"other archive", repo_objs) is None
+    assert ArchiveDirectoryMap.load(tmp_path / "nonexistent", b"archive id", repo_objs) is None
+    dmap = ArchiveDirectoryMap.load(tmp_path / "map", b"archive id", repo_objs)
+
+    def walk(ref, prefix=""):
+        for name, span, dir_ref in dmap.entries(ref):
+            path = prefix + name
+            if span is None:
+                yield path, None
+            else:
+                (item,) = pipeline.unpack_spans(ids, [span])
+                yield path, item.path
+            if dir_ref is not None:
+                yield from walk(dir_ref, path + "/")
+
+    assert sorted(walk(dmap.root)) == sorted(
+        [(path, path) for path in paths] + [("c", None), ("d", None), ("d/e", None)]
+    )
+    dmap.close()
+    with open(tmp_path / "map", "r+b") as fd:
+        fd.seek(-1, os.SEEK_END)
+        fd.write(b"X")  # corrupt the root record
+    assert ArchiveDirectoryMap.load(tmp_path / "map", b"archive id", repo_objs) is None
+
+
+def test_archive_directory_map_deep(tmp_path):
+    # much deeper than the recursion limit, with a duplicate path (the later item wins)
+    depth = 3 * sys.getrecursionlimit()
+    locations = [("/".join(["d"] * depth), 0, 0), ("/".join(["d"] * depth), 0, 10), ("d/x", 0, 20)]
+    repo_objs = RepoObj(PlaintextKey(None))
+    ArchiveDirectoryMap.save(tmp_path / "map", b"archive id", locations, 1, repo_objs)
+    dmap = ArchiveDirectoryMap.load(tmp_path / "map", b"archive id", repo_objs)
+    ref, levels = dmap.root, 0
+    while ref is not None:
+        entries = dmap.entries(ref)
+        if levels == 1:
+            assert [name for name, _, _ in entries] == ["d", "x"]
+            assert entries[1][1] == (0, 20, 1, 0)
+        (name, span, ref), *_ = entries
+        levels += 1
+    assert levels == depth
+    assert span == (0, 10, 0, 20)
+    dmap.close()
+
+
 def make_chunks(items):
     return b"".join(msgpack.packb({"path": item}) for item in items)
 
@@ -192,6 +338,94 @@ def process(input):
     return result
 
 
+@pytest.mark.parametrize("workers", [1, 4])
+def test_chunk_transfer_present(workers):
+    # when the target has all chunks already, the items are finished right away, not queued until flush()
+    repository = Mock()
+    repository.get_many.return_value = []
+    cache = Mock()
+    cache.seen_chunk.return_value = 1
+    transfer = ChunkTransfer(repository, Mock(), cache, Statistics(), upgrader=Mock(), workers=workers)
+    try:
+        for i in range(3 * ChunkTransfer.QUEUED_ITEMS):
+            item = Item(path=f"file{i}", chunks=[ChunkListEntry(i.to_bytes(32, "big"), 1)] if i % 2 else [])
+            assert list(transfer.add(item)) == [item]
+        assert list(transfer.flush()) == []
+    finally:
+        transfer.close()
+    assert cache.chunk_incref.call_count == 3 * ChunkTransfer.QUEUED_ITEMS // 2
+    repository.preload.assert_not_called()
+
+
+def test_chunk_reuse_cache():
+    def item(path, *ids, **kw):
+        return Item(path=path, chunks=[ChunkListEntry(id, 3) for id in ids], **kw)
+
+    a, b, c, d = (bytes([i]) * 32 for i in range(4))
+    items = [item("1", a, b, a), item("2", c, b, hlid=b"h" * 32), item("3", c, b, hlid=b"h" * 32), item("4", d, c)]
+    cache = ChunkReuseCache(capacity=6)
+    for it in items:
+        cache.add_references(it)
+    assert cache.refs[a].refcount == 2 and cache.refs[b].refcount == 2 and cache.refs[c].refcount == 2
+    assert d in cache.refs and cache.refs[d].refcount == 1
+
+    def fetch(ids):
+        cached = cache.get_many(ids)
+        for id in ids:
+            if id not in cached:
+                cache.put(id, id[:3])
+            cache.used(id, id in cached)
+
+    fetch([a, b])
+    assert list(cache.chunks) == [a, b]
+    fetch([a])  # last use of a
+    assert list(cache.chunks) == [b]
+    fetch([c, b])  # c is needed again, b is not
+    assert list(cache.chunks) == [c]
+    fetch([d, c])  # d and c are not needed again
+    assert list(cache.chunks) == [] and cache.size == 0
+    assert (cache.hits, cache.misses) == (3, 4)
+    # without counted references, it is a LRU cache
+    cache = ChunkReuseCache(capacity=6)
+    fetch([a, b, c])
+    assert list(cache.chunks) == [b, c] and cache.size == 6
+    assert cache.missing([a, b, c, d]) == [a, d]
+
+
+@pytest.mark.parametrize("copy_file_range", [True, False])
+def test_restored_files(tmp_path, monkeypatch, copy_file_range):
+    if not copy_file_range:
+        monkeypatch.delattr(os, "copy_file_range", raising=False)
+
+    def item(*ids):
+        return Item(path="file", chunks=[ChunkListEntry(id, 5) for id in ids])
+
+    a, b = bytes(32), b"\xff" * 32
+    restored = RestoredFiles()
+    src, dst = str(tmp_path / "src"), str(tmp_path / "dst")
+    with open(src, "wb") as fd:
+        fd.write(b"01234abcde")
+    restored.remember(item(a, b), src)
+    assert restored.lookup(item(a, b)) == src
+    assert restored.lookup(item(b, a)) is None
+    with open(dst, "wb") as fd:
+        assert not restored.copy(item(b, a), fd)
+        assert restored.copy(item(a, b), fd)
+        assert fd.tell() == 10
+    with open(dst, "rb") as fd:
+        assert fd.read() == b"01234abcde"
+    # the restored file has changed (can not be used any more)
+    with open(src, "ab") as fd:
+        fd.write(b"X")
+    with open(dst, "wb") as fd:
+        assert not restored.copy(item(a, b), fd)
+        assert fd.tell() == 0
+    assert restored.lookup(item(a, b)) is None
+    restored.remember(item(a, b), src)
+    restored.forget(src)
+    assert restored.lookup(item(a, b)) is None
+
+
 def test_extra_garbage_no_sync():
     chunks = [(False, [make_chunks(["foo", "bar"])]), (False, [b"garbage"] + [make_chunks(["boo", "baz"])])]
     res = process(chunks)
@@ -1,4 +1,5 @@
 from datetime import datetime, timezone, timedelta
+import re
 import shutil
 from unittest.mock import patch
 
@@ -9,7 +10,15 @@
 from ...helpers import bin_to_hex, msgpack
 from ...manifest import Manifest
 from ...repository import Repository
-from . import cmd, src_file, create_src_archive, open_archive, generate_archiver_tests, RK_ENCRYPTION
+from . import (
+    cmd,
+    create_regular_file,
+    src_file,
+    create_src_archive,
+    open_archive,
+    generate_archiver_tests,
+    RK_ENCRYPTION,
+)
 
 pytest_generate_tests = lambda metafunc: generate_archiver_tests(metafunc, kinds="local,remote,binary")  # NOQA
 
@@ -90,7 +99,8 @@ def test_date_matching(archivers, request):
         assert archive not in output
 
 
-def test_missing_file_chunk(archivers, request):
+@pytest.mark.parametrize("workers", ["--workers=1", "--workers=4"])
+def test_missing_file_chunk(archivers, request, workers):
     archiver = request.getfixturevalue(archivers)
     check_cmd_setup(archiver)
 
@@ -107,11 +117,11 @@ def test_missing_file_chunk(archivers, request):
             pytest.fail("should not happen")  # convert 'fail'
         repository.commit(compact=False)
 
-    cmd(archiver, "check", exit_code=1)
-    output = cmd(archiver, "check", "--repair", exit_code=0)
+    cmd(archiver, "check", workers, exit_code=1)
+    output = cmd(archiver, "check", "--repair", workers, exit_code=0)
     assert "New missing file chunk detected" in output
 
-    cmd(archiver, "check", exit_code=0)
+    cmd(archiver, "check", workers, exit_code=0)
     output = cmd(archiver, "list", "archive1", "--format={health}#{path}{NL}", exit_code=0)
     assert "broken#" in output
 
@@ -152,16 +162,17 @@ def test_missing_file_chunk(archivers, request):
     assert "broken#" not in output
 
 
-def test_missing_archive_item_chunk(archivers, request):
+@pytest.mark.parametrize("workers", ["--workers=1", "--workers=4"])
+def test_missing_archive_item_chunk(archivers, request, workers):
     archiver = request.getfixturevalue(archivers)
     check_cmd_setup(archiver)
     archive, repository = open_archive(archiver.repository_path, "archive1")
     with repository:
         repository.delete(archive.metadata.items[0])
         repository.commit(compact=False)
-    cmd(archiver, "check", exit_code=1)
-    cmd(archiver, "check", "--repair", exit_code=0)
-    cmd(archiver, "check", exit_code=0)
+    cmd(archiver, "check", workers, exit_code=1)
+    cmd(archiver, "check", "--repair", workers, exit_code=0)
+    cmd(archiver, "check", workers, exit_code=0)
 
 
 def test_missing_archive_metadata(archivers, request):
@@ -345,8 +356,9 @@ def test_extra_chunks(archivers, request):
     cmd(archiver, "extract", "archive1", "--dry-run", exit_code=0)
 
 
+@pytest.mark.parametrize("workers", ["--workers=1", "--workers=4"])
 @pytest.mark.parametrize("init_args", [["--encryption=repokey-aes-ocb"], ["--encryption", "none"]])
-def test_verify_data(archivers, request, init_args):
+def test_verify_data(archivers, request, init_args, workers):
     archiver = request.getfixturevalue(archivers)
     check_cmd_setup(archiver)
     shutil.rmtree(archiver.repository_path)
@@ -363,15 +375,77 @@ def test_verify_data(archivers, request, init_args):
                 break
         repository.commit(compact=False)
     cmd(archiver, "check", exit_code=0)
-    output = cmd(archiver, "check", "--verify-data", exit_code=1)
+    output = cmd(archiver, "check", "--verify-data", workers, exit_code=1)
     assert bin_to_hex(chunk.id) + ", integrity error" in output
 
     # repair (heal is tested in another test)
-    output = cmd(archiver, "check", "--repair", "--verify-data", exit_code=0)
+    output = cmd(archiver, "check", "--repair", "--verify-data", workers, exit_code=0)
     assert bin_to_hex(chunk.id) + ", integrity error" in output
     assert f"{src_file}: New missing file chunk detected" in output
 
 
+def test_check_incremental(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    check_cmd_setup(archiver)
+    cmd(archiver, "check", "-v", "--archives-only", exit_code=0)  # does not remember the checked archives
+    output = cmd(archiver, "check", "-v", "--archives-only", "--incremental", exit_code=0)
+    assert "Analyzing archive archive1" in output and "Analyzing archive archive2" in output
+    assert "Skipping archive" not in output
+    create_src_archive(archiver, "archive3")
+    output = cmd(archiver, "check", "-v", "--archives-only", "--incremental", exit_code=0)
+    assert "Skipping archive archive1" in output and "Skipping archive archive2" in output
+    assert "Analyzing archive archive3" in output
+    # missing chunks of already checked archives are still detected
+    archive, repository = open_archive(archiver.repository_path, "archive1")
+    with repository:
+        for item in archive.iter_items():
+            if item.path.endswith(src_file):
+                repository.delete(item.chunks[-1].id)
+                break
+        repository.commit(compact=False)
+    output = cmd(archiver, "check", "-v", "--archives-only", "--incremental", exit_code=1)
+    assert "Skipping archive archive1" not in output
+    assert "New missing file chunk detected" in output
+
+
+def test_verify_data_partial(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    for i in range(2):
+        for j in range(120):
+            create_regular_file(archiver.input_path, f"file{i}_{j}", contents=b"%d %d" % (i, j))
+        cmd(archiver, "create", f"archive{i}", "input")
+    with Repository(archiver.repository_path, exclusive=True) as repository:
+        count = len(repository)
+    # every run verifies at least one batch of chunks and continues where the previous run stopped
+    verified, runs = 0, 0
+    while verified < count:
+        output = cmd(archiver, "check", "-v", "--verify-data", "--verify-max-size=1", exit_code=0)
+        assert "Stopped cryptographic data integrity verification" in output
+        verified += int(re.search(r"verified (\d+) chunks", output).group(1))
+        runs += 1
+    assert 1 < runs <= count // 100 + 1
+    # after all data was verified, a complete run still verifies all of it
+    output = cmd(archiver, "check", "-v", "--verify-data", exit_code=0)
+    assert f"verified {verified} chunks" in output
+
+
+def test_verify_data_after_partial(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    for j in range(250):
+        create_regular_file(archiver.input_path, f"file{j}", contents=b"%d" % j)
+    cmd(archiver, "create", "archive", "input")
+    with Repository(archiver.repository_path, exclusive=True) as repository:
+        count = len(repository)
+    output = cmd(archiver, "check", "-v", "--verify-data", "--verify-max-size=1", exit_code=0)
+    assert "Stopped cryptographic data integrity verification" in output
+    # a run without a budget verifies everything, not only what the stopped run did not verify
+    output = cmd(archiver, "check", "-v", "--verify-data", exit_code=0)
+    assert "mismatch" not in output
+    assert f"verified {count} chunks" in output
+
+
 def test_empty_repository(archivers, request):
     archiver = request.getfixturevalue(archivers)
     if archiver.get_kind() == "remote":
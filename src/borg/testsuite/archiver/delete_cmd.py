@@ -1,3 +1,8 @@
+import glob
+import os
+
+import pytest
+
 from ...archive import Archive
 from ...constants import *  # NOQA
 from ...manifest import Manifest
@@ -80,3 +85,73 @@ def test_delete_double_force(archivers, request):
     cmd(archiver, "check", "--repair")
     output = cmd(archiver, "rlist")
     assert "test" not in output
+
+
+def test_delete_lazy(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_regular_file(archiver.input_path, "file1", size=1024 * 80)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    create_regular_file(archiver.input_path, "file2", size=1024 * 80)
+    cmd(archiver, "create", "test.2", "input")
+    cmd(archiver, "create", "test.3", "input")
+    with Repository(archiver.repository_path) as repository:
+        count = len(repository)
+    cmd(archiver, "delete", "-a", "test.2", "--lazy")
+    cmd(archiver, "delete", "-a", "test.3", "--lazy")
+    with Repository(archiver.repository_path) as repository:
+        assert len(repository) == count
+    output = cmd(archiver, "rlist")
+    assert "test.2" not in output and "test.3" not in output
+    cmd(archiver, "compact", "--collect-garbage", "-v")
+    with Repository(archiver.repository_path) as repository:
+        assert len(repository) < count
+    # no orphans are left, the remaining archive is complete
+    cmd(archiver, "check", "--verify-data")
+    cmd(archiver, "extract", "test", "--dry-run")
+
+
+def test_prune_lazy(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_regular_file(archiver.input_path, "file1", size=1024 * 80)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test1", "input", "--timestamp=2023-01-01T10:00:00")
+    create_regular_file(archiver.input_path, "file2", size=1024 * 80)
+    cmd(archiver, "create", "test2", "input", "--timestamp=2023-01-02T10:00:00")
+    cmd(archiver, "create", "test3", "input", "--timestamp=2023-01-03T10:00:00")
+    with Repository(archiver.repository_path) as repository:
+        count = len(repository)
+    output = cmd(archiver, "prune", "--list", "--lazy", "--keep-daily=1", "-a", "sh:test[23]")
+    assert "Pruning archive (1/1):" in output and "test2" in output
+    with Repository(archiver.repository_path) as repository:
+        assert len(repository) == count
+    output = cmd(archiver, "rlist")
+    assert "test1" in output and "test2" not in output and "test3" in output
+    cmd(archiver, "compact", "--collect-garbage", "-v")
+    with Repository(archiver.repository_path) as repository:
+        assert len(repository) < count
+    # no orphans are left, the remaining archives are complete
+    cmd(archiver, "check", "--verify-data")
+    cmd(archiver, "extract", "test1", "--dry-run")
+    cmd(archiver, "extract", "test3", "--dry-run")
+
+
+def test_delete_archive_caches(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    if archiver.get_kind() == "binary":
+        pytest.skip("the binary does not use the test's cache directory")
+    create_regular_file(archiver.input_path, "file1", size=10)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    cmd(archiver, "create", "test.2", "input")
+    cmd(archiver, "create", "test.3", "input")
+    for name in "test", "test.2", "test.3":
+        cmd(archiver, "list", name, "input/file1", "--path-index")
+    index_files = os.path.join(archiver.cache_path, "path-index", "*", "*")
+    assert len(glob.glob(index_files)) == 3
+    cmd(archiver, "delete", "-a", "test.2")
+    assert len(glob.glob(index_files)) == 2
+    cmd(archiver, "delete", "-a", "test.3", "--lazy")
+    assert len(glob.glob(index_files)) == 1
+    cmd(archiver, "rdelete")
+    assert glob.glob(index_files) == []
@@ -287,3 +287,22 @@ def test_sort_option(archivers, request):
     outputs = output.splitlines()
     assert len(outputs) == len(expected)
     assert all(x in line for x, line in zip(expected, outputs))
+
+
+def test_diff_shared_metadata_chunks(archivers, request):
+    # most item metadata chunks of the archives are the same, only the items around the changes differ.
+    archiver = request.getfixturevalue(archivers)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    for i in range(3000):
+        create_regular_file(archiver.input_path, f"dir{i // 100:02d}/file{i:04d}", size=i % 50)
+    cmd(archiver, "create", "test0", "input")
+    os.unlink("input/dir05/file0555")
+    create_regular_file(archiver.input_path, "dir12/file1234", size=1000)
+    create_regular_file(archiver.input_path, "dir20/file2000a", size=10)
+    cmd(archiver, "create", "test1", "input")
+
+    output = cmd(archiver, "diff", "test0", "test1", "--sort", "--content-only")
+    expected = ["input/dir05/file0555", "input/dir12/file1234", "input/dir20/file2000a"]
+    outputs = output.splitlines()
+    assert len(outputs) == len(expected)
+    assert all(x in line for x, line in zip(expected, outputs))
@@ -1,6 +1,8 @@
 import errno
 import os
+import re
 import shutil
+import stat
 import time
 from unittest.mock import patch
 
@@ -177,7 +179,8 @@ def test_birthtime(archivers, request):
 
 
 @pytest.mark.skipif(is_win32, reason="frequent test failures on github CI on win32")
-def test_sparse_file(archivers, request):
+@pytest.mark.parametrize("extract_option", ["--workers=1", "--workers=4", "--physical-order"])
+def test_sparse_file(archivers, request, extract_option):
     archiver = request.getfixturevalue(archivers)
 
     def is_sparse(fn, total_size, hole_size):
@@ -220,7 +223,7 @@ def is_sparse(fn, total_size, hole_size):
         cmd(archiver, "rcreate", RK_ENCRYPTION)
         cmd(archiver, "create", "test", "input")
         with changedir(archiver.output_path):
-            cmd(archiver, "extract", "test", "--sparse")
+            cmd(archiver, "extract", "test", "--sparse", extract_option)
         assert_dirs_equal("input", "output/input")
         filename = os.path.join(archiver.output_path, "input", "sparse")
         with open(filename, "rb") as fd:
@@ -263,11 +266,14 @@ def test_strip_components(archivers, request):
 
 
 @requires_hardlinks
-def test_extract_hardlinks1(archivers, request):
+@pytest.mark.parametrize(
+    "extract_option", ["--workers=1", "--workers=4", "--physical-order", "--chunk-cache=1M", "--reuse-identical"]
+)
+def test_extract_hardlinks1(archivers, request, extract_option):
     archiver = request.getfixturevalue(archivers)
     _extract_hardlinks_setup(archiver)
     with changedir("output"):
-        cmd(archiver, "extract", "test")
+        cmd(archiver, "extract", "test", extract_option)
         assert os.stat("input/source").st_nlink == 4
         assert os.stat("input/abba").st_nlink == 4
         assert os.stat("input/dir1/hardlink").st_nlink == 4
@@ -665,7 +671,10 @@ def patched_setxattr_EACCES(*args, **kwargs):
             cmd(archiver, "extract", "test", exit_code=EXIT_WARNING)
 
 
-def test_extract_continue(archivers, request):
+@pytest.mark.parametrize(
+    "extract_option", ["--workers=1", "--workers=4", "--physical-order", "--chunk-cache=1M", "--reuse-identical"]
+)
+def test_extract_continue(archivers, request, extract_option):
     archiver = request.getfixturevalue(archivers)
     CONTENTS1, CONTENTS2, CONTENTS3 = b"contents1" * 100, b"contents2" * 200, b"contents3" * 300
     cmd(archiver, "rcreate", RK_ENCRYPTION)
@@ -693,7 +702,7 @@ def test_extract_continue(archivers, request):
 
     with changedir("output"):
         # now try to continue extracting, using the same archive, same output dir:
-        cmd(archiver, "extract", "arch", "--continue")
+        cmd(archiver, "extract", "arch", "--continue", extract_option)
         now_file1_st = os.stat("input/file1")
         assert file1_st.st_ino == now_file1_st.st_ino  # file1 was NOT extracted again
         assert file1_st.st_mtime_ns == now_file1_st.st_mtime_ns  # has correct mtime
@@ -715,3 +724,146 @@ def test_extract_continue(archivers, request):
             assert f.read() == CONTENTS2
         with open("input/file3", "rb") as f:
             assert f.read() == CONTENTS3
+
+
+def test_extract_object_cache(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_test_files(archiver.input_path)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    objects_path = os.path.join(archiver.cache_path, "objects")
+    for output in "output1", "output2":
+        os.mkdir(output)
+        with changedir(output):
+            cmd(archiver, "extract", "test", "--object-cache=100M")
+        assert_dirs_equal("input", os.path.join(output, "input"))
+    # the persistent object cache is only used for remote repositories
+    assert os.path.exists(objects_path) == (archiver.get_kind() == "remote")
+
+
+def test_extract_remote_connections(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_test_files(archiver.input_path)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    with changedir("output"):
+        cmd(archiver, "extract", "test", "--remote-connections=3")
+    assert_dirs_equal("input", "output/input")
+    cmd(archiver, "check", "--verify-data", "--remote-connections=3")
+
+
+def test_extract_workers(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_test_files(archiver.input_path)
+    create_regular_file(archiver.input_path, "dir2/big", contents=os.urandom(3 * 1024 * 1024))
+    for i in range(20):
+        create_regular_file(archiver.input_path, f"dir2/sub{i % 3}/file{i}", contents=b"X" * i)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input", "--chunker-params=buzhash,10,14,12,4095")
+    with changedir("output"):
+        cmd(archiver, "extract", "test", "--workers=4")
+    # this also compares the mtimes of the directories, which get restored after their files were finished:
+    assert_dirs_equal("input", "output/input")
+    with changedir("output"):
+        output = cmd(archiver, "extract", "test", "--workers=4", "--chunk-cache=1M")
+    assert "--chunk-cache is not supported with --workers, ignoring it." in output
+
+
+@pytest.mark.parametrize("extract_option", ["--workers=4", "--physical-order", "--sparse"])
+def test_extract_reuse_identical_ignored(archivers, request, extract_option):
+    archiver = request.getfixturevalue(archivers)
+    if extract_option == "--physical-order" and archiver.get_kind() == "remote":
+        pytest.skip("--physical-order is not supported for remote repositories")
+    create_regular_file(archiver.input_path, "file1", contents=b"X" * 1000)
+    create_regular_file(archiver.input_path, "file2", contents=b"X" * 1000)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    with changedir("output"):
+        output = cmd(archiver, "extract", "test", "--reuse-identical", extract_option)
+    assert "--reuse-identical is not supported with" in output
+    assert_dirs_equal("input", "output/input")
+
+
+def test_extract_workers_close_error(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_regular_file(archiver.input_path, "file1", contents=b"X" * 12345)
+    create_regular_file(archiver.input_path, "file2", contents=b"Y" * 100)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    os_close = os.close
+
+    def close_EIO(fd):
+        st = os.fstat(fd)
+        os_close(fd)
+        if stat.S_ISREG(st.st_mode) and st.st_size == 12345:
+            raise OSError(errno.EIO, "EIO")
+
+    with changedir("output"):
+        with patch.object(os, "close", close_EIO):
+            output = cmd(archiver, "extract", "test", "--workers=4", exit_code=EXIT_WARNING)
+        assert "input/file1: close: [Errno 5] EIO" in output
+        with open("input/file2", "rb") as f:
+            assert f.read() == b"Y" * 100
+
+
+def test_extract_physical_order(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_test_files(archiver.input_path)
+    data = os.urandom(256 * 1024)
+    for i in range(10):
+        # files sharing chunks at different offsets, in an order different from the chunk order in the repo
+        create_regular_file(archiver.input_path, f"dir2/file{i}", contents=data[i * 1024 :] + data[: i * 1024])
+        create_regular_file(archiver.input_path, f"dir3/file{i}", contents=data[i * 1024 :])
+    create_regular_file(archiver.input_path, "dir3/empty", contents=b"")
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input", "--chunker-params=buzhash,10,14,12,4095")
+    with changedir("output"):
+        output = cmd(archiver, "extract", "test", "--physical-order")
+    if archiver.get_kind() == "remote":
+        assert "only supported for local repositories" in output
+    else:
+        assert output == ""
+    # this also compares the mtimes of the directories, which get restored after their files were finished:
+    assert_dirs_equal("input", "output/input")
+
+
+def test_extract_chunk_cache(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_test_files(archiver.input_path)
+    data = os.urandom(64 * 1024)
+    for i in range(10):
+        create_regular_file(archiver.input_path, f"dir2/file{i}", contents=data + bytes([i]) * 1024)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input", "--chunker-params=buzhash,10,14,12,4095")
+    with changedir("output"):
+        output = cmd(archiver, "extract", "test", "--chunk-cache=1M", "--debug")
+    assert_dirs_equal("input", "output/input")
+    hits = int(re.search(r"chunk cache: (\d+) hits", output).group(1))
+    assert hits > 0
+
+
+def test_extract_reuse_identical(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_test_files(archiver.input_path)
+    data = os.urandom(64 * 1024)
+    for i in range(5):
+        create_regular_file(archiver.input_path, f"dir2/same{i}", contents=data)
+        create_regular_file(archiver.input_path, f"dir2/other{i}", contents=data[: i * 1000])
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    with changedir("output"):
+        cmd(archiver, "extract", "test", "--reuse-identical")
+    assert_dirs_equal("input", "output/input")
+
+
+def test_extract_path_index(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_test_files(archiver.input_path)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    for output in "output1", "output2":  # builds the path index, uses the path index
+        os.mkdir(output)
+        with changedir(output):
+            cmd(archiver, "extract", "test", "input/dir2", "input/file1", "--path-index")
+            assert sorted(os.listdir("input")) == ["dir2", "file1"]
+        assert_dirs_equal("input/dir2", os.path.join(output, "input/dir2"))
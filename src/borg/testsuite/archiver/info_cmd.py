@@ -45,3 +45,32 @@ def test_info_json_of_empty_archive(archivers, request):
     assert info_repo["archives"] == []
     info_repo = json.loads(cmd(archiver, "info", "--json", "--last=1"))
     assert info_repo["archives"] == []
+
+
+def test_info_cached_archive_index(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    create_regular_file(archiver.input_path, "file1", size=1024 * 80)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    create_regular_file(archiver.input_path, "file2", size=1024 * 80)
+    cmd(archiver, "create", "test2", "input")
+    archive_id = json.loads(cmd(archiver, "info", "-a", "test", "--json"))["archives"][0]["id"]
+    cache_path = json.loads(cmd(archiver, "rinfo", "--json"))["cache"]["path"]
+    chunks_archive = os.path.join(cache_path, "chunks.archive.d")
+    assert archive_id + ".compact" in os.listdir(chunks_archive)
+
+    def unique_sizes():
+        info = json.loads(cmd(archiver, "info", "--json"))
+        return {archive["name"]: archive["stats"]["deduplicated_size"] for archive in info["archives"]}
+
+    sizes = unique_sizes()
+    assert sizes["test"] > 0 and sizes["test2"] > sizes["test"]
+    assert unique_sizes() == sizes  # computed from the cached archive indexes now
+    # deleting test2 makes the chunks shared with it unique to test
+    cmd(archiver, "delete", "-a", "test2")
+    assert unique_sizes()["test"] > sizes["test"]
+    # a corrupted archive index is built again
+    with open(os.path.join(chunks_archive, archive_id + ".compact"), "r+b") as fd:
+        fd.seek(-10, os.SEEK_END)
+        fd.write(b"\0" * 10)
+    assert unique_sizes()["test"] > sizes["test"]
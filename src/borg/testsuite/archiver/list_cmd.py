@@ -74,3 +74,20 @@ def test_list_json(archivers, request):
     file1 = items[1]
     assert file1["path"] == "input/file1"
     assert file1["sha256"] == "b2915eb69f260d8d3c25249195f2c8f4f716ea82ec760ae929732c0262442b2b"
+
+
+def test_list_path_index(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    for name in "dir/a", "dir/sub/b", "dir2/c", "d":
+        create_regular_file(archiver.input_path, name, size=10)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+    expected = cmd(archiver, "list", "test", "input/dir", "--short", "--exclude", "input/dir/sub/b")
+    index_dir = os.path.join(archiver.cache_path, "path-index")
+    assert not os.path.exists(index_dir)
+    # the first use builds the index, later uses use it.
+    for _ in range(2):
+        output = cmd(archiver, "list", "test", "input/dir", "--short", "--exclude", "input/dir/sub/b", "--path-index")
+        assert output == expected
+        assert os.path.exists(index_dir) == (archiver.get_kind() != "binary")
+    assert output.splitlines() == ["input/dir", "input/dir/a", "input/dir/sub"]
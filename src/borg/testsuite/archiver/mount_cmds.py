@@ -248,6 +248,74 @@ def test_fuse_mount_options(archivers, request):
         assert sorted(os.listdir(os.path.join(mountpoint))) == []
 
 
+@pytest.mark.skipif(not llfuse, reason="llfuse not installed")
+def test_fuse_lazy_dirs(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    # with --lazy-dirs, hardlinks show as separate files (and have a different st_nlink).
+    create_test_files(archiver.input_path, create_hardlinks=False)
+    for i in range(1000):
+        create_regular_file(archiver.input_path, f"dir2/sub{i % 7}/{'x' * 200}{i}", contents=b"X" * i)
+    cmd(archiver, "create", "archive", "input")
+    mountpoint = os.path.join(archiver.tmpdir, "mountpoint")
+    for _ in range(2):  # builds the directory map, uses the directory map
+        with fuse_mount(archiver, mountpoint, "--lazy-dirs"):
+            assert os.listdir(mountpoint) == ["archive"]
+            assert_dirs_equal(
+                archiver.input_path, os.path.join(mountpoint, "archive", "input"), ignore_flags=True, ignore_xattrs=True
+            )
+
+
+@pytest.mark.skipif(not llfuse, reason="llfuse not installed")
+def test_fuse_cache_inodes(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    create_test_files(archiver.input_path)
+    cmd(archiver, "create", "archive1", "input")
+    cmd(archiver, "create", "archive2", "input")
+    mountpoint = os.path.join(archiver.tmpdir, "mountpoint")
+    # saves the inodes of the archives, then restores them (in different order)
+    for names in (["archive1", "archive2"], ["archive2", "archive1"]):
+        with fuse_mount(archiver, mountpoint, "--cache-inodes"):
+            for name in names:
+                assert_dirs_equal(
+                    archiver.input_path, os.path.join(mountpoint, name, "input"), ignore_flags=True, ignore_xattrs=True
+                )
+            if are_hardlinks_supported():
+                assert os.stat(os.path.join(mountpoint, "archive1", "input", "hardlink")).st_nlink == 2
+
+
+def test_fuse_read_ahead_invalid(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    mountpoint = os.path.join(archiver.tmpdir, "mountpoint")
+    cmd(archiver, "mount", "--read-ahead=-1", mountpoint, exit_code=2)
+
+
+@pytest.mark.skipif(not llfuse, reason="llfuse not installed")
+def test_fuse_read_ahead(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    data = os.urandom(5 * 1024 * 1024)
+    create_regular_file(archiver.input_path, "file1", contents=data)
+    create_regular_file(archiver.input_path, "file2", contents=data[::-1])
+    cmd(archiver, "create", "--chunker-params=fixed,65536", "archive", "input")
+    mountpoint = os.path.join(archiver.tmpdir, "mountpoint")
+    with fuse_mount(archiver, mountpoint, "--read-ahead=8"):
+        path1 = os.path.join(mountpoint, "archive", "input", "file1")
+        path2 = os.path.join(mountpoint, "archive", "input", "file2")
+        with open(path1, "rb") as f1, open(path2, "rb") as f2:
+            # interleaved sequential reads
+            assert f1.read(100000) == data[:100000]
+            assert f2.read(100000) == data[::-1][:100000]
+            assert f1.read() == data[100000:]
+            assert f2.read() == data[::-1][100000:]
+            # non-sequential reads
+            f1.seek(3000000)
+            assert f1.read(70000) == data[3000000:3070000]
+            f1.seek(1000)
+            assert f1.read(1000) == data[1000:2000]
+
+
 @pytest.mark.skipif(not llfuse, reason="llfuse not installed")
 def test_migrate_lock_alive(archivers, request):
     """Both old_id and new_id must not be stale during lock migration / daemonization."""
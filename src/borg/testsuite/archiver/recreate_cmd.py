@@ -145,7 +145,8 @@ def test_recreate_subtree_hardlinks(archivers, request):
         assert os.stat("input/dir1/hardlink").st_nlink == 4
 
 
-def test_recreate_rechunkify(archivers, request):
+@pytest.mark.parametrize("workers", [1, 4])
+def test_recreate_rechunkify(archivers, request, workers):
     archiver = request.getfixturevalue(archivers)
     with open(os.path.join(archiver.input_path, "large_file"), "wb") as fd:
         fd.write(b"a" * 280)
@@ -157,7 +158,7 @@ def test_recreate_rechunkify(archivers, request):
     num_chunks, unique_chunks = map(int, chunks_list.split(" "))
     # test1 and test2 do not deduplicate
     assert num_chunks == unique_chunks
-    cmd(archiver, "recreate", "--chunker-params", "default")
+    cmd(archiver, "recreate", "--chunker-params", "default", f"--workers={workers}")
     check_cache(archiver)
     # test1 and test2 do deduplicate after recreate
     assert int(cmd(archiver, "list", "test1", "input/large_file", "--format={size}"))
@@ -179,6 +180,53 @@ def test_recreate_fixed_rechunkify(archivers, request):
     assert num_chunks == 2
 
 
+def test_recreate_rechunkify_workers(archivers, request):
+    archiver = request.getfixturevalue(archivers)
+    with open(os.path.join(archiver.input_path, "file"), "wb") as fd:
+        for i in range(8):
+            fd.write(os.urandom(512 * 1024) if i % 4 else b"\0" * 512 * 1024)
+    create_regular_file(archiver.input_path, "file2", contents=os.urandom(100000))
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input", "--chunker-params", "fixed,65536")
+    listing = cmd(archiver, "list", "test", "--format", "{path} {size} {xxh64}{NL}")
+    cmd(archiver, "recreate", "--chunker-params", "buzhash,10,16,12,4095", "--workers=4", "-C", "zstd,1")
+    output = cmd(archiver, "list", "test", "input/file", "--format", "{num_chunks}")
+    assert int(output) != 64
+    assert cmd(archiver, "list", "test", "--format", "{path} {size} {xxh64}{NL}") == listing
+    check_cache(archiver)
+    cmd(archiver, "check", "--verify-data")
+
+
+def test_recreate_metadata_only_does_not_touch_content(archivers, request, monkeypatch):
+    archiver = request.getfixturevalue(archivers)
+    if archiver.get_kind() != "local":
+        pytest.skip("only works locally")
+    create_test_files(archiver.input_path)
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "test", "input")
+
+    from ...repoobj import RepoObj
+
+    ro_types = set()
+    parse, format = RepoObj.parse, RepoObj.format
+
+    def parse_recorder(self, id, cdata, *args, ro_type=None, **kwargs):
+        ro_types.add(ro_type)
+        return parse(self, id, cdata, *args, ro_type=ro_type, **kwargs)
+
+    def format_recorder(self, id, meta, data, *args, ro_type=None, **kwargs):
+        ro_types.add(ro_type)
+        return format(self, id, meta, data, *args, ro_type=ro_type, **kwargs)
+
+    monkeypatch.setattr(RepoObj, "parse", parse_recorder)
+    monkeypatch.setattr(RepoObj, "format", format_recorder)
+    cmd(archiver, "recreate", "-a", "test", "--exclude", "input/file1", "--comment", "changed", "--workers=4")
+    assert ROBJ_ARCHIVE_STREAM in ro_types
+    assert ROBJ_FILE_STREAM not in ro_types
+    assert "input/file1" not in cmd(archiver, "list", "test")
+    cmd(archiver, "check", "--verify-data")
+
+
 def test_recreate_no_rechunkify(archivers, request):
     archiver = request.getfixturevalue(archivers)
     with open(os.path.join(archiver.input_path, "file"), "wb") as fd:
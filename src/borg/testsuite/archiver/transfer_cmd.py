@@ -295,3 +295,28 @@ def convert_tz(local_naive, tzoffset, tzinfo):
             assert hlid1 == hlid2
             assert size1 == size2 == 16 + 1  # 16 text chars + \n
             assert chunks1 == chunks2
+
+
+@pytest.mark.parametrize("recompress", ["never", "always"])
+def test_transfer_workers(archivers, request, recompress):
+    archiver = request.getfixturevalue(archivers)
+    original_location, input_path = archiver.repository_location, archiver.input_path
+    create_test_files(input_path)
+    # a file with many chunks, some of them duplicates
+    with open(os.path.join(input_path, "chunks"), "wb") as fd:
+        for i in range(40):
+            fd.write(os.urandom(1024 * 1024) if i % 4 else b"\0" * 1024 * 1024)
+    archiver.repository_location = original_location + "1"
+    cmd(archiver, "rcreate", RK_ENCRYPTION)
+    cmd(archiver, "create", "--chunker-params=fixed,65536", "arch1", "input")
+    cmd(archiver, "create", "--chunker-params=fixed,65536", "arch2", "input")
+    archive1 = cmd(archiver, "list", "--format={path} {size} {xxh64}{NL}", "arch1")
+
+    archiver.repository_location = original_location + "2"
+    other_repo1 = f"--other-repo={original_location}1"
+    cmd(archiver, "rcreate", RK_ENCRYPTION, other_repo1)
+    output = cmd(archiver, "transfer", other_repo1, "--workers=4", f"--recompress={recompress}", "-C", "zstd,1")
+    assert "arch2: finished. transfer_size: 0 B" in output
+    assert "incomplete" not in cmd(archiver, "transfer", other_repo1, "--dry-run")
+    assert cmd(archiver, "list", "--format={path} {size} {xxh64}{NL}", "arch1") == archive1
+    cmd(archiver, "check", "--verify-data")
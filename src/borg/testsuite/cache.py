@@ -8,11 +8,13 @@
 from .hashindex import H
 from .key import TestKey
 from ..archive import Statistics
-from ..cache import AdHocCache
-from ..crypto.key import AESOCBRepoKey
+from ..cache import AdHocCache, save_cache_object, load_cache_object
+from ..constants import ROBJ_ARCHIVE_STREAM
+from ..crypto.key import AESOCBRepoKey, PlaintextKey
 from ..hashindex import ChunkIndex, CacheSynchronizer
 from ..manifest import Manifest
 from ..repository import Repository
+from ..repoobj import RepoObj
 
 
 class TestCacheSynchronizer:
@@ -204,6 +206,24 @@ def test_deletes_chunks_during_lifetime(self, cache, repository):
         with pytest.raises(Repository.ObjectNotFound):
             repository.get(H(5))
 
+    def test_chunk_decref_count(self, cache, repository):
+        cache.add_chunk(H(5), {}, b"1010", stats=Statistics())
+        for _ in range(2):
+            cache.chunk_incref(H(5), Statistics())
+        stats = Statistics()
+        cache.chunk_decref(H(5), stats, count=2)
+        assert cache.seen_chunk(H(5)) == 1
+        assert (stats.osize, stats.usize) == (-8, 0)
+        with pytest.raises(KeyError):
+            cache.chunk_decref(H(5), stats, count=2)
+        cache.chunk_decref(H(5), stats, count=1)
+        assert not cache.seen_chunk(H(5))
+        assert (stats.osize, stats.usize) == (-12, -4)
+        with pytest.raises(Repository.ObjectNotFound):
+            repository.get(H(5))
+        cache.chunk_decref(H(1), stats, count=3)
+        assert cache.seen_chunk(H(1)) == ChunkIndex.MAX_VALUE
+
     def test_files_cache(self, cache):
         assert cache.file_known_and_unchanged(b"foo", bytes(32), None) == (False, None)
         assert cache.cache_mode == "d"
@@ -226,3 +246,22 @@ def test_existing_incref_after_add_chunk(self, cache):
         """This case occurs with part files, see Archive.chunk_file."""
         assert cache.add_chunk(H(1), {}, b"5678", stats=Statistics()) == (H(1), 4)
         assert cache.chunk_incref(H(1), Statistics()) == (H(1), 4)
+
+
+def test_cache_object(tmp_path):
+    repo_objs = RepoObj(PlaintextKey(None))
+    path = str(tmp_path / "sub" / "object")
+    obj = {"version": 1, "archive_id": b"archive id", "data": [1, 2, 3]}
+    save_cache_object(path, obj, repo_objs)
+    assert load_cache_object(path, repo_objs, 1, b"archive id") == obj
+    assert load_cache_object(path, repo_objs, 1) == obj
+    assert load_cache_object(path, repo_objs, 2, b"archive id") is None
+    assert load_cache_object(path, repo_objs, 1, b"other archive") is None
+    assert load_cache_object(str(tmp_path / "nonexistent"), repo_objs, 1) is None
+    # a repository object is no cache object, even if it is properly authenticated
+    data = packb(obj)
+    id = repo_objs.id_hash(data)
+    with open(path, "wb") as fd:
+        fd.write(id)
+        fd.write(repo_objs.format(id, {}, data, ro_type=ROBJ_ARCHIVE_STREAM))
+    assert load_cache_object(path, repo_objs, 1) is None
@@ -1,6 +1,7 @@
 import argparse
 import os
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
@@ -184,6 +185,21 @@ def test_obfuscate_meta():
     assert not trailer or set(trailer) == {0}  # trailer is all-zero-bytes
 
 
+@pytest.mark.parametrize("spec", ["none", "lz4", "zlib", "zstd,3", "lzma,1", "auto,zstd", "obfuscate,1,lz4"])
+def test_concurrent_compression(spec):
+    compressor = CompressionSpec(spec).compressor
+    # mix compressible and incompressible data of different sizes, so that the threads use differently sized buffers
+    datas = [DATA * i + os.urandom(i * 101) for i in range(1, 200)]
+
+    def roundtrip(data):
+        meta, cdata = compressor.compress({}, data)
+        cdata = cdata[: meta.get("psize", meta["csize"])]  # remove the obfuscation trailer, like RepoObj does
+        return Compressor(**params).decompress(meta, cdata)[1]  # autodetect
+
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(roundtrip, datas)) == datas
+
+
 @pytest.mark.parametrize(
     "c_type, c_name", [(CNONE, "none"), (LZ4, "lz4"), (ZLIB, "zlib"), (LZMA, "lzma"), (ZSTD, "zstd")]
 )
@@ -1,5 +1,7 @@
+import os
 import tempfile
 from binascii import a2b_base64
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock
 
 import pytest
@@ -219,6 +221,18 @@ def test_roundtrip(self, key):
         decrypted = loaded_key.decrypt(id, encrypted)
         assert decrypted == plaintext
 
+    def test_concurrent_encrypt_decrypt(self, key):
+        if not isinstance(key, AEADKeyBase):
+            pytest.skip("only the AEAD keys are used to encrypt new data")
+        plaintexts = [os.urandom(i * 997) for i in range(200)]
+        ids = [key.id_hash(plaintext) for plaintext in plaintexts]
+        with ThreadPoolExecutor(8) as executor:
+            encrypted = list(executor.map(key.encrypt, ids, plaintexts))
+            decrypted = list(executor.map(key.decrypt, ids, encrypted))
+        assert decrypted == plaintexts
+        # every message of a session must have been encrypted with a different iv
+        assert len({data[2:8] for data in encrypted}) == len(encrypted)
+
     def test_assert_id(self, key):
         plaintext = b"123456789"
         id = key.id_hash(plaintext)
@@ -7,7 +7,7 @@
 
 from ..patterns import PathFullPattern, PathPrefixPattern, FnmatchPattern, ShellPattern, RegexPattern
 from ..patterns import load_exclude_file, load_pattern_file
-from ..patterns import parse_pattern, PatternMatcher
+from ..patterns import parse_pattern, parse_inclexcl_command, PatternMatcher
 from ..patterns import get_regex_from_pattern
 
 
@@ -633,3 +633,20 @@ def test_pattern_matcher():
 )
 def test_regex_from_pattern(pattern, regex):
     assert get_regex_from_pattern(pattern) == regex
+
+
+@pytest.mark.parametrize(
+    "paths, patterns, expected",
+    [
+        ([], [], None),
+        (["dir", "pf:file"], [], ["dir/", "file"]),
+        (["dir"], ["- dir/sub"], ["dir/"]),
+        (["dir"], ["+ fm:*.txt"], None),
+        (["sh:dir/*"], [], None),
+    ],
+)
+def test_pattern_matcher_path_prefixes(paths, patterns, expected):
+    matcher = PatternMatcher()
+    matcher.add_inclexcl([parse_inclexcl_command(pattern) for pattern in patterns])
+    matcher.add_includepaths(paths)
+    assert matcher.path_prefixes() == expected
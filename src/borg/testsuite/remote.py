@@ -7,7 +7,7 @@
 import pytest
 
 from ..constants import ROBJ_FILE_STREAM
-from ..remote import SleepingBandwidthLimiter, RepositoryCache, cache_if_remote
+from ..remote import SleepingBandwidthLimiter, RepositoryCache, PersistentObjectCache, cache_if_remote
 from ..repository import Repository
 from ..crypto.key import PlaintextKey
 from ..helpers import IntegrityError
@@ -241,3 +241,70 @@ def test_cache_corruption(self, decrypted_cache: RepositoryCache, H1, H2, H3):
 
         with pytest.raises(IntegrityError):
             assert next(iterator) == (4, b"5678")
+
+
+class TestPersistentObjectCache:
+    @pytest.fixture
+    def cache(self, tmpdir):
+        return PersistentObjectCache(H(0), 1000, path=str(tmpdir.join("objects")))
+
+    def test_simple(self, cache):
+        assert H(1) not in cache
+        assert cache.get(H(1)) is None
+        cache.put(H(1), b"1234")
+        assert H(1) in cache
+        assert cache.get(H(1)) == b"1234"
+        assert cache.hits == 1
+        assert cache.misses == 1
+        assert cache.size == cache.checksum_size + 4
+
+    def test_persistent(self, cache, tmpdir):
+        cache.put(H(1), b"1234")
+        cache.close()
+        cache = PersistentObjectCache(H(0), 1000, path=str(tmpdir.join("objects")))
+        assert cache.size == cache.checksum_size + 4
+        assert cache.get(H(1)) == b"1234"
+
+    def test_size_not_scanned(self, cache, tmpdir):
+        cache.put(H(1), bytes(100))
+        cache.close()
+        # another process added objects, the size is corrected by the next eviction
+        cache2 = PersistentObjectCache(H(0), 1000, path=str(tmpdir.join("objects")))
+        cache2.put(H(2), bytes(100))
+        cache2.close()
+        cache = PersistentObjectCache(H(0), 1000, path=str(tmpdir.join("objects")))
+        assert cache.size == 2 * (cache.checksum_size + 100)
+        # a cache without a stored size (e.g. created by an older borg) is scanned on the first put only
+        os.unlink(cache.size_path)
+        cache = PersistentObjectCache(H(0), 1000, path=str(tmpdir.join("objects")))
+        assert cache.size is None
+        cache.put(H(3), bytes(100))
+        assert cache.size == 3 * (cache.checksum_size + 100)
+
+    def test_manifest_not_cached(self, cache):
+        cache.put(bytes(32), b"manifest")
+        assert bytes(32) not in cache
+        assert cache.size == 0
+
+    def test_lru_eviction(self, cache):
+        for i in range(1, 4):
+            cache.put(H(i), bytes(300))
+            # make sure mtimes differ, even on file systems with coarse timestamps
+            os.utime(cache.key_filename(H(i)), ns=(i * 10**9, i * 10**9))
+        assert cache.get(H(1)) == bytes(300)  # H(1) is now the most recently used object
+        cache.put(H(4), bytes(300))  # exceeds the size limit
+        assert cache.evictions == 2
+        assert H(1) in cache
+        assert H(2) not in cache
+        assert H(3) not in cache
+        assert H(4) in cache
+        assert cache.size <= 0.9 * cache.size_limit
+
+    def test_corruption(self, cache):
+        cache.put(H(1), b"1234")
+        with open(cache.key_filename(H(1)), "r+b") as fd:
+            fd.seek(-1, io.SEEK_END)
+            fd.write(b"5")
+        assert cache.get(H(1)) is None
+        assert cache.corruptions == 1
+        assert H(1) not in cache
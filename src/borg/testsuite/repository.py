@@ -11,11 +11,12 @@
 from ..helpers import IntegrityError
 from ..helpers import msgpack
 from ..locking import Lock, LockFailed
+from ..manifest import Manifest
 from ..platformflags import is_win32
-from ..remote import RemoteRepository, InvalidRPCMethod, PathNotAllowed
+from ..remote import RemoteRepository, InvalidRPCMethod, PathNotAllowed, PersistentObjectCache
 from ..repository import Repository, LoggedIO, MAGIC, MAX_DATA_SIZE, TAG_DELETE, TAG_PUT2, TAG_PUT, TAG_COMMIT
 from ..repoobj import RepoObj
-from .hashindex import H
+from .hashindex import H, H2
 
 
 @pytest.fixture()
@@ -239,6 +240,17 @@ def test_scan(repo_fixtures, request):
             assert ids[x] == H(x)
 
 
+def test_physical_order(repository):
+    with repository:
+        for x in range(10):
+            repository.put(H(x), fchunk(b"SOMEDATA"))
+        repository.commit(compact=False)
+        repository.put(H(3), fchunk(b"MODIFIED"))  # H(3) is now stored after all other objects
+        repository.commit(compact=False)
+        ids = [H(x) for x in (3, 9, 42, 7, 0, 5)]
+        assert repository.physical_order(ids) == [H(0), H(5), H(7), H(9), H(3), H(42)]
+
+
 def test_scan_modify(repo_fixtures, request):
     with get_repository_from_fixture(repo_fixtures, request) as repository:
         for x in range(100):
@@ -1214,3 +1226,166 @@ def test_remote_borg_cmd(remote_repository):
         args.rsh = "ssh -i foo"
         remote_repository._args = args
         assert remote_repository.ssh_cmd(Location("ssh://example.com/foo")) == ["ssh", "-i", "foo", "example.com"]
+
+
+def test_remote_preload_throttled(remote_repository):
+    with remote_repository:
+        ids = [H(x) for x in range(300)]
+        for id in ids:
+            remote_repository.put(id, fchunk(bytes(1000)))
+        remote_repository.preload_buffer_limit = 10000
+        remote_repository.preload(ids)
+        for _ in range(3):
+            len(remote_repository)  # drives preloading while waiting for the response
+        # not everything was requested, the preload buffer is full and nobody consumes from it:
+        assert remote_repository.preload_ids
+        assert remote_repository.preload_buffered <= 2 * remote_repository.preload_buffer_limit
+        chunks = list(remote_repository.get_many(ids, is_preloaded=True))
+        assert [pdchunk(chunk) for chunk in chunks] == [bytes(1000)] * len(ids)
+        assert not remote_repository.preload_ids
+        assert not remote_repository.chunkid_to_msgids
+        assert not remote_repository.responses
+        assert remote_repository.preload_buffered == 0
+
+
+def test_remote_preload_throttled_get_not_preloaded(remote_repository):
+    with remote_repository:
+        ids = [H(x) for x in range(300)]
+        for id in ids:
+            remote_repository.put(id, fchunk(bytes(1000)))
+        remote_repository.preload_buffer_limit = 10000
+        remote_repository.preload(ids[100:])
+        # getting chunks that are not preloaded must not push the whole preload queue to the server
+        chunks = list(remote_repository.get_many(ids[:3], is_preloaded=True))
+        assert [pdchunk(chunk) for chunk in chunks] == [bytes(1000)] * 3
+        assert remote_repository.preload_ids
+        assert remote_repository.preload_buffered <= 2 * remote_repository.preload_buffer_limit
+        # chunks in the middle of the preload queue are requested right away and taken off the queue
+        chunks = list(remote_repository.get_many(ids[250:253], is_preloaded=True))
+        assert [pdchunk(chunk) for chunk in chunks] == [bytes(1000)] * 3
+        assert not set(ids[250:253]) & set(remote_repository.preload_ids)
+        rest = ids[100:250] + ids[253:]
+        chunks = list(remote_repository.get_many(rest, is_preloaded=True))
+        assert [pdchunk(chunk) for chunk in chunks] == [bytes(1000)] * len(rest)
+        assert not remote_repository.preload_ids
+        assert not remote_repository.preload_queued
+        assert not remote_repository.chunkid_to_msgids
+        assert not remote_repository.responses
+        assert remote_repository.preload_buffered == 0
+
+
+def test_remote_preload_cancel(remote_repository):
+    with remote_repository:
+        ids = [H(x) for x in range(200)]
+        for id in ids:
+            remote_repository.put(id, fchunk(b"SOMEDATA"))
+        remote_repository.preload(ids)
+        len(remote_repository)  # drives preloading
+        assert remote_repository.chunkid_to_msgids
+        remote_repository.cancel_preload(ids[:100])
+        assert pdchunk(next(remote_repository.get_many(ids[100:], is_preloaded=True))) == b"SOMEDATA"
+        remote_repository.cancel_preload()
+        assert not remote_repository.preload_ids
+        assert not remote_repository.chunkid_to_msgids
+        len(remote_repository)  # receives and drops responses still in flight
+        assert not remote_repository.responses
+        assert remote_repository.preload_buffered == 0
+        # chunks that are not (or no longer) preloaded are fetched normally:
+        chunks = list(remote_repository.get_many(ids[:3], is_preloaded=True))
+        assert [pdchunk(chunk) for chunk in chunks] == [b"SOMEDATA"] * 3
+
+
+def test_remote_object_cache(remote_repository, tmp_path):
+    with remote_repository:
+        ids = [H(x) for x in range(10)]
+        for id in ids:
+            remote_repository.put(id, fchunk(b"SOMEDATA"))
+        remote_repository.object_cache = cache = PersistentObjectCache(remote_repository.id, 10**6, path=tmp_path)
+        assert [pdchunk(chunk) for chunk in remote_repository.get_many(ids)] == [b"SOMEDATA"] * 10
+        assert (cache.hits, cache.misses) == (0, 10)
+        remote_repository.preload(ids[5:])
+        assert list(remote_repository.preload_ids) == []  # nothing to preload, all in the object cache
+        assert [pdchunk(chunk) for chunk in remote_repository.get_many(ids[5:], is_preloaded=True)] == [b"SOMEDATA"] * 5
+        assert (cache.hits, cache.misses) == (5, 10)
+        # objects evicted (e.g. by another borg process) are fetched from the repository:
+        os.unlink(cache.key_filename(ids[0]))
+        assert pdchunk(remote_repository.get(ids[0])) == b"SOMEDATA"
+        assert (cache.hits, cache.misses) == (5, 11)
+
+
+def test_remote_open_session(remote_repository):
+    with remote_repository:
+        remote_repository.put(Manifest.MANIFEST_ID, fchunk(b"MANIFEST"))
+        remote_repository.save_key(b"KEYDATA")
+        remote_repository.commit(compact=False)
+    with reopen(remote_repository) as repository:
+        # key and manifest came with the open_session response, no additional round trips.
+        msgid = repository.msgid
+        assert repository.load_key() == b"KEYDATA"
+        assert pdchunk(repository.get(Manifest.MANIFEST_ID)) == b"MANIFEST"
+        assert repository.msgid == msgid
+        # the manifest is only served from the session once, later gets see the current state.
+        repository.put(Manifest.MANIFEST_ID, fchunk(b"MANIFEST2"))
+        assert pdchunk(repository.get(Manifest.MANIFEST_ID)) == b"MANIFEST2"
+        assert repository.msgid > msgid
+
+
+def test_remote_open_session_fallback(remote_repository):
+    with remote_repository:
+        remote_repository.put(Manifest.MANIFEST_ID, fchunk(b"MANIFEST"))
+        remote_repository.commit(compact=False)
+    call = RemoteRepository.call
+
+    def old_server_call(self, cmd, args, **kw):
+        if cmd == "open_session":
+            raise InvalidRPCMethod(cmd)
+        return call(self, cmd, args, **kw)
+
+    with patch.object(RemoteRepository, "call", old_server_call):
+        with reopen(remote_repository) as repository:
+            assert repository.session_manifest is None
+            assert pdchunk(repository.get(Manifest.MANIFEST_ID)) == b"MANIFEST"
+
+
+def test_remote_read_connections(remote_repository):
+    with remote_repository:
+        ids = [H2(x) for x in range(100)]
+        for i, id in enumerate(ids):
+            remote_repository.put(id, fchunk(b"DATA%d" % i))
+        remote_repository.commit(compact=False)
+        remote_repository.read_connections = [
+            RemoteRepository(remote_repository.location, lock=False, read_connection=True) for _ in range(2)
+        ]
+        expected = [b"DATA%d" % i for i in range(100)]
+        assert [pdchunk(chunk) for chunk in remote_repository.get_many(ids)] == expected
+        # all connections were used:
+        assert all(conn.msgid > 1 for conn in remote_repository.read_connections)
+        remote_repository.preload(ids)
+        assert [pdchunk(chunk) for chunk in remote_repository.get_many(ids, is_preloaded=True)] == expected
+        assert not any(conn.chunkid_to_msgids for conn in remote_repository.connections)
+        remote_repository.preload(ids)
+        remote_repository.cancel_preload(ids[:50])
+        assert [pdchunk(c) for c in remote_repository.get_many(ids[50:], is_preloaded=True)] == expected[50:]
+        read_connections = remote_repository.read_connections
+        # modifying the repository closes the read connections, they would not see the modifications.
+        remote_repository.put(ids[0], fchunk(b"CHANGED"))
+        assert remote_repository.read_connections == []
+        assert all(conn.p is None for conn in read_connections)
+        assert pdchunk(remote_repository.get(ids[0])) == b"CHANGED"
+
+
+def test_remote_read_connections_in_flight(remote_repository):
+    with remote_repository:
+        ids = [H2(x) for x in range(100)]
+        for i, id in enumerate(ids):
+            remote_repository.put(id, fchunk(b"DATA%d" % i))
+        remote_repository.commit(compact=False)
+        remote_repository.read_connections = [
+            RemoteRepository(remote_repository.location, lock=False, read_connection=True) for _ in range(2)
+        ]
+        msgids = [conn.msgid for conn in remote_repository.connections]
+        chunks = remote_repository.get_many(ids)
+        assert pdchunk(next(chunks)) == b"DATA0"
+        # while waiting for the first object, the requests were sent over all connections.
+        assert all(conn.msgid > msgid + 1 for conn, msgid in zip(remote_repository.connections, msgids))
+        assert [pdchunk(chunk) for chunk in chunks] == [b"DATA%d" % i for i in range(1, 100)]